@@ -3,7 +3,10 @@ Admin interface for API models (tenant-specific)
 These admin interfaces will only show data for the current tenant
 """
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
+from .changes import delete_items
 from .models import Item
+from .search import search_items
 
 
 @admin.register(Item)
@@ -17,8 +20,27 @@ class ItemAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     readonly_fields = ['created_at', 'updated_at', 'created_by']
 
+    # Planner estimate instead of COUNT(*) on large tenants; skip the
+    # second, unfiltered count the changelist shows next to search results
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Full-text search on the GIN-indexed search column instead of ILIKE scans"""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        # The changelist applies its own ordering, so skip ranking
+        return search_items(queryset, search_term, rank=False), False
+
     def save_model(self, request, obj, form, change):
         """Auto-set created_by on creation"""
         if not change:  # Only on creation
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        """Leave a tombstone for delta sync clients"""
+        delete_items([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        delete_items(queryset.values_list('pk', flat=True))
@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.api'
     label = 'api'
+
+    def ready(self):
+        # Register cache invalidation handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,33 @@
+"""
+Test data helpers for the items bench_* commands
+"""
+from django.db import connection
+from .models import Item
+
+# Generated rows are named with this prefix so they can be told apart and deleted
+BENCH_PREFIX = 'bench-'
+INSERT_BATCH = 500000
+
+
+def fill_items(size, user):
+    """Insert generated items until the tenant's table holds at least size rows; returns the row count"""
+    existing = Item.objects.count()
+    table = connection.ops.quote_name(Item._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(existing, size, INSERT_BATCH):
+            stop = min(start + INSERT_BATCH, size)
+            # One row per second going back in time, with pairs sharing a timestamp
+            cursor.execute(
+                f'INSERT INTO {table} (name, description, created_by_id, created_at, updated_at) '
+                f"SELECT %s || n, 'Generated item ' || n, %s, now() - (n / 2) * interval '1 second', now() "
+                f'FROM generate_series(%s, %s) AS n',
+                [BENCH_PREFIX, user.pk, start, stop - 1],
+            )
+        if size > existing:
+            cursor.execute(f'ANALYZE {table}')
+    return max(size, existing)
+
+
+def delete_generated_items():
+    deleted, _ = Item.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    return deleted
@@ -0,0 +1,181 @@
+"""
+Response cache for item reads
+
+Entries are the response data of successful GETs, keyed by
+    (schema, tenant id, view, user scope, host, normalized query params, ETag)
+The ETag is the tenant's items version or the item's version
+(apps.api.versions), looked up on every request anyway for conditional
+GETs, so a committed write moves readers to new keys at once; nothing is
+ever served from a version that isn't current.
+
+Two layers: a per-worker TenantLocMemCache (apps.tenants.cache), where
+every tenant has its own LRU partition and byte budget
+(API_RESPONSE_CACHE_TENANT_BYTES), so a busy tenant only evicts its own
+entries; and an optional networked Django cache (API_RESPONSE_CACHE_ALIAS,
+e.g. Redis or Memcached), off by default, that lets workers reuse each
+other's work. When a tenant's version changes, its now unreachable entries
+are dropped from this worker's partition at once (see apps.api.signals);
+the networked cache lets them expire after API_RESPONSE_CACHE_TTL.
+
+Misses don't stampede: within a worker, concurrent requests for a key wait
+for one computation (SingleFlight); with a networked cache, the first worker
+takes a short lease in it and the others poll for its result.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from apps.core.lru import MISSING
+from apps.core.singleflight import SingleFlight
+from apps.tenants.cache import TenantLocMemCache
+
+# How long a worker may hold the shared lease, and how often the others poll for its result
+LEASE_SECONDS = 5
+POLL_INTERVAL = 0.05
+
+
+class ResponseCache:
+    """
+    Two-level cache of response data with single-flight misses
+    tenant_bytes 0 disables it
+    """
+
+    def __init__(self, tenant_bytes, ttl, alias=None, location='api.response'):
+        self.local = TenantLocMemCache(location, {
+            'TIMEOUT': ttl,
+            'OPTIONS': {'TENANT_MAX_BYTES': tenant_bytes},
+        })
+        self.ttl = ttl
+        self.alias = alias
+        self.flights = SingleFlight()
+        self.shared_hits = 0
+        self.lease_waits = 0
+
+    @property
+    def enabled(self):
+        return self.local.max_bytes > 0
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def get(self, key):
+        cache_key = self.cache_key(key)
+        data = self.local.get(cache_key, MISSING)
+        if data is MISSING and self.shared is not None:
+            data = self.shared.get(cache_key, MISSING)
+            if data is not MISSING:
+                self.shared_hits += 1
+                self.local.set(cache_key, data)
+        return data
+
+    def set(self, key, data):
+        cache_key = self.cache_key(key)
+        self.local.set(cache_key, data)
+        if self.shared is not None:
+            self.shared.set(cache_key, data, self.ttl)
+
+    def fetch(self, key, compute):
+        """
+        Cached data for key, or run compute() -> (response, data or MISSING)
+        Returns (data, None) when served from the cache or another caller's
+        computation, else (None, response) for the caller that computed it
+        """
+        data = self.get(key)
+        if data is not MISSING:
+            return data, None
+
+        computed = []
+
+        def load():
+            data = self.wait_for_lease(key)
+            if data is not MISSING:
+                return data
+            try:
+                response, data = compute()
+            finally:
+                self.release_lease(key)
+            computed.append(response)
+            if data is not MISSING:
+                self.set(key, data)
+            return data
+
+        data = self.flights.do(key, load)
+        if computed:
+            return None, computed[0]
+        if data is MISSING:
+            # The shared computation wasn't cacheable (e.g. an error response): compute our own
+            response, _ = compute()
+            return None, response
+        return data, None
+
+    def wait_for_lease(self, key):
+        """Take the shared lease for key, or wait for its holder's result; MISSING means compute"""
+        shared = self.shared
+        if shared is None:
+            return MISSING
+        lease = self.cache_key(key) + ':lease'
+        deadline = time.monotonic() + LEASE_SECONDS
+        while not shared.add(lease, 1, LEASE_SECONDS):
+            self.lease_waits += 1
+            time.sleep(POLL_INTERVAL)
+            data = self.get(key)
+            if data is not MISSING or time.monotonic() > deadline:
+                return data
+        return MISSING
+
+    def release_lease(self, key):
+        if self.shared is not None:
+            self.shared.delete(self.cache_key(key) + ':lease')
+
+    @staticmethod
+    def cache_key(key):
+        # Fixed length and charset, whatever the query string holds
+        return 'api.response:' + hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def forget_schema(self, schema_name):
+        """Drop this worker's entries for a tenant (their version is no longer current)"""
+        self.local.clear_tenant(schema_name)
+
+    def clear(self):
+        self.local.clear()
+
+    @property
+    def stats(self):
+        tenants = self.local.tenant_stats('*')
+        hits = sum(tenant['hits'] for tenant in tenants.values())
+        misses = sum(tenant['misses'] for tenant in tenants.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': sum(tenant['evictions'] for tenant in tenants.values()),
+            'size': sum(tenant['entries'] for tenant in tenants.values()),
+            'bytes': sum(tenant['bytes'] for tenant in tenants.values()),
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'tenants': tenants,
+            'shared_hits': self.shared_hits,
+            'shared_flights': self.flights.shared,
+            'lease_waits': self.lease_waits,
+        }
+
+
+response_cache = ResponseCache(
+    tenant_bytes=getattr(settings, 'API_RESPONSE_CACHE_TENANT_BYTES', 4 * 1024 * 1024),
+    ttl=getattr(settings, 'API_RESPONSE_CACHE_TTL', 300),
+    alias=getattr(settings, 'API_RESPONSE_CACHE_ALIAS', None),
+)
+
+
+def response_cache_key(request, view_name, scope, etag):
+    params = tuple(sorted((name, tuple(values)) for name, values in request.query_params.lists()))
+    tenant = getattr(connection, 'tenant', None)
+    return (
+        connection.schema_name, getattr(tenant, 'pk', None), view_name, scope,
+        request.scheme, request.get_host(), params, etag,
+    )
+
+
+def get_response_cache_stats():
+    return response_cache.stats
@@ -0,0 +1,184 @@
+"""
+Delta sync for items: what changed since a client's last sync token
+
+Every item and tombstone row carries sync_xid, the id of the transaction
+that last wrote it. A sync token holds the snapshot (pg_current_snapshot())
+taken when the previous sync started, and the next sync returns the rows
+written by transactions that snapshot couldn't see, i.e. committed after
+it. That is exact however long the writing transaction ran and whatever
+its updated_at says: a large import or a rename touching many items that
+commits after a client synced is still picked up by the next sync.
+
+Rows are read in (sync_xid, id) order from a composite index, from the
+snapshot's xmin, so every request is two range scans of at most
+API_SYNC_PAGE_SIZE rows. The snapshot is taken before the rows are read,
+so a row committed in between is sent again on the next sync; clients
+apply changes idempotently (upsert by id, ignore tombstones of unknown ids).
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Item, ItemTombstone
+from .versions import items_changed
+
+TOKEN_SALT = 'apps.api.changes.token'
+
+
+class InvalidSyncToken(ValueError):
+    """The token wasn't issued by this tenant's changes endpoint"""
+
+
+class SyncTokenExpired(ValueError):
+    """Tombstones the token would need have been pruned; the client must sync from scratch"""
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'API_SYNC_TOMBSTONE_RETENTION', 30))
+
+
+def sync_page_size():
+    return getattr(settings, 'API_SYNC_PAGE_SIZE', 500)
+
+
+def delete_items(ids):
+    """Delete items by id, leaving a tombstone for each; returns the number deleted"""
+    ids = list(ids)
+    with transaction.atomic():
+        deleted, _ = Item.objects.filter(pk__in=ids).delete()
+        record_deletions(ids)
+    return deleted
+
+
+def record_deletions(ids):
+    """
+    Tombstones for deleted item ids, and the items version bump
+    Every item deletion goes through here (delete_items, Item.delete(), and
+    the cascade from a deleted user in apps.api.signals)
+    """
+    ItemTombstone.objects.bulk_create([ItemTombstone(item_id=pk) for pk in ids])
+    items_changed()
+
+
+def current_snapshot():
+    """(xmin, xmax, in-progress xids) of the database snapshot right now"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_current_snapshot()::text')
+        xmin, xmax, in_progress = cursor.fetchone()[0].split(':')
+    return [int(xmin), int(xmax), [int(xid) for xid in in_progress.split(',') if xid]]
+
+
+def written_after(queryset, snapshot):
+    """Rows of queryset written by transactions snapshot doesn't see"""
+    xmin, xmax, in_progress = snapshot
+    return queryset.filter(sync_xid__gte=xmin).filter(Q(sync_xid__gte=xmax) | Q(sync_xid__in=in_progress))
+
+
+def encode_token(since, since_at, items_position=None, deleted_position=None, started=None):
+    """
+    since: snapshot (and its time) the changes are relative to, None for a first sync
+    While paging, the positions reached and started, the (snapshot, time) of the
+    sync's first page, which becomes since once the client is caught up
+    """
+    data = {
+        'schema': connection.schema_name,
+        'since': since,
+        'since_at': since_at.isoformat() if since_at else None,
+    }
+    if started is not None:
+        data.update(items=items_position, deleted=deleted_position,
+                    started=started[0], started_at=started[1].isoformat())
+    return signing.dumps(data, salt=TOKEN_SALT)
+
+
+def decode_token(token):
+    """
+    Returns the since snapshot, its time, the (sync_xid, id) positions of
+    items and tombstones, and the started (snapshot, time) of a sync token
+    """
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+        if data['schema'] != connection.schema_name:
+            raise InvalidSyncToken
+        since = snapshot_from(data['since'])
+        since_at = datetime.fromisoformat(data['since_at']) if data['since_at'] else None
+        items, deleted, started = None, None, None
+        if 'started' in data:
+            items, deleted = (position_from(data[key]) for key in ('items', 'deleted'))
+            started = snapshot_from(data['started']), datetime.fromisoformat(data['started_at'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidSyncToken
+    if since_at is not None and since_at < timezone.now() - tombstone_retention():
+        raise SyncTokenExpired
+    return since, since_at, items, deleted, started
+
+
+def snapshot_from(value):
+    if value is None:
+        return None
+    xmin, xmax, in_progress = value
+    return [int(xmin), int(xmax), [int(xid) for xid in in_progress]]
+
+
+def position_from(value):
+    return None if value is None else [int(value[0]), int(value[1])]
+
+
+def rows_after(queryset, position, limit):
+    """Up to limit rows after position (None: from the start) in (sync_xid, id) order"""
+    if position is not None:
+        xid, pk = position
+        queryset = queryset.filter(sync_xid__gte=xid).exclude(sync_xid=xid, id__lte=pk)
+    return list(queryset.order_by('sync_xid', 'id')[:limit])
+
+
+def last_position(rows, position):
+    if not rows:
+        return position
+    last = rows[-1]
+    if isinstance(last, dict):
+        return [last['sync_xid'], last['id']]
+    return [last.sync_xid, last.id]
+
+
+def get_changes(queryset, token=None):
+    """
+    Items of queryset changed, and ids deleted, since the sync token
+    (everything for a first sync). Returns (items, deleted ids, next token, has_more);
+    items are whatever the queryset yields (model instances or values() dicts)
+    Raises InvalidSyncToken or SyncTokenExpired
+
+    While has_more, the token resumes right after the rows sent; once caught
+    up, the next sync is relative to the snapshot taken on the first page,
+    so nothing committed during a multi-page sync is missed.
+    """
+    since, since_at, items_position, deleted_position, started = decode_token(token) if token else (None,) * 5
+    if started is None:
+        started = current_snapshot(), timezone.now()
+
+    limit = sync_page_size()
+    if since is None:
+        # A new client has everything, and no copies to delete
+        items, tombstones = rows_after(queryset, items_position, limit + 1), []
+    else:
+        items = rows_after(written_after(queryset, since), items_position, limit + 1)
+        tombstones = rows_after(written_after(ItemTombstone.objects.values('id', 'item_id', 'sync_xid'), since),
+                                deleted_position, limit + 1)
+    has_more = len(items) > limit or len(tombstones) > limit
+    items, tombstones = items[:limit], tombstones[:limit]
+
+    if has_more:
+        token = encode_token(since, since_at, last_position(items, items_position),
+                             last_position(tombstones, deleted_position), started)
+    else:
+        token = encode_token(*started)
+    return items, [row['item_id'] for row in tombstones], token, has_more
+
+
+def prune_tombstones():
+    """Delete tombstones past API_SYNC_TOMBSTONE_RETENTION; returns the number deleted"""
+    deleted, _ = ItemTombstone.objects.filter(deleted_at__lt=timezone.now() - tombstone_retention()).delete()
+    return deleted
@@ -0,0 +1,61 @@
+"""
+Filtering and ordering of item lists
+
+    ?created_by=<user id>
+    ?created_after=<datetime>&created_before=<datetime>
+    ?updated_after=<datetime>&updated_before=<datetime>
+    ?ordering=created_at|updated_at|name (prefix - for descending)
+
+Every accepted combination is one range scan of an Item index, with no
+sort: the index is picked by the ordering field, (timestamp, id) for
+created_at and updated_at and (name, id) for name, or its (created_by, ...)
+counterpart when filtering by creator, and created_by and the range are
+both index conditions. So a range must be on the ordering field (an
+updated_at range without ?ordering= is ordered by -updated_at), and a
+range on another column, which would walk the index filtering rows, is a
+400. id breaks ties in every ordering.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .pagination import KeysetPagination
+from .serializers import ItemFilterSerializer
+
+# Query parameter -> lookup
+RANGE_LOOKUPS = {
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+    'updated_after': 'updated_at__gte',
+    'updated_before': 'updated_at__lt',
+}
+
+
+class ItemFilter(BaseFilterBackend):
+    """
+    Item list filters and whitelisted orderings; invalid values are a 400
+    Keyset (?cursor=) pages keep their -created_at order, so ?ordering= with a cursor is a 400;
+    page-number pages follow ?ordering=
+    """
+    params = ('created_by', *RANGE_LOOKUPS, 'ordering')
+
+    def filter_queryset(self, request, queryset, view):
+        data = {param: request.query_params[param] for param in self.params if param in request.query_params}
+        if not data:
+            return queryset
+        keyset = KeysetPagination.cursor_query_param in request.query_params
+        serializer = ItemFilterSerializer(data=data, context={'keyset': keyset})
+        if not serializer.is_valid():
+            raise ValidationError(serializer.errors)
+        values = serializer.validated_data
+
+        if 'created_by' in values:
+            queryset = queryset.filter(created_by_id=values['created_by'])
+        queryset = queryset.filter(**{
+            lookup: values[param] for param, lookup in RANGE_LOOKUPS.items() if param in values
+        })
+        ordering = values.get('ordering')
+        if not ordering and any(param.startswith('updated_') for param in values):
+            ordering = '-updated_at'
+        if ordering:
+            descending = ordering.startswith('-')
+            queryset = queryset.order_by(ordering, '-id' if descending else 'id')
+        return queryset
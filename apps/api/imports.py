@@ -0,0 +1,184 @@
+"""
+Bulk item import from CSV or NDJSON, loaded with PostgreSQL COPY
+
+Input is read line by line and handled in batches of API_IMPORT_BATCH_SIZE
+rows: each row is validated with the ItemSerializer rules, and the valid
+ones are written to the tenant's api_item table with one
+`COPY ... FROM STDIN` per batch. Memory use depends on the batch size, not
+on the file size.
+
+The import runs in one transaction. Invalid rows are skipped and reported
+by line number; a file that can't be parsed at all (bad encoding, broken
+CSV quoting) aborts the import and nothing is loaded.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .models import Item
+from .serializers import ItemSerializer
+from .versions import items_changed
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+}
+
+
+class ImportFormatError(ValueError):
+    """The input can't be read as the given format"""
+
+
+class ImportReport:
+    """Outcome of an import: row counts and the first max_errors invalid rows"""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_batch_size():
+    return getattr(settings, 'API_IMPORT_BATCH_SIZE', 5000)
+
+
+def import_max_errors():
+    return getattr(settings, 'API_IMPORT_MAX_ERRORS', 100)
+
+
+def detect_format(content_type, filename=None):
+    """Input format from an upload's file extension or the request Content-Type, or None"""
+    if filename:
+        extension = filename.rpartition('.')[2].lower()
+        return extension if extension in FORMATS else None
+    return CONTENT_TYPES.get(content_type.partition(';')[0].strip().lower())
+
+
+def decode_lines(lines):
+    """Decode an iterable of byte lines as UTF-8 (a leading BOM is dropped)"""
+    for number, line in enumerate(lines, start=1):
+        try:
+            text = line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise ImportFormatError(f'Line {number} is not valid UTF-8')
+        yield text
+
+
+def read_rows(lines, import_format):
+    """
+    Yield (line number, row) for every record of the input
+    row is a dict, or a ValidationError for a record that isn't one
+    """
+    lines = decode_lines(lines)
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except csv.Error as exc:
+            raise ImportFormatError(f'Line {reader.line_num}: {exc}')
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [f'Invalid JSON: {exc}']})
+        else:
+            if not isinstance(row, dict):
+                row = serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a JSON object']})
+        yield number, row
+
+
+def copy_value(value):
+    """One column of a COPY text-format row"""
+    if value is None:
+        return '\\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_rows(columns, rows):
+    """Load rows (tuples matching columns) into the current schema's item table"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(map(copy_value, row)))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    quote_name = connection.ops.quote_name
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        quote_name(Item._meta.db_table), ', '.join(quote_name(column) for column in columns),
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def import_items(lines, import_format, user, batch_size=None, max_errors=None):
+    """
+    Validate and load items from an iterable of byte lines; returns an ImportReport
+    Raises ImportFormatError if the input can't be parsed
+    """
+    if import_format not in FORMATS:
+        raise ImportFormatError(f'Unknown format "{import_format}"')
+    batch_size = batch_size or import_batch_size()
+    report = ImportReport(max_errors=import_max_errors() if max_errors is None else max_errors)
+
+    # One serializer validates every row: building one per row costs more than validating it
+    serializer = ItemSerializer()
+    writable = [
+        (serializer_field.source, Item._meta.get_field(serializer_field.source))
+        for serializer_field in serializer.fields.values() if not serializer_field.read_only
+    ]
+    now = timezone.now()
+    columns = [model_field.column for _, model_field in writable] + ['created_by_id', 'created_at', 'updated_at']
+
+    def load(batch):
+        copy_rows(columns, batch)
+        report.imported += len(batch)
+
+    with transaction.atomic():
+        batch = []
+        for line, row in read_rows(lines, import_format):
+            try:
+                if isinstance(row, serializers.ValidationError):
+                    raise row
+                data = serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                report.add_error(line, exc.detail)
+                continue
+            batch.append(tuple(
+                model_field.get_prep_value(data[source]) if source in data else model_field.get_default()
+                for source, model_field in writable
+            ) + (user.pk, now, now))
+            if len(batch) >= batch_size:
+                load(batch)
+                batch = []
+        if batch:
+            load(batch)
+        if report.imported:
+            items_changed()
+    return report
@@ -0,0 +1,73 @@
+"""
+Management command to compare icontains and full-text search on items
+Usage: python manage.py bench_item_search --schema=school1 --size 1000000 --terms 123456 generated
+
+Tops the tenant's api_item table up to --size generated rows (named
+"bench-<n>", described "Generated item <n>"), then times, for each term,
+what a search page of GET /api/items/?search= runs (the count and the first
+page) with:
+- icontains: name ILIKE '%term%' OR description ILIKE '%term%', newest first
+- search: the GIN-indexed tsvector, ranked (apps.api.search)
+A rare term shows the index at work; a term matching every row shows the
+cost of ranking them all. Use --cleanup to delete the generated rows afterwards.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django_tenants.utils import tenant_context
+from rest_framework.settings import api_settings
+from apps.api.benchmarks import delete_generated_items, fill_items
+from apps.api.models import Item
+from apps.api.search import search_items
+from apps.core.benchmarks import get_tenant, measure, quiet_sql_logging, summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark icontains vs. full-text search of items on a large tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, default='school1', help='Tenant schema (default: school1)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument('--size', type=int, default=1000000, help='Item count (default: 1000000)')
+        parser.add_argument(
+            '--terms',
+            nargs='+',
+            default=['123456', 'generated'],
+            help='Search terms (default: 123456 generated)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Searches per measurement (default: 5)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete generated items when done')
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['schema'])
+        with tenant_context(tenant), quiet_sql_logging():
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'User "{options["username"]}" not found in {tenant.schema_name}')
+            total = fill_items(options['size'], user)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'Search on {total} items in {tenant.schema_name}, count + first page, '
+                f'median of {options["repeat"]} searches\n'
+            ))
+            self.stdout.write(f'{"term":>12}{"matches":>10}{"icontains ms":>14}{"search ms":>11}')
+
+            for term in options['terms']:
+                icontains = Item.objects.filter(Q(name__icontains=term) | Q(description__icontains=term))
+                search = search_items(Item.objects.all(), term)
+
+                def timed(queryset):
+                    def run():
+                        queryset.count()
+                        list(queryset.values('id')[:api_settings.PAGE_SIZE])
+                    return summarize(measure(run, options['repeat'], warmup=1))['p50']
+
+                self.stdout.write(
+                    f'{term:>12}{search.count():>10}{timed(icontains):>14.1f}{timed(search):>11.1f}'
+                )
+
+            if options['cleanup']:
+                deleted = delete_generated_items()
+                self.stdout.write(f'Deleted {deleted} generated items')
@@ -0,0 +1,75 @@
+"""
+Management command to compare ItemSerializer with the values() fast path
+Usage: python manage.py bench_item_serialization --schema=school1 --page-sizes 20 100 1000
+
+For each page size, fetches and serializes one page repeatedly:
+- serializer: shaped queryset (select_related/only) -> model instances -> ItemSerializer(many=True)
+- values: values() rows -> compiled plan (apps.api.values)
+and reports rows/second for each, including the query.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import tenant_context
+from apps.api.benchmarks import delete_generated_items, fill_items
+from apps.api.models import Item
+from apps.api.querysets import shape_queryset
+from apps.api.serializers import ItemSerializer
+from apps.api.values import get_values_plan
+from apps.core.benchmarks import get_tenant, measure, quiet_sql_logging
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rows/second of ItemSerializer vs. values()-based serialization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, default='school1', help='Tenant schema (default: school1)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument(
+            '--page-sizes',
+            type=int,
+            nargs='+',
+            default=[20, 100, 1000],
+            help='Rows per page (default: 20 100 1000)'
+        )
+        parser.add_argument('--repeat', type=int, default=50, help='Pages per measurement (default: 50)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete generated items when done')
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['schema'])
+        serializer = ItemSerializer()
+        plan = get_values_plan(serializer)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Item serialization on {tenant.schema_name}, {options["repeat"]} pages per measurement\n'
+        ))
+        self.stdout.write(f'{"rows":>6}{"serializer rows/s":>19}{"values rows/s":>15}{"speedup":>9}')
+
+        with tenant_context(tenant), quiet_sql_logging():
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'User "{options["username"]}" not found in {tenant.schema_name}')
+            fill_items(max(options['page_sizes']), user)
+
+            for size in options['page_sizes']:
+                def regular():
+                    page = list(shape_queryset(Item.objects.all(), serializer)[:size])
+                    return ItemSerializer(page, many=True).data
+
+                def fast():
+                    return plan.serialize(Item.objects.values(*plan.lookups)[:size])
+
+                if regular() != fast():
+                    raise CommandError('values() output differs from ItemSerializer')
+
+                rates = []
+                for func in (regular, fast):
+                    elapsed = sum(measure(func, options['repeat'], clock=time.process_time, warmup=3))
+                    rates.append(size * options['repeat'] / elapsed)
+                self.stdout.write(f'{size:>6}{rates[0]:>19.0f}{rates[1]:>15.0f}{rates[1] / rates[0]:>8.1f}x')
+
+            if options['cleanup']:
+                self.stdout.write(f'Deleted {delete_generated_items()} generated items')
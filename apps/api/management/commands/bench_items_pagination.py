@@ -0,0 +1,90 @@
+"""
+Management command to compare page-number and keyset pagination of GET /api/items/
+Usage: python manage.py bench_items_pagination --schema=school1 --sizes 10000 1000000 10000000
+
+Tops the tenant's api_item table up to each size with generated rows (named
+"bench-..."), then times page one and a page 90% deep in both modes.
+Page-number mode pays COUNT(*) plus an OFFSET scan; keyset mode should stay
+flat. Use --cleanup to delete the generated rows afterwards.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django_tenants.utils import tenant_context
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from apps.api.benchmarks import delete_generated_items, fill_items
+from apps.api.models import Item
+from apps.api.pagination import KeysetPagination
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.core.benchmarks import get_tenant, get_tenant_domain, measure, quiet_sql_logging, summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark page-number vs. keyset pagination of /api/items/ at growing table sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, default='school1', help='Tenant schema (default: school1)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 1000000, 10000000],
+            help='Item counts to test (default: 10000 1000000 10000000)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per measurement (default: 5)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete generated items when done')
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['schema'])
+        with tenant_context(tenant):
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'User "{options["username"]}" not found in {tenant.schema_name}')
+            token = str(TenantTokenObtainPairSerializer.get_token(user).access_token)
+        client = Client(HTTP_HOST=get_tenant_domain(tenant), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'GET /api/items/ on {tenant.schema_name}, median of {options["repeat"]} requests\n'
+        ))
+        self.stdout.write(
+            f'{"items":>10}{"page 1 ms":>12}{"page deep ms":>14}{"cursor 1 ms":>13}{"cursor deep ms":>16}'
+        )
+
+        with quiet_sql_logging():
+            for size in sorted(options['sizes']):
+                with tenant_context(tenant):
+                    total = fill_items(size, user)
+                    depth = int(total * 0.9)
+                    deep_page = depth // api_settings.PAGE_SIZE + 1
+                    deep_cursor = self.cursor_at(depth)
+
+                def timed(url):
+                    def request():
+                        response = client.get(url)
+                        if response.status_code != 200:
+                            raise CommandError(f'GET {url} returned {response.status_code}')
+                    return summarize(measure(request, options['repeat'], warmup=1))['p50']
+
+                self.stdout.write(
+                    f'{total:>10}{timed("/api/items/"):>12.1f}'
+                    f'{timed(f"/api/items/?page={deep_page}"):>14.1f}'
+                    f'{timed("/api/items/?cursor="):>13.1f}'
+                    f'{timed(deep_cursor):>16.1f}'
+                )
+
+            if options['cleanup']:
+                with tenant_context(tenant):
+                    deleted = delete_generated_items()
+                self.stdout.write(f'Deleted {deleted} generated items')
+
+    def cursor_at(self, offset):
+        """Keyset URL for the page starting after the row at offset (looked up untimed)"""
+        row = Item.objects.order_by('-created_at', '-id').only('id', 'created_at')[offset]
+        paginator = KeysetPagination()
+        paginator.base_url = '/api/items/?cursor='
+        return replace_query_param(paginator.encode_cursor(row, reverse=False), 'page_size',
+                                   api_settings.PAGE_SIZE)
@@ -0,0 +1,73 @@
+"""
+Management command to partition a tenant's items table by created_at month
+Usage: python manage.py partition_items --schema=school1 [--batch-size=10000] [--pause=0.1] [--drop-old]
+       python manage.py partition_items --ensure [--schema=school1]
+
+Converts the tenant's api_item online (see apps.api.partitioning): writes
+keep working during the copy, and only the final rename takes a short
+exclusive lock. If it is interrupted, run it again and it continues.
+--ensure creates the partitions for the next API_ITEM_PARTITION_MONTHS_AHEAD
+months in every partitioned tenant (or only --schema); schedule it e.g. daily.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django_tenants.utils import get_public_schema_name, tenant_context
+from apps.api import partitioning
+from apps.tenants.models import Client
+
+
+class Command(BaseCommand):
+    help = "Partition a tenant's items table by created_at month, or create upcoming partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, help='Tenant schema (required unless --ensure)')
+        parser.add_argument('--ensure', action='store_true',
+                            help='Only create upcoming partitions of already partitioned tenants')
+        parser.add_argument('--months-ahead', type=int,
+                            help='Partitions to create ahead (default: API_ITEM_PARTITION_MONTHS_AHEAD)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows copied per transaction (default: 10000)')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches (default: 0)')
+        parser.add_argument('--drop-old', action='store_true',
+                            help='Drop the unpartitioned table once the partitioned one is in place')
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["schema"]}" not found')
+        elif not options['ensure']:
+            raise CommandError('Pass --schema to partition a tenant, or --ensure')
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                if options['ensure']:
+                    created = partitioning.ensure_partitions(options['months_ahead'])
+                    if created:
+                        self.stdout.write(f'{tenant.schema_name}: created {", ".join(created)}')
+                else:
+                    self.partition(tenant, options)
+
+    def partition(self, tenant, options):
+        schema = tenant.schema_name
+        if not partitioning.is_partitioned():
+            if partitioning.prepare(options['months_ahead']):
+                self.stdout.write(f'{schema}: created the partitioned table, mirroring writes')
+            else:
+                self.stdout.write(f'{schema}: resuming the conversion')
+
+            def progress(copied):
+                self.stdout.write(f'{schema}: copied {copied} rows')
+
+            copied = partitioning.backfill(options['batch_size'], options['pause'], progress)
+            self.stdout.write(f'{schema}: backfill done ({copied} rows copied)')
+            try:
+                partitioning.swap()
+            except DatabaseError as exc:
+                raise CommandError(f'{schema}: swap failed, run the command again ({exc})')
+            self.stdout.write(self.style.SUCCESS(f'{schema}: items table is now partitioned by month'))
+        else:
+            self.stdout.write(f'{schema}: items table is already partitioned')
+
+        if options['drop_old'] and partitioning.drop_unpartitioned():
+            self.stdout.write(f'{schema}: dropped the unpartitioned table')
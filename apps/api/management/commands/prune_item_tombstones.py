@@ -0,0 +1,34 @@
+"""
+Management command to delete item tombstones past their retention from every tenant schema
+Usage: python manage.py prune_item_tombstones [--schema=school1]
+
+Tombstones older than API_SYNC_TOMBSTONE_RETENTION days are only needed by
+sync tokens that old, which /api/items/changes/ rejects with 410 anyway.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_public_schema_name, tenant_context
+from apps.api.changes import prune_tombstones
+from apps.tenants.models import Client
+
+
+class Command(BaseCommand):
+    help = 'Delete item tombstones past API_SYNC_TOMBSTONE_RETENTION in each tenant schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            type=str,
+            help='Only prune this tenant schema'
+        )
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["schema"]}" not found')
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                deleted = prune_tombstones()
+            self.stdout.write(f'{tenant.schema_name}: deleted {deleted} expired item tombstones')
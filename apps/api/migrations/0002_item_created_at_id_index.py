@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-17 21:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        # Build the composite index before dropping the one it supersedes
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['-created_at', '-id'], name='api_item_created_5c4759_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='api_item_created_b60ae2_idx',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.9 on 2026-10-17 21:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_item_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['updated_at', 'id'], name='api_item_updated_7c7bbb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemtombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='api_itemtom_deleted_186a67_idx'),
+        ),
+    ]
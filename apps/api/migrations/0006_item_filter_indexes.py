@@ -0,0 +1,38 @@
+# Generated by Django 5.0.9 on 2026-10-17 22:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_item_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='api_item_created_fb462f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_by', 'updated_at', 'id'], name='api_item_created_757651_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'id'], name='api_item_name_970455_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_by', 'name', 'id'], name='api_item_created_eb7409_idx'),
+        ),
+        # Covered by the composites above, which lead with created_by
+        migrations.AlterField(
+            model_name='item',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
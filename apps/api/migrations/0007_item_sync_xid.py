@@ -0,0 +1,49 @@
+# Generated by Django 5.0.9 on 2026-10-17 23:02
+
+import apps.api.models
+from django.conf import settings
+from django.db import migrations, models
+
+# Inserts take sync_xid from the column default; updates, whichever way they are
+# issued (save(), queryset.update(), raw SQL), from this trigger
+SYNC_XID_TRIGGER = """
+CREATE FUNCTION api_item_sync_xid() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.sync_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$;
+CREATE TRIGGER api_item_sync_xid BEFORE UPDATE ON api_item FOR EACH ROW EXECUTE FUNCTION api_item_sync_xid();
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_item_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='sync_xid',
+            field=models.BigIntegerField(db_default=apps.api.models.CurrentXactId(), editable=False),
+        ),
+        migrations.AddField(
+            model_name='itemtombstone',
+            name='sync_xid',
+            field=models.BigIntegerField(db_default=apps.api.models.CurrentXactId(), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['sync_xid', 'id'], name='api_item_sync_xi_5a334c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemtombstone',
+            index=models.Index(fields=['sync_xid', 'id'], name='api_itemtom_sync_xi_9bf809_idx'),
+        ),
+        migrations.RunSQL(
+            SYNC_XID_TRIGGER,
+            reverse_sql='DROP TRIGGER api_item_sync_xid ON api_item; DROP FUNCTION api_item_sync_xid();',
+        ),
+    ]
@@ -0,0 +1,128 @@
+"""
+View mixins for the API
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+from apps.core.lru import MISSING
+from .cache import response_cache, response_cache_key
+from .querysets import shape_queryset
+
+
+# Connection housekeeping (tenant search_path, ATOMIC_REQUESTS savepoints) isn't the view's doing
+UNCOUNTED_PREFIXES = ('SET ', 'SAVEPOINT ', 'RELEASE SAVEPOINT ', 'ROLLBACK TO SAVEPOINT ')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (when budgets are enforced) if a request runs more queries than its view allows"""
+
+
+class SerializerQuerysetMixin:
+    """
+    Shape the view's queryset for its serializer (select_related/only, see
+    apps.api.querysets), for both list and detail lookups
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return shape_queryset(queryset, self.get_serializer())
+
+
+class QueryBudgetMixin:
+    """
+    Declare the most queries a request to the view may run
+
+        query_budget = {'GET': 3, 'POST': 2}   # or one int for every method
+
+    Counted from authentication to the rendered response. Enforced only when
+    API_ENFORCE_QUERY_BUDGETS is on (the test suite), so regressions such as
+    an N+1 fail tests instead of production requests.
+    """
+    query_budget = None
+
+    def get_query_budget(self, method):
+        if isinstance(self.query_budget, dict):
+            return self.query_budget.get(method)
+        return self.query_budget
+
+    def dispatch(self, request, *args, **kwargs):
+        budget = self.get_query_budget(request.method)
+        if budget is None or not getattr(settings, 'API_ENFORCE_QUERY_BUDGETS', False):
+            return super().dispatch(request, *args, **kwargs)
+
+        executed = []
+
+        def count_query(execute, sql, params, many, context):
+            if not sql.startswith(UNCOUNTED_PREFIXES):
+                executed.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = super().dispatch(request, *args, **kwargs)
+
+        if len(executed) > budget:
+            queries = '\n'.join(f'  {sql}' for sql in executed)
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ran {len(executed)} queries, budget is {budget}:\n{queries}'
+            )
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since GETs with 304 from cheap validators
+
+    Views override get_validators() -> (etag, last_modified datetime or None),
+    which runs after authentication and before the regular get(), so a 304
+    never reaches the queryset or the serializer. ETag and Last-Modified are
+    set on 200 and 304 responses. Without validators (the default, or
+    (None, None) for a given request) the GET is served unconditionally.
+    """
+    etag = None
+
+    def get_validators(self):
+        return None, None
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        self.etag = etag
+        if etag is None and last_modified is None:
+            return super().get(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag is not None:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ResponseCacheMixin:
+    """
+    Serve successful GETs from the response cache (apps.api.cache)
+
+    Keyed by the ETag that ConditionalGetMixin computed, so it goes after
+    that mixin in the bases. cache_scope is 'tenant' when every user of the
+    tenant gets the same data, or 'user' to keep entries per user.
+    """
+    cache_scope = 'tenant'
+
+    def get_cache_scope(self, request):
+        return f'user:{request.user.pk}' if self.cache_scope == 'user' else 'tenant'
+
+    def get(self, request, *args, **kwargs):
+        if self.etag is None or not response_cache.enabled:
+            return super().get(request, *args, **kwargs)
+
+        def compute():
+            response = super(ResponseCacheMixin, self).get(request, *args, **kwargs)
+            return response, response.data if response.status_code == 200 else MISSING
+
+        key = response_cache_key(request, type(self).__name__, self.get_cache_scope(request), self.etag)
+        data, response = response_cache.fetch(key, compute)
+        return response if response is not None else Response(data)
@@ -1,11 +1,32 @@
 """
 Example API models (tenant-specific)
 """
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 User = get_user_model()
 
+# Text search configuration of Item.search; queries must use the same one
+SEARCH_CONFIG = 'english'
+
+
+class CurrentXactId(models.Func):
+    """Id of the current transaction, pg_current_xact_id(), as a bigint"""
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = models.BigIntegerField()
+
+
+class ItemManager(models.Manager):
+    """
+    Loads items without their search document: it is only ever read in SQL
+    (apps.api.search), and fetching it would ship a tsvector per row
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search')
+
 
 class Item(models.Model):
     """
@@ -14,15 +35,105 @@ class Item(models.Model):
     """
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='items')
+    # Indexed by the (created_by, ...) composites below
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='items', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every save; the item's ETag (see apps.api.versions). The database
+    # default covers COPY and raw inserts
+    version = models.PositiveIntegerField(default=1, db_default=1, editable=False)
+    # Full-text search document (name ranks above description), computed by
+    # PostgreSQL on every write, including bulk writes and COPY (see apps.api.search)
+    search = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Transaction that last wrote the row: the database default on insert (COPY
+    # included) and a trigger on every update; delta sync's watermark (apps.api.changes)
+    sync_xid = models.BigIntegerField(db_default=CurrentXactId(), editable=False)
+
+    objects = ItemManager()
 
     class Meta:
-        ordering = ['-created_at']
+        # id breaks created_at ties so the order is strict (keyset pagination relies on it)
+        ordering = ['-created_at', '-id']
         indexes = [
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            # Delta sync (GET /api/items/changes/) scans rows written since a snapshot
+            models.Index(fields=['sync_xid', 'id']),
+            # Filters and orderings of the items API (apps.api.filters)
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['created_by', '-created_at', '-id']),
+            models.Index(fields=['created_by', 'updated_at', 'id']),
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['created_by', 'name', 'id']),
+            # ?search= on the items API and the admin
+            GinIndex(fields=['search']),
         ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        from .versions import items_changed
+
+        updating = not self._state.adding
+        if updating:
+            # Incremented in SQL so concurrent saves can't end on the same version
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if updating:
+            # Reloaded from the database on next access
+            del self.version
+        items_changed()
+
+    def delete(self, *args, **kwargs):
+        from .changes import record_deletions
+
+        pk = self.pk
+        with transaction.atomic(using=kwargs.get('using')):
+            result = super().delete(*args, **kwargs)
+            record_deletions([pk])
+        return result
+
+
+class ItemTombstone(models.Model):
+    """
+    Marks a deleted item so delta sync clients can drop their copy
+    Written by apps.api.changes.delete_items; pruned after API_SYNC_TOMBSTONE_RETENTION
+    """
+    item_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    # Transaction that deleted the item, as Item.sync_xid
+    sync_xid = models.BigIntegerField(db_default=CurrentXactId(), editable=False)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            # Pruning
+            models.Index(fields=['deleted_at', 'id']),
+            # Delta sync
+            models.Index(fields=['sync_xid', 'id']),
+        ]
+
+    def __str__(self):
+        return f'item {self.item_id}'
+
+
+class TenantVersion(models.Model):
+    """
+    Per-tenant change counter for a collection (e.g. 'items')
+    The collection's ETag; bumped after every committed write (see apps.api.versions)
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.key} v{self.version}'
@@ -0,0 +1,167 @@
+"""
+Pagination for the items API
+
+Clients that send a `cursor` parameter (an empty one for the first page) get
+keyset pagination: no COUNT(*), no OFFSET, so every page costs the same as
+page one. Everyone else keeps the page-number format, with `count` taken
+from the planner estimate on large tables (apps.core.pagination).
+"""
+from datetime import datetime
+
+from django.core import signing
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from apps.core.pagination import EstimatedCountPaginator
+
+CURSOR_SALT = 'apps.api.pagination.cursor'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a strict (timestamp, id) ordering, newest first
+
+    The cursor is the signed (timestamp, id) of the boundary row, so paging
+    is a range scan on the composite index, e.g. for the next page:
+        WHERE created_at <= t AND (created_at < t OR id < i)
+        ORDER BY created_at DESC, id DESC LIMIT n + 1
+    The first condition is the index range; the second only filters ties.
+    Response format matches DRF's CursorPagination (next/previous/results).
+    Pages may hold model instances or values() dicts.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    timestamp_field = 'created_at'
+    id_field = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        timestamp_field, id_field = self.timestamp_field, self.id_field
+        # Sparse fieldsets may leave the cursor columns out of the projection
+        if queryset._fields:
+            missing = [name for name in (timestamp_field, id_field) if name not in queryset._fields]
+            if missing:
+                queryset = queryset.values(*queryset._fields, *missing)
+        else:
+            loaded, deferred = queryset.query.deferred_loading
+            if not deferred and loaded and timestamp_field not in loaded:
+                queryset = queryset.only(*loaded, timestamp_field)
+        if reverse:
+            queryset = queryset.order_by(timestamp_field, id_field)
+        else:
+            queryset = queryset.order_by(f'-{timestamp_field}', f'-{id_field}')
+
+        if position is not None:
+            timestamp, pk = position
+            if reverse:
+                queryset = queryset.filter(**{f'{timestamp_field}__gte': timestamp}).exclude(
+                    **{timestamp_field: timestamp, f'{id_field}__lte': pk}
+                )
+            else:
+                queryset = queryset.filter(**{f'{timestamp_field}__lte': timestamp}).exclude(
+                    **{timestamp_field: timestamp, f'{id_field}__gte': pk}
+                )
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going backwards, "more" means older pages; a previous page exists
+        # going forwards whenever we started from a cursor
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Return ((timestamp, id) or None, reverse) from the signed cursor parameter"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            timestamp, pk, reverse = signing.loads(encoded, salt=CURSOR_SALT)
+            return (datetime.fromisoformat(timestamp), int(pk)), bool(reverse)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row, reverse):
+        if isinstance(row, dict):
+            timestamp, pk = row[self.timestamp_field], row[self.id_field]
+        else:
+            timestamp, pk = getattr(row, self.timestamp_field), getattr(row, self.id_field)
+        timestamp = timestamp.isoformat()
+        cursor = signing.dumps([timestamp, pk, reverse], salt=CURSOR_SALT)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class EstimatedPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination without COUNT(*) on large unfiltered tables
+    `count` is exact below TENANT_EXACT_COUNT_THRESHOLD rows or when filtered
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+
+class ItemPagination(BasePagination):
+    """
+    Keyset pagination when the request has a `cursor` parameter, page numbers otherwise
+    """
+    cursor_class = KeysetPagination
+    page_number_class = EstimatedPageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
@@ -0,0 +1,358 @@
+"""
+Monthly range partitioning of a tenant's api_item table (opt-in, per tenant)
+
+For the few tenants that hold most items, `manage.py partition_items`
+converts api_item into a table partitioned by created_at month, online:
+
+1. prepare(): create api_item_partitioned with the same columns, defaults,
+   generated search column and checks, and a primary key of (id, created_at),
+   because it must include the partition key. Create month partitions from
+   the oldest item to API_ITEM_PARTITION_MONTHS_AHEAD months ahead, plus a
+   default partition. Copy every index, foreign key and trigger. Add a
+   trigger on api_item that mirrors each insert, update and delete into
+   the new table.
+2. backfill(): copy the existing rows in id order, one short transaction
+   per batch. Rows are share-locked while they are copied, so a concurrent
+   update lands either before the copy or through the trigger after it.
+3. swap(): under a brief exclusive lock, drop the trigger and rename the
+   tables (with their indexes, constraints and id sequences). The
+   partitioned table becomes api_item; the old one stays as
+   api_item_unpartitioned until drop_unpartitioned(), without its foreign
+   keys, so its stale rows never block deleting a user.
+
+Item.objects and the views are unchanged. The model still treats id as the
+primary key, and ids still come from one sequence, so they stay unique.
+created_at ranges and orderings only read the partitions they cover.
+Later migrations on api_item (fields, indexes) apply to the parent and
+reach every partition.
+
+ensure_partitions() (`partition_items --ensure`, run e.g. daily) keeps
+partitions created ahead of time. Rows that land in the default partition
+in the meantime move into their month's partition when it is created.
+"""
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Item
+
+PARTITIONED_SUFFIX = '_partitioned'
+UNPARTITIONED_SUFFIX = '_unpartitioned'
+# Postgres identifier length limit
+MAX_NAME_LENGTH = 63
+
+
+class PartitioningError(RuntimeError):
+    """The tenant's items table isn't in the state the step expects"""
+
+
+def months_ahead():
+    return getattr(settings, 'API_ITEM_PARTITION_MONTHS_AHEAD', 3)
+
+
+def qualified(name):
+    """name in the current tenant schema (independent of the search_path mode)"""
+    return f'{connection.ops.quote_name(connection.schema_name)}.{connection.ops.quote_name(name)}'
+
+
+def suffixed(name, suffix):
+    return name[:MAX_NAME_LENGTH - len(suffix)] + suffix
+
+
+def copied_columns():
+    """Columns copied between the tables; search is generated on each side"""
+    return [field.column for field in Item._meta.concrete_fields if not field.generated]
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def partition_name(month):
+    return f'{Item._meta.db_table}_p{month:%Y%m}'
+
+
+def default_partition_name():
+    return f'{Item._meta.db_table}_default'
+
+
+def table_kind(name):
+    """pg_class.relkind of a table in the current schema ('r' plain, 'p' partitioned), or None"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [qualified(name)])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def is_partitioned():
+    return table_kind(Item._meta.db_table) == 'p'
+
+
+def copied_indexes(table):
+    """(name, unique, 'USING ...' definition) of the table's indexes other than the primary key"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, i.indisunique, pg_get_indexdef(i.indexrelid) FROM pg_index i '
+            'JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE i.indrelid = to_regclass(%s) AND NOT i.indisprimary ORDER BY c.relname',
+            [qualified(table)],
+        )
+        return [(name, unique, definition.split(' USING ', 1)[1]) for name, unique, definition in cursor.fetchall()]
+
+
+def copied_foreign_keys(table):
+    """(name, definition) of the table's foreign keys"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f' ORDER BY conname",
+            [qualified(table)],
+        )
+        return cursor.fetchall()
+
+
+def copied_triggers(table):
+    """
+    (CREATE TRIGGER ... ON, FOR EACH ROW ...) halves of the definitions of the
+    table's triggers (e.g. the sync_xid one), other than the mirror
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_get_triggerdef(oid) FROM pg_trigger '
+            'WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal AND tgname <> %s ORDER BY tgname',
+            [qualified(table), f'{table}_mirror'],
+        )
+        return [tuple(re.split(r'(?<= ON )\S+ ', definition, maxsplit=1)) for definition, in cursor.fetchall()]
+
+
+def create_partition(parent, month):
+    """
+    Create the partition of parent for a month unless it exists; returns whether it was created
+    Rows of that month already in the default partition are moved into it
+    """
+    name = partition_name(month)
+    if table_kind(name) is not None:
+        return False
+    start, end = month, add_months(month, 1)
+    default = default_partition_name()
+    columns = ', '.join(connection.ops.quote_name(column) for column in copied_columns())
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        stranded = False
+        if table_kind(default) is not None:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {qualified(default)} WHERE created_at >= %s AND created_at < %s)',
+                [start, end],
+            )
+            stranded = cursor.fetchone()[0]
+        if stranded:
+            # Postgres refuses a partition whose rows sit in the default partition: set them aside first
+            # (after the deferred foreign key checks of this transaction, which block ALTER TABLE)
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'ALTER TABLE {qualified(parent)} DETACH PARTITION {qualified(default)}')
+        cursor.execute(
+            f'CREATE TABLE {qualified(name)} PARTITION OF {qualified(parent)} FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+        if stranded:
+            cursor.execute(
+                f'INSERT INTO {qualified(name)} ({columns}) SELECT {columns} FROM {qualified(default)} '
+                f'WHERE created_at >= %s AND created_at < %s',
+                [start, end],
+            )
+            cursor.execute(f'DELETE FROM {qualified(default)} WHERE created_at >= %s AND created_at < %s', [start, end])
+            cursor.execute(f'ALTER TABLE {qualified(parent)} ATTACH PARTITION {qualified(default)} DEFAULT')
+    return True
+
+
+def prepare(ahead=None):
+    """
+    Create the partitioned copy of api_item and start mirroring writes into it
+    Returns False if that was already done (an interrupted conversion resumes)
+    """
+    table = Item._meta.db_table
+    new = table + PARTITIONED_SUFFIX
+    if is_partitioned():
+        raise PartitioningError(f'{connection.schema_name}.{table} is already partitioned')
+    if table_kind(new) is not None:
+        return False
+    ahead = months_ahead() if ahead is None else ahead
+    columns = [connection.ops.quote_name(column) for column in copied_columns()]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {qualified(new)} (LIKE {qualified(table)} INCLUDING DEFAULTS INCLUDING GENERATED '
+            f'INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {qualified(new)} ADD CONSTRAINT '
+                       f'{connection.ops.quote_name(new + "_pkey")} PRIMARY KEY (id, created_at)')
+        # Copies get temporary names; swap() gives them the originals
+        for name, unique, definition in copied_indexes(table):
+            cursor.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX {connection.ops.quote_name(suffixed(name, "_p"))} '
+                           f'ON {qualified(new)} USING {definition}')
+        for name, definition in copied_foreign_keys(table):
+            cursor.execute(f'ALTER TABLE {qualified(new)} ADD CONSTRAINT '
+                           f'{connection.ops.quote_name(suffixed(name, "_p"))} {definition}')
+        # Trigger names are per table: the copies keep theirs
+        for head, tail in copied_triggers(table):
+            cursor.execute(f'{head}{qualified(new)} {tail}')
+
+        cursor.execute(f'SELECT min(created_at) FROM {qualified(table)}')
+        oldest = cursor.fetchone()[0] or timezone.now()
+        month, last = month_start(oldest), add_months(month_start(timezone.now()), ahead)
+        while month <= last:
+            create_partition(new, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {qualified(default_partition_name())} PARTITION OF {qualified(new)} DEFAULT')
+
+        # Waits for in-flight writes to api_item, so backfill() sees every row the trigger misses
+        function = qualified(f'{table}_mirror')
+        cursor.execute(f"""
+            CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {qualified(new)} WHERE id = OLD.id AND created_at = OLD.created_at;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {qualified(new)} ({', '.join(columns)})
+                    VALUES ({', '.join(f'NEW.{column}' for column in columns)})
+                    ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """)
+        cursor.execute(f'CREATE TRIGGER {connection.ops.quote_name(f"{table}_mirror")} '
+                       f'AFTER INSERT OR UPDATE OR DELETE ON {qualified(table)} '
+                       f'FOR EACH ROW EXECUTE FUNCTION {function}()')
+    return True
+
+
+def backfill(batch_size, pause=0, progress=None):
+    """
+    Copy api_item's rows into the partitioned table, batch_size ids per
+    transaction, sleeping pause seconds in between; progress(copied) is
+    called after each batch. Rows already copied are skipped
+    Returns the number of rows copied
+    """
+    table = Item._meta.db_table
+    new = table + PARTITIONED_SUFFIX
+    if table_kind(new) is None:
+        raise PartitioningError(f'{connection.schema_name}.{new} does not exist; prepare first')
+    columns = ', '.join(connection.ops.quote_name(column) for column in copied_columns())
+
+    copied, last = 0, 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {qualified(table)} WHERE id > %s ORDER BY id OFFSET %s LIMIT 1',
+                           [last, batch_size - 1])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(f'SELECT max(id) FROM {qualified(table)} WHERE id > %s', [last])
+                row = cursor.fetchone()
+            if row[0] is None:
+                return copied
+            cursor.execute(
+                f'INSERT INTO {qualified(new)} ({columns}) SELECT {columns} FROM {qualified(table)} '
+                f'WHERE id > %s AND id <= %s FOR SHARE ON CONFLICT DO NOTHING',
+                [last, row[0]],
+            )
+            copied += cursor.rowcount
+        last = row[0]
+        if progress is not None:
+            progress(copied)
+        if pause:
+            time.sleep(pause)
+
+
+def swap(lock_timeout='5s'):
+    """
+    Make the partitioned table api_item, keeping the old one as api_item_unpartitioned
+    Waits at most lock_timeout for the exclusive lock (the error is safe to retry)
+    """
+    table = Item._meta.db_table
+    new, old = table + PARTITIONED_SUFFIX, table + UNPARTITIONED_SUFFIX
+    if table_kind(new) != 'p':
+        raise PartitioningError(f'{connection.schema_name}.{new} does not exist; prepare first')
+    quote = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT set_config(%s, %s, true)', ['lock_timeout', lock_timeout])
+        cursor.execute(f'LOCK TABLE {qualified(table)} IN ACCESS EXCLUSIVE MODE')
+        # Deferred foreign key checks still pending in this transaction would block the renames
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'DROP TRIGGER {quote(f"{table}_mirror")} ON {qualified(table)}')
+        cursor.execute(f'DROP FUNCTION {qualified(f"{table}_mirror")}()')
+
+        indexes = [name for name, _, _ in copied_indexes(table)]
+        foreign_keys = [name for name, _ in copied_foreign_keys(table)]
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [qualified(table), 'id'])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f'SELECT last_value FROM {sequence}')
+        last_id = cursor.fetchone()[0]
+
+        # Old table and its objects out of the way
+        cursor.execute(f'ALTER TABLE {qualified(table)} RENAME TO {quote(old)}')
+        cursor.execute(f'ALTER TABLE {qualified(old)} RENAME CONSTRAINT {quote(table + "_pkey")} TO {quote(old + "_pkey")}')
+        for name in indexes:
+            cursor.execute(f'ALTER INDEX {qualified(name)} RENAME TO {quote(suffixed(name, "_u"))}')
+        # Its stale rows must not block deleting the users they reference
+        for name in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qualified(old)} DROP CONSTRAINT {quote(name)}')
+        cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {quote(old + "_id_seq")}')
+
+        # The partitioned table takes the original names
+        cursor.execute(f'ALTER TABLE {qualified(new)} RENAME TO {quote(table)}')
+        cursor.execute(f'ALTER TABLE {qualified(table)} RENAME CONSTRAINT {quote(new + "_pkey")} TO {quote(table + "_pkey")}')
+        for name in indexes:
+            cursor.execute(f'ALTER INDEX {qualified(suffixed(name, "_p"))} RENAME TO {quote(name)}')
+        for name in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qualified(table)} RENAME CONSTRAINT {quote(suffixed(name, "_p"))} TO {quote(name)}')
+
+        # Partitioned tables can't have identity columns (before Postgres 17): ids continue from a sequence
+        id_sequence = qualified(table + '_id_seq')
+        cursor.execute(f'CREATE SEQUENCE {id_sequence} OWNED BY {qualified(table)}.id')
+        cursor.execute(f'SELECT setval(%s, GREATEST(%s, (SELECT coalesce(max(id), 0) FROM {qualified(table)}), 1))',
+                       [id_sequence, last_id])
+        cursor.execute(f"ALTER TABLE {qualified(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)",
+                       [id_sequence])
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {qualified(table)}')
+
+
+def drop_unpartitioned():
+    """Drop the table left by swap(); returns whether it existed"""
+    old = Item._meta.db_table + UNPARTITIONED_SUFFIX
+    if table_kind(old) is None:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {qualified(old)}')
+    return True
+
+
+def ensure_partitions(ahead=None):
+    """
+    Create the month partitions from this month to `ahead` months
+    (API_ITEM_PARTITION_MONTHS_AHEAD) from now, if api_item is partitioned
+    Returns the names of the partitions created
+    """
+    if not is_partitioned():
+        return []
+    ahead = months_ahead() if ahead is None else ahead
+    this_month = month_start(timezone.now())
+    created = []
+    for count in range(ahead + 1):
+        month = add_months(this_month, count)
+        if create_partition(Item._meta.db_table, month):
+            created.append(partition_name(month))
+    return created
@@ -0,0 +1,94 @@
+"""
+Queryset shaping driven by the fields a serializer renders
+
+shape_queryset() walks each readable serializer field's source through the
+model's relations and applies:
+- select_related() for forward foreign keys the output reaches into
+  (e.g. created_by.username), removing one query per row
+- only() for the columns actually rendered, when every source resolves to
+  a model field (a property or method source keeps all columns)
+- prefetch_related() for reverse and many-to-many relations
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+_plans = {}
+
+
+class QueryPlan:
+    """select_related/prefetch_related/only() arguments for one serializer shape"""
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+        self.all_columns = False
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if not self.all_columns and self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def shape_queryset(queryset, serializer):
+    """Apply the serializer's query plan to queryset"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    fields = serializer.fields
+    key = (type(serializer), queryset.model, tuple(fields))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = build_plan(queryset.model, fields)
+    return plan.apply(queryset)
+
+
+def build_plan(model, fields, plan=None, prefix=''):
+    plan = plan or QueryPlan()
+    for field in fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                build_plan(model, field.fields, plan, prefix)
+            else:
+                # SerializerMethodField and friends may read anything
+                plan.all_columns = True
+            continue
+        add_source(model, field, field.source_attrs, plan, prefix)
+    return plan
+
+
+def add_source(model, field, attrs, plan, prefix):
+    """Record what reading `attrs` from a `model` instance needs"""
+    current = model
+    path = prefix
+    for index, attr in enumerate(attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # Python attribute (property, method): can't know which columns it reads
+            plan.all_columns = True
+            return
+        lookup = f'{path}{attr}'
+        last = index == len(attrs) - 1
+
+        if model_field.many_to_many or model_field.one_to_many:
+            plan.prefetch_related.add(lookup)
+            return
+        if not model_field.is_relation or (last and not isinstance(field, serializers.BaseSerializer)):
+            # A column, or a foreign key rendered as its id (PrimaryKeyRelatedField)
+            plan.only.add(lookup)
+            return
+
+        # Forward FK / one-to-one that the output reaches into
+        plan.select_related.add(lookup)
+        current = model_field.related_model
+        path = f'{lookup}__'
+
+    if isinstance(field, serializers.Serializer):
+        # Nested serializer rendering the related object
+        build_plan(current, field.fields, plan, path)
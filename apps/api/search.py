@@ -0,0 +1,61 @@
+"""
+Full-text search over items
+
+Item.search is a tsvector of name (weight A) and description (weight B),
+generated by PostgreSQL on every write and indexed with GIN, so a search
+is an index lookup instead of the ILIKE '%x%' sequential scan of
+icontains. Every word of the search text must match, as a prefix
+("wid ga" finds "Widget gadgets"); results are ordered by ts_rank, newest
+first among equal ranks. The column is only read in SQL: Item.objects
+defers it, so loading an item never fetches its tsvector.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework.filters import BaseFilterBackend
+from .models import SEARCH_CONFIG
+
+# Words past this are ignored, bounding the tsquery size
+MAX_TERMS = 16
+
+_terms = re.compile(r'[^\W_]+')
+
+
+def search_query(text):
+    """Prefix tsquery matching every word of text, or None if it has no words"""
+    terms = _terms.findall(text)[:MAX_TERMS]
+    if not terms:
+        return None
+    # Words are alphanumeric only, so they can't carry tsquery syntax
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_items(queryset, text, rank=True):
+    """
+    Items of queryset matching text (unchanged if text has no words),
+    ordered by relevance unless rank is False
+    """
+    query = search_query(text)
+    if query is None:
+        return queryset
+    queryset = queryset.filter(search=query)
+    if not rank:
+        return queryset
+    return queryset.annotate(search_rank=SearchRank(F('search'), query)).order_by(
+        '-search_rank', '-created_at', '-id'
+    )
+
+
+class ItemSearchFilter(BaseFilterBackend):
+    """
+    ?search=<text> on item lists
+    Keyset (?cursor=) pages keep their created_at order; page-number pages are ranked
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param)
+        if not text:
+            return queryset
+        return search_items(queryset, text)
@@ -1,16 +1,64 @@
 """
 API serializers
 """
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.auth import get_user_model
 from .models import Item
 
 User = get_user_model()
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Let read requests pick the rendered fields: ?fields=id,name or ?exclude=description
+
+    Pruning happens on the serializer itself, so the views' queryset shaping
+    (apps.api.querysets) and values() fast path (apps.api.values) only fetch
+    the remaining columns and joins. Write requests always use every field;
+    names in context['keep_fields'] are never pruned.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        fields = self.requested_names(request, self.fields_query_param)
+        exclude = self.requested_names(request, self.exclude_query_param)
+        if fields is None and exclude is None:
+            return
+
+        errors = {}
+        for param, names in ((self.fields_query_param, fields), (self.exclude_query_param, exclude)):
+            unknown = (names or set()) - set(self.fields)
+            if unknown:
+                errors[param] = [f'Unknown field(s): {", ".join(sorted(unknown))}']
+        if errors:
+            raise serializers.ValidationError(errors)
+        keep = set(self.context.get('keep_fields', ()))
+        for name in list(self.fields):
+            if name in keep:
+                continue
+            if (fields is not None and name not in fields) or (exclude is not None and name in exclude):
+                self.fields.pop(name)
+
+    @staticmethod
+    def requested_names(request, param):
+        value = request.query_params.get(param)
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class ItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Item model
+    Supports sparse fieldsets on reads (?fields= / ?exclude=)
     """
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
 
@@ -20,6 +68,74 @@ class ItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'updated_at']
 
 
+class ItemBulkOperationSerializer(serializers.Serializer):
+    """
+    One operation of a bulk request; `data` is validated later with ItemSerializer
+    """
+    OPS = ('create', 'update', 'delete')
+
+    op = serializers.ChoiceField(choices=OPS)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({'id': ['This field is required for update and delete.']})
+        return attrs
+
+
+class ItemBulkSerializer(serializers.Serializer):
+    """
+    Payload of POST /api/items/bulk/, at most API_BULK_MAX_OPERATIONS operations
+    """
+    operations = ItemBulkOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        limit = getattr(settings, 'API_BULK_MAX_OPERATIONS', 500)
+        if len(operations) > limit:
+            raise serializers.ValidationError(f'At most {limit} operations per request.')
+        return operations
+
+
+class ItemFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of item list filtering (apps.api.filters)
+    Ranges include their lower bound and exclude their upper bound. A range
+    is on created_at or updated_at, and an ordering must be on the same
+    field; keyset pages (context keyset=True) are always newest first, so
+    they take no ordering and only created_at ranges
+    """
+    ORDERINGS = ('created_at', '-created_at', 'updated_at', '-updated_at', 'name', '-name')
+    RANGES = {
+        'created_after': 'created_at',
+        'created_before': 'created_at',
+        'updated_after': 'updated_at',
+        'updated_before': 'updated_at',
+    }
+
+    created_by = serializers.IntegerField(required=False, min_value=1)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(choices=ORDERINGS, required=False)
+
+    def validate(self, attrs):
+        if self.context.get('keyset') and 'ordering' in attrs:
+            raise serializers.ValidationError({'ordering': 'Cursor pages are always ordered by -created_at.'})
+        fields = {self.RANGES[param] for param in self.RANGES if param in attrs}
+        if len(fields) > 1:
+            raise serializers.ValidationError('Filter on a created_at or an updated_at range, not both.')
+        if fields:
+            field = fields.pop()
+            ordering = attrs.get('ordering')
+            if ordering and ordering.lstrip('-') != field:
+                raise serializers.ValidationError({'ordering': f'Must be on {field} when filtering on it.'})
+            if self.context.get('keyset') and field != 'created_at':
+                raise serializers.ValidationError('Cursor pages only filter on created_at ranges.')
+        return attrs
+
+
 class UserProfileSerializer(serializers.Serializer):
     """
     Serializer for user profile with tenant context
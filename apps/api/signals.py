@@ -0,0 +1,67 @@
+"""
+API signals, and the handlers keeping per-worker caches in sync with item writes
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+from .cache import response_cache
+
+# Sent with schema_name after a tenant's items version was bumped (apps.api.versions)
+items_version_changed = Signal()
+
+
+@receiver(items_version_changed)
+def forget_cached_responses(sender, schema_name, **kwargs):
+    """Cached responses of the old version can't be hit again; free their LRU slots"""
+    response_cache.forget_schema(schema_name)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_created_items(sender, instance, **kwargs):
+    """
+    Delete a user's items through delete_items() before the cascade does:
+    the cascade's plain DELETE would leave no tombstones and no version bump
+    """
+    if connection.schema_name == get_public_schema_name():
+        return
+    from .changes import delete_items
+    from .models import Item
+
+    ids = list(Item.objects.filter(created_by=instance).order_by('pk').values_list('pk', flat=True))
+    if ids:
+        delete_items(ids)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def note_username_change(sender, instance, update_fields=None, **kwargs):
+    """Remember whether a saved user's username changes (item bodies include it)"""
+    instance._username_changed = False
+    if connection.schema_name == get_public_schema_name() or instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    old = sender._default_manager.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = old is not None and old != instance.username
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def touch_created_items(sender, instance, created, **kwargs):
+    """
+    Bump the version and updated_at of a renamed user's items, so their
+    ETags, cached responses and delta sync pick up the new created_by_username
+    """
+    if not getattr(instance, '_username_changed', False):
+        return
+    from .models import Item
+    from .versions import items_changed
+
+    instance._username_changed = False
+    touched = Item.objects.filter(created_by=instance).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if touched:
+        items_changed()
@@ -19,6 +19,29 @@ class APITenantClient(TenantClient, APIClient):
     pass
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """
+    Fail any request that runs more queries than its view's query_budget
+    (see apps.api.mixins.QueryBudgetMixin)
+    """
+    settings.API_ENFORCE_QUERY_BUDGETS = True
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """
+    Start every test with an empty response cache: versions restart with
+    each test's rolled back transaction, so old entries would match again
+    """
+    from apps.api.cache import response_cache
+    response_cache.clear()
+    if response_cache.shared is not None:
+        response_cache.shared.clear()
+    yield
+    response_cache.clear()
+
+
 @pytest.fixture(scope='function')
 def tenant(db):
     """
@@ -1,11 +1,33 @@
 """
 Tests for Item API endpoints
 """
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+from unittest import mock
 import pytest
 from django.contrib.auth import get_user_model
-from rest_framework import status
-from apps.core.tests import TenantAPITestCase
-from apps.api.models import Item
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_tenants.utils import schema_context
+from rest_framework import serializers, status
+from apps.core.tests import TenantAPITestCase, TenantTransactionAPITestCase
+from apps.api import imports
+from apps.api.cache import ResponseCache, response_cache
+from apps.api.mixins import QueryBudgetExceeded
+from apps.api.models import Item, ItemTombstone
+from apps.api.serializers import ItemFilterSerializer, ItemSerializer
+from apps.api.values import get_values_plan
+from apps.api.views import ItemListCreateView
+from apps.core.lru import MISSING
+from apps.core.pagination import EstimatedCountPaginator
 
 User = get_user_model()
 
@@ -108,3 +130,1100 @@ class TestItemAPI(TenantAPITestCase):
         response = self.client.get('/api/items/')
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestItemCursorPagination(TenantAPITestCase):
+    """
+    Test keyset pagination of GET /api/items/?cursor=
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        items = Item.objects.bulk_create([
+            Item(name=f'Item {i}', created_by=self.user) for i in range(7)
+        ])
+        # Several items share a timestamp so the id tie-breaker matters
+        now = timezone.now()
+        Item.objects.filter(pk__in=[item.pk for item in items[:4]]).update(created_at=now)
+        self.expected = list(Item.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url, direction):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data[direction]
+        return ids
+
+    def test_pages_cover_every_item_once_in_order(self):
+        """Test that following next links returns each item exactly once"""
+        with CaptureQueriesContext(connection) as queries:
+            ids = self.walk('/api/items/?cursor=&page_size=3', 'next')
+
+        assert ids == self.expected
+        assert not any('COUNT(' in q['sql'] for q in queries.captured_queries)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test that previous links walk back over the same pages"""
+        first = self.client.get('/api/items/?cursor=&page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        assert first['previous'] is None
+        assert [item['id'] for item in back['results']] == [item['id'] for item in first['results']]
+
+    def test_tampered_cursor_rejected(self):
+        """Test that cursors are signed"""
+        response = self.client.get('/api/items/?cursor=not-a-cursor')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_page_number_mode_unchanged(self):
+        """Test that requests without a cursor keep the count/page format"""
+        response = self.client.get('/api/items/')
+
+        assert response.data['count'] == 7
+        assert len(response.data['results']) == 7
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPagination(TenantAPITestCase):
+    """
+    Test page-number counts taken from the planner estimate
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Item.objects.bulk_create([Item(name=f'Item {i}', created_by=self.user) for i in range(5)])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_item')
+        # Rows added after ANALYZE are only visible to an exact count
+        Item.objects.create(name='Late item', created_by=self.user)
+        settings_override = override_settings(TENANT_EXACT_COUNT_THRESHOLD=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_list_count_uses_estimate(self):
+        """Test that GET /api/items/ reports the estimate without COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/items/')
+
+        assert response.data['count'] == 5
+        assert len(response.data['results']) == 6
+        assert not any('COUNT(' in q['sql'] for q in queries.captured_queries)
+
+    def test_exact_count_below_threshold(self):
+        """Test that small tables are counted exactly"""
+        with override_settings(TENANT_EXACT_COUNT_THRESHOLD=100):
+            assert EstimatedCountPaginator(Item.objects.all(), 20).count == 6
+
+    def test_filtered_queryset_counted_exactly(self):
+        """Test that the table estimate isn't used for filtered querysets (admin search)"""
+        queryset = Item.objects.filter(name__startswith='Item')
+
+        assert EstimatedCountPaginator(queryset, 20).count == 5
+
+
+@pytest.mark.django_db
+class TestItemQueryShaping(TenantAPITestCase):
+    """
+    Test serializer-driven select_related/only() and query budgets
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def create_items(self, creators):
+        start = User.objects.filter(username__startswith='creator').count()
+        # Run the commit hooks (items version bump) as a real commit would
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(start, start + creators):
+                creator = User.objects.create_user(username=f'creator{i}', password='testpass123')
+                Item.objects.create(name=f'Item {i}', created_by=creator)
+
+    def test_list_queries_independent_of_creators(self):
+        """Test that created_by_username doesn't cost a query per item"""
+        self.create_items(1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/items/')
+
+        self.create_items(5)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/items/')
+
+        assert len(many) == len(few)
+        assert {item['created_by_username'] for item in response.data['results']} == {f'creator{i}' for i in range(6)}
+
+    def test_detail_selects_only_rendered_columns(self):
+        """Test that the creator join loads just the username"""
+        self.create_items(1)
+        item = Item.objects.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/items/{item.pk}/')
+
+        assert response.data['created_by_username'] == 'creator0'
+        # The last one: the version lookup for the ETag comes first
+        select = [q['sql'] for q in queries.captured_queries if 'FROM "api_item"' in q['sql']][-1]
+        assert '"auth_user"."username"' in select
+        assert '"auth_user"."password"' not in select
+
+    def test_query_budget_exceeded_fails(self):
+        """Test that a request over its view's budget raises"""
+        with mock.patch.object(ItemListCreateView, 'query_budget', {'GET': 1}):
+            with pytest.raises(QueryBudgetExceeded):
+                self.client.get('/api/items/')
+
+
+@pytest.mark.django_db
+class TestValuesFastPath(TenantAPITestCase):
+    """
+    Test list pages serialized from values() rows
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        other = User.objects.create_user(username='ünïcode', password='testpass123')
+        Item.objects.create(name='Plain', created_by=self.user)
+        Item.objects.create(name='Ταυτότητα "quoted"', description='Line\nbreak', created_by=other)
+
+    def test_output_identical_to_serializer(self):
+        """Test that the fast path renders the same bytes as ItemSerializer"""
+        for url in ('/api/items/', '/api/items/?cursor='):
+            fast = self.client.get(url)
+            with mock.patch('apps.api.values.get_values_plan', return_value=None):
+                regular = self.client.get(url)
+
+            assert fast.status_code == status.HTTP_200_OK
+            assert fast.content == regular.content
+
+    def test_plan_compiled_for_item_serializer(self):
+        """Test that ItemSerializer qualifies and method fields opt out"""
+        class ItemWithMethodSerializer(ItemSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(ItemSerializer.Meta):
+                fields = ItemSerializer.Meta.fields + ['label']
+
+            def get_label(self, obj):
+                return obj.name.upper()
+
+        assert get_values_plan(ItemSerializer()).lookups == [
+            'id', 'name', 'description', 'created_by', 'created_by__username', 'created_at', 'updated_at',
+        ]
+        assert get_values_plan(ItemWithMethodSerializer()) is None
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets(TenantAPITestCase):
+    """
+    Test ?fields= / ?exclude= and their projection into SQL
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.item = Item.objects.create(name='Item', description='x' * 1000, created_by=self.user)
+
+    def item_select(self, queries):
+        # Counts and the ETag version lookup come before the rows
+        return [q['sql'] for q in queries.captured_queries if 'FROM "api_item"' in q['sql']][-1]
+
+    def test_fields_prunes_output_and_sql(self):
+        """Test that unrequested columns and joins are never fetched"""
+        for url in ('/api/items/?fields=id,name,updated_at',
+                    '/api/items/?cursor=&fields=id,name,updated_at',
+                    f'/api/items/{self.item.pk}/?fields=id,name,updated_at'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            data = response.data['results'][0] if 'results' in response.data else response.data
+            assert list(data) == ['id', 'name', 'updated_at']
+            select = self.item_select(queries)
+            assert '"description"' not in select
+            assert 'JOIN' not in select
+
+    def test_exclude_drops_fields(self):
+        """Test that ?exclude= removes just the named fields"""
+        response = self.client.get(f'/api/items/{self.item.pk}/?exclude=description,created_by_username')
+
+        assert list(response.data) == ['id', 'name', 'created_by', 'created_at', 'updated_at']
+
+    def test_unknown_field_rejected(self):
+        """Test that misspelled field names are reported"""
+        response = self.client.get('/api/items/?fields=id,nmae')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'fields' in response.data
+
+    def test_writes_ignore_fields(self):
+        """Test that sparse fieldsets don't affect write validation"""
+        response = self.client.post('/api/items/?fields=id', {'name': 'New', 'description': 'Body'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Item.objects.get(name='New').description == 'Body'
+
+
+@pytest.mark.django_db
+class TestItemExport(TenantAPITestCase):
+    """
+    Test the streaming GET /api/items/export/ endpoint
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        items = Item.objects.bulk_create([
+            Item(name=f'Item {i}', description='Line one\nline, "two"', created_by=self.user) for i in range(5)
+        ])
+        # Shared timestamps exercise the id tie-breaker of the watermark
+        Item.objects.filter(pk__in=[item.pk for item in items[:3]]).update(created_at=timezone.now())
+        self.expected = ItemSerializer(Item.objects.order_by('created_at', 'id'), many=True).data
+
+    def export(self, url, **extra):
+        response = self.client.get(url, **extra)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return response, b''.join(response.streaming_content)
+
+    def ndjson(self, body):
+        return [json.loads(line) for line in body.decode().splitlines()]
+
+    def test_ndjson_export_matches_serializer(self):
+        """Test that NDJSON rows are the serializer output, oldest first"""
+        response, body = self.export('/api/items/export/')
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'attachment' in response['Content-Disposition']
+        assert self.ndjson(body) == json.loads(json.dumps(self.expected))
+
+    def test_csv_export(self):
+        """Test that CSV exports have a header row and quote values"""
+        response, body = self.export('/api/items/export/?format=csv&fields=id,name,description')
+
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        assert rows[0] == ['id', 'name', 'description', 'created_at']
+        assert rows[1:] == [
+            [str(item['id']), item['name'], item['description'], item['created_at']] for item in self.expected
+        ]
+
+    def test_gzip_when_accepted(self):
+        """Test that the body is gzipped for clients that accept it"""
+        response, body = self.export('/api/items/export/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(self.ndjson(gzip.decompress(body))) == 5
+
+    def test_resume_after_watermark(self):
+        """Test that ?after= continues right after the given row"""
+        last = self.expected[1]
+        _, body = self.export(f'/api/items/export/?after={last["created_at"]},{last["id"]}')
+
+        assert [row['id'] for row in self.ndjson(body)] == [item['id'] for item in self.expected[2:]]
+
+    def test_resume_sparse_export(self):
+        """Test that ?fields= exports keep the watermark columns and resume from them"""
+        _, body = self.export('/api/items/export/?fields=name')
+        rows = self.ndjson(body)
+        assert list(rows[0]) == ['id', 'name', 'created_at']
+
+        last = rows[1]
+        _, body = self.export(f'/api/items/export/?fields=name&after={last["created_at"]},{last["id"]}')
+
+        assert [row['id'] for row in self.ndjson(body)] == [item['id'] for item in self.expected[2:]]
+
+    def test_keyset_batches_without_server_side_cursors(self):
+        """Test the batched fallback used when server-side cursors are disabled"""
+        settings_dict = {**connection.settings_dict, 'DISABLE_SERVER_SIDE_CURSORS': True}
+        with override_settings(API_EXPORT_CHUNK_SIZE=2), \
+                mock.patch.object(connection, 'settings_dict', settings_dict):
+            _, body = self.export('/api/items/export/')
+
+        assert [row['id'] for row in self.ndjson(body)] == [item['id'] for item in self.expected]
+
+    def test_invalid_parameters_rejected(self):
+        """Test that unknown formats and malformed watermarks are reported"""
+        for url, param in (('/api/items/export/?format=xml', 'format'),
+                           ('/api/items/export/?after=yesterday', 'after')):
+            response = self.client.get(url)
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert param in response.data
+
+
+@pytest.mark.django_db
+class TestItemImport(TenantAPITestCase):
+    """
+    Test bulk loading through POST /api/items/import/ and import_items
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    @pytest.fixture(autouse=True)
+    def use_tmp_path(self, tmp_path):
+        self.tmp_path = tmp_path
+
+    def post(self, body, content_type, url='/api/items/import/'):
+        return self.client.generic('POST', url, body.encode(), content_type=content_type)
+
+    def test_csv_rows_validated_and_loaded(self):
+        """Test that valid rows are copied in and invalid ones reported by line"""
+        body = (
+            'name,description\n'
+            'First,"Tab\there, backslash \\ and\nnewline"\n'
+            ',Missing name\n'
+            f'{"x" * 201},Too long\n'
+            'Second,\n'
+        )
+        response = self.post(body, 'text/csv')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['imported'] == 2
+        assert response.data['failed'] == 2
+        assert [error['line'] for error in response.data['errors']] == [4, 5]
+        assert 'name' in response.data['errors'][0]['errors']
+        first = Item.objects.get(name='First')
+        assert first.description == 'Tab\there, backslash \\ and\nnewline'
+        assert first.created_by == self.user
+        assert Item.objects.get(name='Second').description == ''
+
+    def test_ndjson_rows(self):
+        """Test NDJSON input, including lines that aren't JSON objects"""
+        body = '{"name": "One"}\n\nnot json\n[1, 2]\n{"name": "Two", "description": "D"}\n'
+        response = self.post(body, 'application/x-ndjson')
+
+        assert response.data['imported'] == 2
+        assert [error['line'] for error in response.data['errors']] == [3, 4]
+        assert set(Item.objects.values_list('name', flat=True)) == {'One', 'Two'}
+
+    def test_multipart_upload(self):
+        """Test uploading the file in the multipart `file` field"""
+        upload = SimpleUploadedFile('items.ndjson', b'{"name": "Uploaded"}\n')
+        response = self.client.post('/api/items/import/', {'file': upload}, format='multipart')
+
+        assert response.data['imported'] == 1
+        assert Item.objects.filter(name='Uploaded').exists()
+
+    def test_rows_copied_in_batches(self):
+        """Test that rows are loaded with one COPY per batch"""
+        body = 'name\n' + ''.join(f'Item {i}\n' for i in range(5))
+        with override_settings(API_IMPORT_BATCH_SIZE=2), \
+                mock.patch('apps.api.imports.copy_rows', wraps=imports.copy_rows) as copy_rows:
+            response = self.post(body, 'text/csv')
+
+        assert response.data['imported'] == 5
+        assert [len(call.args[1]) for call in copy_rows.call_args_list] == [2, 2, 1]
+        assert Item.objects.count() == 5
+
+    def test_error_report_capped(self):
+        """Test that only the first API_IMPORT_MAX_ERRORS errors are listed"""
+        with override_settings(API_IMPORT_MAX_ERRORS=1):
+            response = self.post('name\n\n,\n,\n', 'text/csv')
+
+        assert response.data['failed'] == 2
+        assert len(response.data['errors']) == 1
+        assert response.data['errors_truncated'] is True
+
+    def test_unreadable_file_loads_nothing(self):
+        """Test that a parse failure aborts the whole import"""
+        response = self.client.generic('POST', '/api/items/import/', b'name\nOk\n\xff\n', content_type='text/csv')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Item.objects.exists()
+
+    def test_unknown_format_rejected(self):
+        """Test that the format must be given or detectable"""
+        response = self.post('{"name": "x"}', 'application/json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'format' in response.data
+        assert self.post('{"name": "x"}', 'application/json', '/api/items/import/?format=ndjson').data['imported'] == 1
+
+    def test_management_command(self):
+        """Test loading a file into a tenant with import_items"""
+        path = self.tmp_path / 'items.csv'
+        path.write_text('name\nFrom file\n,\n')
+        out = io.StringIO()
+        call_command('import_items', str(path), schema=self.tenant.schema_name, username='testuser', stdout=out)
+
+        assert 'imported 1 items, 1 invalid rows' in out.getvalue()
+        assert Item.objects.filter(name='From file', created_by=self.user).exists()
+
+
+@pytest.mark.django_db
+class TestItemBulk(TenantAPITestCase):
+    """
+    Test mixed create/update/delete batches on POST /api/items/bulk/
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.kept = Item.objects.create(name='Kept', description='Old', created_by=self.user)
+        self.doomed = Item.objects.create(name='Doomed', created_by=self.user)
+
+    def bulk(self, operations):
+        return self.client.post('/api/items/bulk/', {'operations': operations}, format='json')
+
+    def test_mixed_batch_applied_with_one_statement_each(self):
+        """Test that a valid batch is one INSERT, one UPDATE and one DELETE"""
+        updated_at = self.kept.updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk([
+                {'op': 'create', 'data': {'name': 'New 1'}},
+                {'op': 'update', 'id': self.kept.pk, 'data': {'description': 'Edited'}},
+                {'op': 'delete', 'id': self.doomed.pk},
+                {'op': 'create', 'data': {'name': 'New 2', 'description': 'Body'}},
+            ])
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['results']
+        assert [result['status'] for result in results] == [201, 200, 204, 201]
+        assert results[0]['item']['created_by_username'] == 'testuser'
+        assert results[1]['item']['description'] == 'Edited'
+        assert Item.objects.filter(name__startswith='New', created_by=self.user).count() == 2
+        self.kept.refresh_from_db()
+        assert self.kept.description == 'Edited'
+        assert self.kept.name == 'Kept'
+        assert self.kept.updated_at > updated_at
+        assert not Item.objects.filter(pk=self.doomed.pk).exists()
+        statements = [q['sql'] for q in queries.captured_queries]
+        prefixes = ('INSERT INTO "api_item" ', 'UPDATE "api_item" ', 'DELETE FROM "api_item" ',
+                    'INSERT INTO "api_itemtombstone" ')
+        assert [sum(sql.startswith(prefix) for sql in statements) for prefix in prefixes] == [1, 1, 1, 1]
+
+    def test_any_invalid_operation_rejects_batch(self):
+        """Test that nothing is applied when one operation fails"""
+        response = self.bulk([
+            {'op': 'delete', 'id': self.doomed.pk},
+            {'op': 'create', 'data': {'name': ''}},
+            {'op': 'update', 'id': 999999, 'data': {'name': 'Ghost'}},
+            {'op': 'update', 'id': self.kept.pk, 'data': {'name': 'x' * 201}},
+        ])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        results = response.data['results']
+        assert [result['status'] for result in results] == [424, 400, 404, 400]
+        assert 'name' in results[1]['errors']
+        assert Item.objects.count() == 2
+
+    def test_one_operation_per_item(self):
+        """Test that an item can't be touched twice in a batch"""
+        response = self.bulk([
+            {'op': 'update', 'id': self.kept.pk, 'data': {'name': 'A'}},
+            {'op': 'delete', 'id': self.kept.pk},
+        ])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['results'][1]['errors'] == {'id': ['Only one operation per item is allowed.']}
+
+    def test_payload_shape_validated(self):
+        """Test operation shape checks and the API_BULK_MAX_OPERATIONS limit"""
+        assert 'operations' in self.bulk([{'op': 'merge'}]).data
+        assert 'operations' in self.bulk([{'op': 'delete'}]).data
+        assert 'operations' in self.bulk([]).data
+        with override_settings(API_BULK_MAX_OPERATIONS=1):
+            response = self.bulk([{'op': 'create', 'data': {'name': 'A'}}] * 2)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['operations'] == ['At most 1 operations per request.']
+
+
+@pytest.mark.django_db(transaction=True)
+class TestItemChanges(TenantTransactionAPITestCase):
+    """
+    Test delta sync through GET /api/items/changes/
+    Writes commit one by one: sync tells them apart by transaction
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.items = [Item.objects.create(name=f'Item {i}', created_by=self.user) for i in range(5)]
+
+    def sync(self, token=None):
+        url = '/api/items/changes/' + (f'?since={token}' if token else '')
+        response = self.client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_first_sync_returns_everything(self):
+        """Test that a sync without a token returns all items"""
+        data = self.sync()
+
+        assert [item['id'] for item in data['changed']] == [item.pk for item in self.items]
+        assert data['changed'][0] == ItemSerializer(self.items[0]).data
+        assert data['deleted'] == []
+        assert data['has_more'] is False
+
+    def test_only_changes_since_token(self):
+        """Test that later syncs get just the writes and deletions since the token"""
+        token = self.sync()['since']
+        self.client.patch(f'/api/items/{self.items[1].pk}/', {'name': 'Renamed'})
+        self.client.delete(f'/api/items/{self.items[2].pk}/')
+        created = self.client.post('/api/items/', {'name': 'New'}).data
+        self.client.post('/api/items/bulk/', {'operations': [{'op': 'delete', 'id': self.items[3].pk}]}, format='json')
+
+        data = self.sync(token)
+
+        assert [item['id'] for item in data['changed']] == [self.items[1].pk, created['id']]
+        assert data['changed'][0]['name'] == 'Renamed'
+        assert data['deleted'] == [self.items[2].pk, self.items[3].pk]
+        assert self.sync(data['since'])['changed'] == []
+
+    def test_deletions_outside_the_api_leave_tombstones(self):
+        """Test that Item.delete() and deleting the creator are synced as deletions"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        theirs = [Item.objects.create(name=f'Theirs {i}', created_by=other) for i in range(2)]
+        token = self.sync()['since']
+        mine = self.items[0].pk
+
+        self.items[0].delete()
+        other.delete()
+
+        data = self.sync(token)
+        assert data['deleted'] == [mine, *(item.pk for item in theirs)]
+        assert not Item.objects.filter(created_by_id=other.pk).exists()
+
+    def test_pages_until_caught_up(self):
+        """Test that has_more pages cover every change exactly once"""
+        ids = []
+        token = None
+        with override_settings(API_SYNC_PAGE_SIZE=2):
+            while True:
+                data = self.sync(token)
+                ids.extend(item['id'] for item in data['changed'])
+                token = data['since']
+                if not data['has_more']:
+                    break
+
+        assert ids == [item.pk for item in self.items]
+
+    def test_late_commit_is_picked_up(self):
+        """Test that a write committed after a sync, however old its updated_at, is in the next sync"""
+        written, synced = threading.Event(), threading.Event()
+
+        def write():
+            # Its own connection: a transaction that started before the sync and commits after it
+            connection.set_tenant(self.tenant)
+            try:
+                with transaction.atomic():
+                    Item.objects.filter(pk=self.items[0].pk).update(
+                        name='Late', updated_at=timezone.now() - timezone.timedelta(hours=1)
+                    )
+                    written.set()
+                    synced.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        assert written.wait(5)
+        token = self.sync()['since']
+        synced.set()
+        thread.join()
+
+        data = self.sync(token)
+        assert [(item['id'], item['name']) for item in data['changed']] == [(self.items[0].pk, 'Late')]
+        assert self.sync(data['since'])['changed'] == []
+
+    def test_bad_and_expired_tokens(self):
+        """Test that tampered tokens are rejected and stale ones get 410"""
+        token = self.sync()['since']
+
+        assert self.client.get('/api/items/changes/?since=forged').status_code == status.HTTP_400_BAD_REQUEST
+        with override_settings(API_SYNC_TOMBSTONE_RETENTION=0):
+            response = self.client.get(f'/api/items/changes/?since={token}')
+        assert response.status_code == status.HTTP_410_GONE
+
+    def test_prune_tombstones(self):
+        """Test that tombstones past the retention are pruned"""
+        self.client.delete(f'/api/items/{self.items[0].pk}/')
+        ItemTombstone.objects.update(deleted_at=timezone.now() - timezone.timedelta(days=31))
+        self.client.delete(f'/api/items/{self.items[1].pk}/')
+        out = io.StringIO()
+        call_command('prune_item_tombstones', schema=self.tenant.schema_name, stdout=out)
+
+        assert 'deleted 1 expired item tombstones' in out.getvalue()
+        assert list(ItemTombstone.objects.values_list('item_id', flat=True)) == [self.items[1].pk]
+
+
+@pytest.mark.django_db
+class TestConditionalGet(TenantAPITestCase):
+    """
+    Test ETag / Last-Modified validators and 304 responses on item reads
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item = Item.objects.create(name='Item', created_by=self.user)
+
+    def test_list_not_modified_without_touching_items(self):
+        """Test that a matching If-None-Match is answered from the version alone"""
+        etag = self.client.get('/api/items/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not any('"api_item"' in q['sql'] for q in queries.captured_queries)
+
+    def test_writes_change_list_etag(self):
+        """Test that every committed write bumps the tenant's items version"""
+        etags = [self.client.get('/api/items/')['ETag']]
+        writes = [
+            lambda: self.client.post('/api/items/', {'name': 'New'}),
+            lambda: self.client.patch(f'/api/items/{self.item.pk}/', {'name': 'Renamed'}),
+            lambda: self.client.post('/api/items/bulk/', {'operations': [
+                {'op': 'update', 'id': self.item.pk, 'data': {'name': 'Again'}},
+            ]}, format='json'),
+            lambda: self.client.generic('POST', '/api/items/import/', b'name\nImported\n', content_type='text/csv'),
+            lambda: self.client.delete(f'/api/items/{self.item.pk}/'),
+        ]
+        for write in writes:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etags[-1])
+            assert response.status_code == status.HTTP_200_OK
+            etags.append(response['ETag'])
+
+        assert len(set(etags)) == len(etags)
+
+    def test_deleting_creator_changes_list_etag(self):
+        """Test that items removed with their creator don't keep answering 304"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            theirs = Item.objects.create(name='Theirs', created_by=other)
+        etag = self.client.get('/api/items/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert theirs.pk not in [item['id'] for item in response.data['results']]
+
+    def test_renaming_creator_changes_etags(self):
+        """Test that a username change isn't served stale from item ETags or the cache"""
+        list_etag = self.client.get('/api/items/')['ETag']
+        detail_etag = self.client.get(f'/api/items/{self.item.pk}/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = 'renamed'
+            self.user.save()
+        listed = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=list_etag)
+        detail = self.client.get(f'/api/items/{self.item.pk}/', HTTP_IF_NONE_MATCH=detail_etag)
+
+        assert listed.status_code == status.HTTP_200_OK
+        assert listed['ETag'] != list_etag
+        assert listed.data['results'][0]['created_by_username'] == 'renamed'
+        assert detail.status_code == status.HTTP_200_OK
+        assert detail['ETag'] != detail_etag
+        assert detail.data['created_by_username'] == 'renamed'
+
+    def test_other_user_saves_keep_etags(self):
+        """Test that saving a user without renaming them leaves item versions alone"""
+        detail_etag = self.client.get(f'/api/items/{self.item.pk}/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Test'
+            self.user.save()
+            self.user.save(update_fields=['last_login'])
+        response = self.client.get(f'/api/items/{self.item.pk}/', HTTP_IF_NONE_MATCH=detail_etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_detail_etag_follows_item_version(self):
+        """Test that item ETags change with the item and nothing else"""
+        etag = self.client.get(f'/api/items/{self.item.pk}/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/items/', {'name': 'Other'})
+        assert self.client.get(f'/api/items/{self.item.pk}/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        self.client.patch(f'/api/items/{self.item.pk}/', {'name': 'Renamed'})
+        response = self.client.get(f'/api/items/{self.item.pk}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.data['name'] == 'Renamed'
+
+    def test_if_modified_since(self):
+        """Test Last-Modified and If-Modified-Since"""
+        last_modified = self.client.get('/api/items/')['Last-Modified']
+        response = self.client.get('/api/items/', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert self.client.get('/api/items/999999/', HTTP_IF_NONE_MATCH='*').status_code == 404
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        """Test that saves from stale copies still increment the version"""
+        first, second = Item.objects.get(), Item.objects.get()
+        first.name = 'First'
+        first.save()
+        second.name = 'Second'
+        second.save()
+
+        assert second.version == 3
+        assert Item.objects.get().version == 3
+
+
+@pytest.mark.django_db
+class TestResponseCache(TenantAPITestCase):
+    """
+    Test the versioned response cache of item reads
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item = Item.objects.create(name='Item', created_by=self.user)
+
+    def item_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries.captured_queries if '"api_item"' in q['sql']]
+
+    def test_repeated_reads_served_from_cache(self):
+        """Test that unchanged list and detail reads skip the item queries"""
+        for url in ('/api/items/', f'/api/items/{self.item.pk}/'):
+            first, _ = self.item_queries(url)
+            second, queries = self.item_queries(url)
+
+            assert second.data == first.data
+            # Only the detail's version lookup remains
+            assert len(queries) == (0 if url == '/api/items/' else 1)
+
+    def test_query_params_and_versions_key_entries(self):
+        """Test that other params miss and that writes show up immediately"""
+        self.client.get('/api/items/')
+        response, queries = self.item_queries('/api/items/?fields=id,name')
+        assert list(response.data['results'][0]) == ['id', 'name']
+        assert queries
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/items/{self.item.pk}/', {'name': 'Renamed'})
+
+        assert self.client.get('/api/items/').data['results'][0]['name'] == 'Renamed'
+        assert self.client.get(f'/api/items/{self.item.pk}/').data['name'] == 'Renamed'
+
+    def test_version_bump_frees_local_entries(self):
+        """Test that a tenant's entries leave its partition when its version changes"""
+        self.client.get('/api/items/')
+        assert response_cache.local.tenant_stats()['entries'] == 1
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/items/', {'name': 'New'})
+
+        assert response_cache.local.tenant_stats()['entries'] == 0
+
+    def test_tenants_only_evict_their_own_entries(self):
+        """Test that a tenant filling its byte budget keeps the other tenants' entries"""
+        cache = ResponseCache(tenant_bytes=2000, ttl=60, location=f'test-{id(self)}')
+        with schema_context('tenant_a'):
+            cache.set(('tenant_a', 'list'), {'value': 'a'})
+        with schema_context('tenant_b'):
+            for page in range(50):
+                cache.set(('tenant_b', 'list', page), {'value': 'b' * 100})
+
+        with schema_context('tenant_a'):
+            assert cache.get(('tenant_a', 'list')) == {'value': 'a'}
+        assert cache.local.tenant_stats('tenant_b')['evictions'] > 0
+        assert cache.local.tenant_stats('tenant_b')['bytes'] <= 2000
+        assert cache.shared is None
+
+    def test_shared_backend_between_workers(self):
+        """Test that a second worker (empty local layer) reuses the networked cache entry"""
+        with mock.patch.object(response_cache, 'alias', 'default'):
+            self.client.get('/api/items/')
+            response_cache.local.clear()
+            shared_hits = response_cache.shared_hits
+            response, queries = self.item_queries('/api/items/')
+
+        assert response.data['results'][0]['id'] == self.item.pk
+        assert not queries
+        assert response_cache.shared_hits == shared_hits + 1
+
+    def test_concurrent_misses_compute_once(self):
+        """Test single-flight recomputation within a worker"""
+        cache = ResponseCache(tenant_bytes=64 * 1024, ttl=60, location=f'test-{id(self)}')
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'response', {'value': 1}
+
+        def request():
+            results.append(cache.fetch(('key',), compute))
+
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert sorted(results, key=str) == [(None, 'response')] + [({'value': 1}, None)] * 4
+
+    def test_shared_lease_holder_result_reused(self):
+        """Test that a worker waits for the lease holder instead of recomputing"""
+        cache = ResponseCache(tenant_bytes=64 * 1024, ttl=60, alias='default', location=f'test-{id(self)}')
+        key = ('lease-test',)
+        shared = cache.shared
+        shared.add(cache.cache_key(key) + ':lease', 1, 5)
+        threading.Timer(0.1, lambda: shared.set(cache.cache_key(key), {'value': 2}, 60)).start()
+        try:
+            data, response = cache.fetch(key, lambda: ('response', MISSING))
+        finally:
+            shared.delete(cache.cache_key(key))
+            cache.release_lease(key)
+
+        assert (data, response) == ({'value': 2}, None)
+        assert cache.lease_waits > 0
+
+
+@pytest.mark.django_db
+class TestItemSearch(TenantAPITestCase):
+    """
+    Test full-text search on item lists and the admin
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.in_name = Item.objects.create(name='Widget gadgets', description='Useful', created_by=self.user)
+        self.in_description = Item.objects.create(name='Other', description='Works with widgets', created_by=self.user)
+        Item.objects.create(name='Unrelated', description='Nothing here', created_by=self.user)
+
+    def search_ids(self, text, **params):
+        response = self.client.get('/api/items/', {'search': text, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return [item['id'] for item in response.data['results']]
+
+    def test_ranked_prefix_search(self):
+        """Test that every word matches as a prefix and name matches rank first"""
+        assert self.search_ids('wid') == [self.in_name.pk, self.in_description.pk]
+        assert self.search_ids('WIDGETS') == [self.in_name.pk, self.in_description.pk]
+        assert self.search_ids('wid gad') == [self.in_name.pk]
+        assert self.search_ids('missing') == []
+
+    def test_search_uses_tsvector(self):
+        """Test that the query matches the indexed column instead of ILIKE"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/items/', {'search': 'widget'})
+        sql = next(q['sql'] for q in reversed(queries.captured_queries) if '"api_item"' in q['sql'])
+
+        assert '"api_item"."search" @@' in sql
+        assert 'LIKE' not in sql
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test that tsquery operators in the text are ignored"""
+        assert self.search_ids("widget | !'' (") == [self.in_name.pk, self.in_description.pk]
+        assert self.search_ids("wid:* & !gad") == [self.in_name.pk]
+        # No words at all: unfiltered
+        assert len(self.search_ids('&|!')) == 3
+
+    def test_search_follows_writes(self):
+        """Test that the search document is recomputed on update"""
+        self.client.patch(f'/api/items/{self.in_description.pk}/', {'description': 'Plain'})
+
+        assert self.search_ids('widget') == [self.in_name.pk]
+
+    def test_search_with_cursor_and_fields(self):
+        """Test search combined with keyset pagination and sparse fieldsets"""
+        response = self.client.get('/api/items/', {'search': 'widget', 'cursor': '', 'fields': 'id'})
+
+        assert [item['id'] for item in response.data['results']] == [self.in_description.pk, self.in_name.pk]
+        assert list(response.data['results'][0]) == ['id']
+
+    def test_admin_search(self):
+        """Test that the admin changelist search uses the search column"""
+        from django.contrib import admin
+        from apps.api.admin import ItemAdmin
+
+        queryset, may_have_duplicates = ItemAdmin(Item, admin.site).get_search_results(None, Item.objects.all(), 'gadg')
+
+        assert list(queryset) == [self.in_name]
+        assert not may_have_duplicates
+
+    def test_search_document_not_loaded(self):
+        """Test that item loads outside search leave the tsvector in the database"""
+        from django.contrib import admin
+        from apps.api.admin import ItemAdmin
+
+        with CaptureQueriesContext(connection) as queries:
+            Item.objects.get(pk=self.in_name.pk)
+            list(ItemAdmin(Item, admin.site).get_queryset(None))
+            response = self.client.post('/api/items/bulk/', {'operations': [
+                {'op': 'update', 'id': self.in_name.pk, 'data': {'description': 'Edited'}},
+            ]}, format='json')
+            self.search_ids('widget')
+
+        assert response.status_code == status.HTTP_200_OK
+        selected = [q['sql'].split(' FROM ')[0] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        assert any('"api_item"."name"' in columns for columns in selected)
+        assert not any('"search"' in columns for columns in selected)
+
+
+@pytest.mark.django_db
+class TestItemFilters(TenantAPITestCase):
+    """
+    Test server-side filtering and ordering of item lists
+    """
+
+    def setUp(self):
+        """Set up items from two creators, a day apart"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now().replace(microsecond=0)
+        self.items = []
+        for days, name, creator in ((3, 'Charlie', self.user), (2, 'alpha', self.other), (1, 'Bravo', self.user)):
+            item = Item.objects.create(name=name, created_by=creator)
+            Item.objects.filter(pk=item.pk).update(
+                created_at=self.now - timezone.timedelta(days=days),
+                updated_at=self.now - timezone.timedelta(days=4 - days),
+            )
+            self.items.append(item)
+        self.charlie, self.alpha, self.bravo = self.items
+
+    def ids(self, **params):
+        response = self.client.get('/api/items/', params)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        return [item['id'] for item in response.data['results']]
+
+    def test_created_by(self):
+        """Test filtering by creator"""
+        assert self.ids(created_by=self.user.pk) == [self.bravo.pk, self.charlie.pk]
+        assert self.ids(created_by=self.other.pk) == [self.alpha.pk]
+
+    def test_date_ranges(self):
+        """Test half-open created_at and updated_at ranges"""
+        two_days_ago = (self.now - timezone.timedelta(days=2)).isoformat()
+
+        assert self.ids(created_after=two_days_ago) == [self.bravo.pk, self.alpha.pk]
+        assert self.ids(created_before=two_days_ago) == [self.charlie.pk]
+        yesterday = (self.now - timezone.timedelta(days=1)).isoformat()
+        assert self.ids(updated_after=two_days_ago, updated_before=yesterday) == [self.alpha.pk]
+
+    def test_ordering(self):
+        """Test whitelisted orderings, combined with filters and search"""
+        assert self.ids(ordering='created_at') == [self.charlie.pk, self.alpha.pk, self.bravo.pk]
+        assert self.ids(ordering='-updated_at') == [self.charlie.pk, self.alpha.pk, self.bravo.pk]
+        assert self.ids(ordering='name', created_by=self.user.pk) == [self.bravo.pk, self.charlie.pk]
+        assert self.ids(ordering='-name', search='alp') == [self.alpha.pk]
+
+    def test_invalid_values(self):
+        """Test that bad filter values are a 400 naming the parameter"""
+        response = self.client.get('/api/items/', {
+            'created_by': 'me', 'created_after': 'yesterday', 'ordering': 'description',
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data) == {'created_by', 'created_after', 'ordering'}
+
+    def test_range_must_match_ordering(self):
+        """Test that ranges off the ordering field are a 400 and updated_at ranges order by it"""
+        two_days_ago = (self.now - timezone.timedelta(days=2)).isoformat()
+        five_days_ago = (self.now - timezone.timedelta(days=5)).isoformat()
+
+        assert self.ids(updated_after=five_days_ago) == [self.charlie.pk, self.alpha.pk, self.bravo.pk]
+        assert self.ids(created_after=two_days_ago, ordering='created_at') == [self.alpha.pk, self.bravo.pk]
+        response = self.client.get('/api/items/', {'created_after': two_days_ago, 'ordering': 'name'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data) == {'ordering'}
+        for params in ({'created_after': two_days_ago, 'updated_after': two_days_ago},
+                       {'updated_after': two_days_ago, 'cursor': ''}):
+            response = self.client.get('/api/items/', params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert set(response.data) == {'non_field_errors'}
+
+    def test_ordering_rejected_on_cursor_pages(self):
+        """Test that ?ordering= with a cursor is a 400 rather than silently ignored"""
+        for ordering in ('name', '-created_at'):
+            response = self.client.get('/api/items/', {'cursor': '', 'ordering': ordering})
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert set(response.data) == {'ordering'}
+
+    def test_every_combination_uses_an_index(self):
+        """Test with EXPLAIN that every accepted combination is a range scan of its matching index"""
+        # Disabled plan nodes are still chosen when nothing else can answer the query
+        with connection.cursor() as cursor:
+            for setting in ('enable_seqscan', 'enable_sort', 'enable_incremental_sort'):
+                cursor.execute(f'SET LOCAL {setting} = off')
+
+        index_fields = {'created_at': ('-created_at', '-id'), 'updated_at': ('updated_at', 'id'), 'name': ('name', 'id')}
+        index_names = {tuple(index.fields): index.name for index in Item._meta.indexes}
+        since, until = (self.now - timezone.timedelta(days=5)).isoformat(), self.now.isoformat()
+        ranges = {None: {}, 'created_at': {'created_after': since, 'created_before': until},
+                  'updated_at': {'updated_after': since, 'updated_before': until}}
+        for creator in ({}, {'created_by': self.user.pk}):
+            for range_field, date_range in ranges.items():
+                for ordering in (None, *ItemFilterSerializer.ORDERINGS):
+                    field = ordering.lstrip('-') if ordering else range_field or 'created_at'
+                    if range_field and field != range_field:
+                        continue  # a 400 (test_range_must_match_ordering)
+                    params = {**creator, **date_range, **({'ordering': ordering} if ordering else {})}
+                    index = index_names[(*creator, *index_fields[field])]
+                    conditions = [column for column in ('created_by_id' if creator else None, range_field) if column]
+                    with CaptureQueriesContext(connection) as queries:
+                        assert self.client.get('/api/items/', params).status_code == status.HTTP_200_OK
+
+                    pages = 0
+                    for query in queries.captured_queries:
+                        if '"api_item"' not in query['sql']:
+                            continue
+                        with connection.cursor() as cursor:
+                            cursor.execute(f'EXPLAIN {query["sql"]}')
+                            plan = '\n'.join(row[0] for row in cursor.fetchall())
+                        assert 'Seq Scan on api_item' not in plan, (params, plan)
+                        assert 'Sort' not in plan, (params, plan)
+                        if 'ORDER BY' not in query['sql']:
+                            continue
+                        pages += 1
+                        assert f'using {index} on api_item' in plan, (params, plan)
+                        index_cond = ' '.join(line for line in plan.splitlines() if 'Index Cond:' in line)
+                        for column in conditions:
+                            assert f'{column} ' in index_cond, (params, plan)
+                    assert pages == 1, params
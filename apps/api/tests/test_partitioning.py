@@ -0,0 +1,141 @@
+"""
+Tests for monthly partitioning of the items table
+"""
+import io
+from datetime import timedelta
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from apps.api import partitioning
+from apps.api.models import Item
+from apps.core.pagination import estimated_row_count
+from apps.core.tests import TenantAPITestCase
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestItemPartitioning(TenantAPITestCase):
+    """
+    Test the online conversion of api_item and its upkeep
+    """
+
+    def setUp(self):
+        """Set up items spread over the last three months"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+        for days in (0, 35, 70):
+            item = Item.objects.create(name=f'{days} days old', created_by=self.user)
+            Item.objects.filter(pk=item.pk).update(created_at=self.now - timedelta(days=days))
+        self.items = list(Item.objects.order_by('pk'))
+
+    def partition_of(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM api_item WHERE id = %s', [pk])
+            return cursor.fetchone()[0].rsplit('.', 1)[-1]
+
+    def rows(self):
+        return list(Item.objects.order_by('pk').values('id', 'name', 'created_at', 'updated_at', 'version'))
+
+    def partition(self, **options):
+        call_command('partition_items', schema=self.tenant.schema_name, stdout=io.StringIO(), **options)
+
+    def test_writes_during_backfill_are_kept(self):
+        """Test that the trigger and the batched copy together miss no write"""
+        first, middle, last = self.items
+        assert partitioning.prepare()
+        Item.objects.create(name='Created while copying', created_by=self.user)
+
+        batches = []
+
+        def progress(copied):
+            batches.append(copied)
+            # After the first batch: one row already copied, one not yet
+            if len(batches) == 1:
+                Item.objects.filter(pk=first.pk).update(name='Changed after its copy')
+                Item.objects.filter(pk=last.pk).update(name='Changed before its copy')
+                Item.objects.filter(pk=middle.pk).delete()
+
+        partitioning.backfill(batch_size=1, progress=progress)
+        expected = self.rows()
+        partitioning.swap()
+
+        assert partitioning.is_partitioned()
+        assert self.rows() == expected
+        assert [row['name'] for row in expected] == ['Changed after its copy', 'Changed before its copy',
+                                                     'Created while copying']
+
+    def test_api_unchanged_after_conversion(self):
+        """Test that the views keep working on the partitioned table"""
+        self.partition(drop_old=True)
+
+        assert partitioning.table_kind('api_item_unpartitioned') is None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tgname FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal',
+                           [partitioning.qualified('api_item')])
+            assert [name for name, in cursor.fetchall()] == ['api_item_sync_xid']
+        response = self.client.post('/api/items/', {'name': 'New widget'})
+        assert response.status_code == status.HTTP_201_CREATED
+        new_id = response.data['id']
+        assert new_id > max(item.pk for item in self.items)
+        assert self.partition_of(new_id) == partitioning.partition_name(partitioning.month_start(self.now))
+        assert self.partition_of(self.items[2].pk) == partitioning.partition_name(
+            partitioning.month_start(self.now - timedelta(days=70)))
+
+        assert [item['id'] for item in self.client.get('/api/items/').data['results']][0] == new_id
+        assert self.client.get('/api/items/', {'search': 'widg'}).data['count'] == 1
+        assert self.client.patch(f'/api/items/{new_id}/', {'name': 'Renamed'}).data['name'] == 'Renamed'
+        assert self.client.delete(f'/api/items/{new_id}/').status_code == status.HTTP_204_NO_CONTENT
+        assert Item.objects.count() == 3
+
+    def test_old_table_keeps_no_foreign_keys(self):
+        """Test that a creator can be deleted while the unpartitioned table is kept"""
+        self.partition()
+        assert partitioning.table_kind('api_item_unpartitioned') == 'r'
+
+        self.user.delete()
+        with connection.cursor() as cursor:
+            # Run the deferred foreign key checks now rather than at the rolled back commit
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        assert Item.objects.count() == 0
+
+    def test_rerun_is_safe(self):
+        """Test that an interrupted conversion resumes and a converted tenant is left alone"""
+        partitioning.prepare()
+        out = io.StringIO()
+        call_command('partition_items', schema=self.tenant.schema_name, stdout=out)
+        call_command('partition_items', schema=self.tenant.schema_name, stdout=out)
+
+        assert 'resuming' in out.getvalue()
+        assert 'already partitioned' in out.getvalue()
+        assert partitioning.is_partitioned()
+        assert Item.objects.count() == 3
+
+    def test_ensure_creates_ahead_and_moves_default_rows(self):
+        """Test that upcoming partitions are created and stray rows moved into them"""
+        self.partition(months_ahead=1)
+        far = partitioning.add_months(partitioning.month_start(self.now), 3)
+        stray = Item.objects.create(name='Far future', created_by=self.user)
+        Item.objects.filter(pk=stray.pk).update(created_at=far)
+        assert self.partition_of(stray.pk) == partitioning.default_partition_name()
+
+        created = partitioning.ensure_partitions(ahead=3)
+
+        assert created == [partitioning.partition_name(partitioning.add_months(far, -1)),
+                           partitioning.partition_name(far)]
+        assert self.partition_of(stray.pk) == partitioning.partition_name(far)
+        assert partitioning.ensure_partitions(ahead=3) == []
+
+    def test_estimated_count_of_partitioned_table(self):
+        """Test that the row estimate adds up the partitions"""
+        self.partition()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_item')
+
+        assert estimated_row_count(Item, 'default') == 3
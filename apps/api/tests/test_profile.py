@@ -3,7 +3,12 @@ Tests for User Profile API endpoint
 """
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.authentication.users import StatelessUserSaveError, active_user_cache, user_from_token
 from apps.core.tests import TenantAPITestCase
 
 User = get_user_model()
@@ -48,3 +53,76 @@ class TestUserProfileAPI(TenantAPITestCase):
         response = self.client.get('/api/profile/')
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestStatelessUserProfile(TenantAPITestCase):
+    """
+    Test serving the profile from token claims without loading the user
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        stateless = override_settings(TENANT_JWT_STATELESS_USER=True)
+        stateless.enable()
+        self.addCleanup(stateless.disable)
+        active_user_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        token = TenantTokenObtainPairSerializer.get_token(self.user).access_token
+        self.token = token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_profile_served_without_queries(self):
+        """Test that a warm request runs zero queries and matches the model data"""
+        self.client.get('/api/profile/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/profile/')
+
+        # ATOMIC_REQUESTS (transaction search_path mode) wraps the view in a savepoint
+        queries = [q['sql'] for q in context.captured_queries if 'SAVEPOINT' not in q['sql']]
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == []
+        assert response.data['id'] == self.user.id
+        assert response.data['username'] == 'testuser'
+        assert response.data['email'] == 'test@example.com'
+        assert response.data['is_staff'] is False
+        assert response.data['date_joined'] == self.user.date_joined.isoformat().replace('+00:00', 'Z')
+
+    def test_deactivated_user_rejected(self):
+        """Test that disabling a user revokes their existing tokens"""
+        self.client.get('/api/profile/')
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/profile/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_item_created_by_token_user(self):
+        """Test that the claim-backed user can still own new items"""
+        response = self.client.post('/api/items/', {'name': 'Item'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created_by'] == self.user.id
+        assert response.data['created_by_username'] == 'testuser'
+
+    def test_token_user_cannot_be_saved(self):
+        """Test that saving a claim-backed user fails instead of overwriting the row"""
+        self.user.is_active = False
+        self.user.first_name = 'Test'
+        self.user.save()
+        user = user_from_token(self.token)
+
+        with pytest.raises(StatelessUserSaveError):
+            user.save()
+        with pytest.raises(StatelessUserSaveError):
+            user.save(update_fields=['username'])
+
+        self.user.refresh_from_db()
+        assert (self.user.is_active, self.user.first_name) == (False, 'Test')
@@ -9,6 +9,10 @@ app_name = 'api'
 urlpatterns = [
     # Items endpoints
     path('items/', views.ItemListCreateView.as_view(), name='item-list-create'),
+    path('items/bulk/', views.ItemBulkView.as_view(), name='item-bulk'),
+    path('items/changes/', views.ItemChangesView.as_view(), name='item-changes'),
+    path('items/export/', views.ItemExportView.as_view(), name='item-export'),
+    path('items/import/', views.ItemImportView.as_view(), name='item-import'),
     path('items/<int:pk>/', views.ItemDetailView.as_view(), name='item-detail'),
 
     # User profile endpoint
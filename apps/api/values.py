@@ -0,0 +1,136 @@
+"""
+Read-only fast path serializing list pages straight from QuerySet.values()
+
+For a ModelSerializer whose readable fields are all plain columns, foreign
+key ids (PrimaryKeyRelatedField) or attributes reached through non-null
+forward foreign keys (e.g. created_by.username), the field list is compiled
+once into (output name, values() lookup, converter) entries. List pages are
+then built from values() rows, with no model instances and no per-field
+attribute traversal.
+
+Converters are the fields' own to_representation (or an exact shortcut
+for int/str), so output is identical to the serializer's. Any other field
+(methods, '*' sources, nested serializers, to-many, file fields) disables
+the fast path and the view falls back to the regular serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.response import Response
+
+_plans = {}
+
+
+class ValuesPlan:
+    """Compiled (name, lookup, convert) entries for one serializer shape"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.lookups = list(dict.fromkeys(lookup for _, lookup, _ in entries))
+
+    def serialize(self, rows):
+        """Render values() rows exactly as the serializer would render instances"""
+        entries = self.entries
+        return [
+            {
+                name: None if row[lookup] is None else convert(row[lookup])
+                for name, lookup, convert in entries
+            }
+            for row in rows
+        ]
+
+    def iter_serialize(self, rows):
+        """Lazy serialize(), for streaming"""
+        entries = self.entries
+        for row in rows:
+            yield {
+                name: None if row[lookup] is None else convert(row[lookup])
+                for name, lookup, convert in entries
+            }
+
+
+def get_values_plan(serializer):
+    """The ValuesPlan for a ModelSerializer instance, or None if it can't use the fast path"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    fields = serializer.fields
+    key = (type(serializer), tuple(fields))
+    if key not in _plans:
+        _plans[key] = compile_values_plan(serializer.Meta.model, fields)
+    return _plans[key]
+
+
+def compile_values_plan(model, fields):
+    entries = []
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        lookup = values_lookup(model, field)
+        if lookup is None:
+            return None
+        entries.append((name, lookup, converter(field)))
+    return ValuesPlan(entries)
+
+
+def values_lookup(model, field):
+    """values() lookup producing exactly what the field reads, or None"""
+    if field.source == '*' or isinstance(field, serializers.BaseSerializer):
+        return None
+    if isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField):
+        return None
+
+    current = model
+    attrs = field.source_attrs
+    for index, attr in enumerate(attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        last = index == len(attrs) - 1
+        if model_field.many_to_many or model_field.one_to_many or isinstance(model_field, models.FileField):
+            return None
+        if last:
+            # A foreign key only renders as its id through PrimaryKeyRelatedField
+            if model_field.is_relation != isinstance(field, serializers.PrimaryKeyRelatedField):
+                return None
+            break
+        # Traversing a nullable relation makes DRF skip the field; values() would give None
+        if not model_field.is_relation or model_field.null or model_field.one_to_one and model_field.auto_created:
+            return None
+        current = model_field.related_model
+    return '__'.join(attrs)
+
+
+def converter(field):
+    # Exact shortcuts: IntegerField/CharField.to_representation are int()/str()
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.CharField:
+        return str
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field is not None else _identity
+    return field.to_representation
+
+
+def _identity(value):
+    return value
+
+
+class ValuesListMixin:
+    """
+    Serve list requests from values() rows when the serializer allows it
+    (see get_values_plan); works with the page-number and keyset paginators
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = get_values_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*plan.lookups)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(queryset))
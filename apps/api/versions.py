@@ -0,0 +1,63 @@
+"""
+Versions behind the items ETags
+
+Every tenant has a TenantVersion row for its items, bumped after each
+committed write, and every Item a version column bumped on save. A
+conditional GET compares one of them (a primary key lookup) with the
+client's validators before any queryset or serializer work.
+
+A version covers everything an item body shows: the item's own columns
+and its creator's username (created_by_username). Renaming a user bumps
+the version of their items (apps.api.signals); other user fields aren't
+part of item responses.
+
+The collection counter is bumped from transaction.on_commit, outside the
+writing transaction, so concurrent writers never queue on the counter row.
+Readers take the version before the data, so a body is never tagged with a
+version newer than itself; a reader racing a commit may get the previous
+version (and a 304) until the bump lands a moment later.
+
+Writes that bypass Item.save()/delete() (bulk_create, bulk_update, queryset
+deletes, COPY) must call items_changed() themselves; deletions go through
+apps.api.changes.delete_items, which does. Deleting a user deletes their
+items that way first (apps.api.signals) rather than by the FK cascade.
+"""
+from django.db import connection, transaction
+from django_tenants.utils import get_public_schema_name
+from .models import TenantVersion
+from .signals import items_version_changed
+
+ITEMS = 'items'
+
+
+def items_changed():
+    """Bump the current tenant's items version once the current transaction commits"""
+    schema_name = connection.schema_name
+    if schema_name == get_public_schema_name():
+        return
+    transaction.on_commit(lambda: bump_version(schema_name, ITEMS))
+
+
+def bump_version(schema_name, key):
+    table = f'{connection.ops.quote_name(schema_name)}.{connection.ops.quote_name(TenantVersion._meta.db_table)}'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} AS current (key, version, changed_at) VALUES (%s, 1, now()) '
+            f'ON CONFLICT (key) DO UPDATE SET version = current.version + 1, changed_at = now()',
+            [key],
+        )
+    items_version_changed.send(sender=TenantVersion, schema_name=schema_name)
+
+
+def get_items_version():
+    """(version, changed_at) of the current tenant's items; (0, None) before the first write"""
+    row = TenantVersion.objects.filter(key=ITEMS).values_list('version', 'changed_at').first()
+    return row or (0, None)
+
+
+def items_etag(version):
+    return f'W/"items-{version}"'
+
+
+def item_etag(pk, version):
+    return f'W/"item-{pk}-{version}"'
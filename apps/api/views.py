@@ -2,23 +2,60 @@
 Example API endpoints
 """
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db import connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from . import changes, export, imports, versions
+from .mixins import ConditionalGetMixin, QueryBudgetMixin, ResponseCacheMixin, SerializerQuerysetMixin
 from .models import Item
-from .serializers import ItemSerializer, UserProfileSerializer
+from .pagination import ItemPagination
+from .filters import ItemFilter
+from .search import ItemSearchFilter
+from .serializers import ItemBulkSerializer, ItemSerializer, UserProfileSerializer
+from .values import ValuesListMixin, get_values_plan
 
 
-class ItemListCreateView(generics.ListCreateAPIView):
+class ItemListCreateView(QueryBudgetMixin, ConditionalGetMixin, ResponseCacheMixin, ValuesListMixin,
+                         SerializerQuerysetMixin, generics.ListCreateAPIView):
     """
     Endpoint 1: List and create items
     GET  /api/items/ - List all items for current tenant
     POST /api/items/ - Create a new item for current tenant
 
     Items are automatically isolated by tenant schema
+
+    Pass ?cursor= for keyset pagination (no COUNT, constant cost per page);
+    follow the returned next/previous links from there
+
+    Pass ?search= for full-text search on name and description: every word
+    must match as a prefix, best matches first (apps.api.search)
+
+    Filter with ?created_by=, ?created_after= / ?created_before=,
+    ?updated_after= / ?updated_before=, and order page-number pages with
+    ?ordering= (created_at, updated_at or name, - for descending; it takes
+    precedence over search ranking); see apps.api.filters
+
+    Pages are serialized from values() rows (apps.api.values), with output
+    identical to ItemSerializer
+
+    Responses carry the tenant's items version as a weak ETag; conditional
+    requests get 304 after one lookup while nothing changed (apps.api.versions),
+    and other reads of an unchanged version come from the response cache
+    (apps.api.cache)
     """
     serializer_class = ItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ItemPagination
+    filter_backends = [ItemSearchFilter, ItemFilter]
+    # user, version, row estimate, exact count (small tables), page / user, insert, version bump
+    query_budget = {'GET': 5, 'POST': 3}
 
     def get_queryset(self):
         """
@@ -27,6 +64,10 @@ class ItemListCreateView(generics.ListCreateAPIView):
         """
         return Item.objects.all()
 
+    def get_validators(self):
+        version, changed_at = versions.get_items_version()
+        return versions.items_etag(version), changed_at
+
     def perform_create(self, serializer):
         """
         Automatically set the creator when creating an item
@@ -34,22 +75,293 @@ class ItemListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ItemDetailView(QueryBudgetMixin, ConditionalGetMixin, ResponseCacheMixin, SerializerQuerysetMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     """
     Endpoint: Retrieve, update, or delete a specific item
     GET    /api/items/<id>/ - Get item details
     PUT    /api/items/<id>/ - Update item
     PATCH  /api/items/<id>/ - Partial update
     DELETE /api/items/<id>/ - Delete item
+
+    GET responses carry the item's version as a weak ETag (304 for conditional
+    requests) and are cached per version (apps.api.cache)
     """
     serializer_class = ItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # user, version, item (with creator); writes: user, item, the write (plus the
+    # tombstone for deletes) and the version bump
+    query_budget = {'GET': 3, 'PUT': 4, 'PATCH': 4, 'DELETE': 5}
 
     def get_queryset(self):
         return Item.objects.all()
 
+    def get_validators(self):
+        row = Item.objects.filter(pk=self.kwargs['pk']).values_list('version', 'updated_at').first()
+        if row is None:
+            # Let the regular lookup answer 404
+            return None, None
+        return versions.item_etag(self.kwargs['pk'], row[0]), row[1]
+
+    def perform_destroy(self, instance):
+        """
+        Leave a tombstone for delta sync clients (see apps.api.changes)
+        """
+        changes.delete_items([instance.pk])
+
+
+class ItemBulkView(QueryBudgetMixin, generics.GenericAPIView):
+    """
+    Endpoint: Create, update and delete many items in one request
+    POST /api/items/bulk/
+    {"operations": [
+        {"op": "create", "data": {"name": "New item"}},
+        {"op": "update", "id": 5, "data": {"description": "Edited"}},
+        {"op": "delete", "id": 7}
+    ]}
+
+    All or nothing: every operation is validated first (updates are partial,
+    with ItemSerializer rules). If any fails, nothing is applied and the 400
+    response has a result per operation (424 for the valid ones). Otherwise
+    the batch runs in one transaction as one bulk_create, one bulk_update and
+    one DELETE (plus its tombstones), and each result carries the written item.
+    """
+    serializer_class = ItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # user, locked items, insert, update, delete, tombstones, version bump
+    query_budget = 7
+
+    def post(self, request):
+        payload = ItemBulkSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        operations = payload.validated_data['operations']
+
+        with transaction.atomic():
+            # Lock in id order so concurrent batches can't deadlock
+            ids = {operation['id'] for operation in operations if operation['op'] != 'create' and 'id' in operation}
+            items = Item.objects.select_related('created_by').select_for_update(of=('self',))
+            existing = {item.pk: item for item in items.filter(pk__in=ids).order_by('pk')} if ids else {}
+
+            results, creates, updates, deletes = self.validate_operations(operations, existing)
+            if any(result is not None for result in results):
+                return Response({'results': [
+                    result or {'op': operation['op'], 'status': status.HTTP_424_FAILED_DEPENDENCY}
+                    for operation, result in zip(operations, results)
+                ]}, status=status.HTTP_400_BAD_REQUEST)
+
+            if creates:
+                Item.objects.bulk_create(creates)
+            if updates:
+                # bulk_update skips auto_now and Item.save()
+                now = timezone.now()
+                fields = {'updated_at', 'version'}
+                for item, changed in updates:
+                    item.updated_at = now
+                    item.version = F('version') + 1
+                    fields.update(changed)
+                Item.objects.bulk_update([item for item, _ in updates], sorted(fields))
+            if creates or updates:
+                versions.items_changed()
+            if deletes:
+                changes.delete_items([item.pk for item in deletes])
+
+        written = {'create': iter(creates), 'update': (item for item, _ in updates)}
+        results = []
+        for operation in operations:
+            if operation['op'] == 'delete':
+                results.append({'op': 'delete', 'status': status.HTTP_204_NO_CONTENT, 'id': operation['id']})
+                continue
+            results.append({
+                'op': operation['op'],
+                'status': status.HTTP_201_CREATED if operation['op'] == 'create' else status.HTTP_200_OK,
+                'item': self.get_serializer(next(written[operation['op']])).data,
+            })
+        return Response({'results': results})
+
+    def validate_operations(self, operations, existing):
+        """
+        Validate each operation against ItemSerializer and the locked items
+        Returns (results with an error or None per operation, new items,
+        (item, changed fields) updates, items to delete)
+        """
+        results, creates, updates, deletes = [], [], [], []
+        seen = set()
+        for operation in operations:
+            op = operation['op']
+            pk = operation.get('id') if op != 'create' else None
+            if pk is not None:
+                if pk in seen:
+                    results.append({'op': op, 'status': status.HTTP_400_BAD_REQUEST,
+                                    'errors': {'id': ['Only one operation per item is allowed.']}})
+                    continue
+                seen.add(pk)
+                if pk not in existing:
+                    results.append({'op': op, 'status': status.HTTP_404_NOT_FOUND,
+                                    'errors': {'id': ['Not found.']}})
+                    continue
+
+            if op == 'delete':
+                deletes.append(existing[pk])
+                results.append(None)
+                continue
+
+            serializer = self.get_serializer(existing.get(pk), data=operation['data'], partial=op == 'update')
+            if not serializer.is_valid():
+                results.append({'op': op, 'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+                continue
+            if op == 'create':
+                # created_by as in ItemListCreateView.perform_create
+                creates.append(Item(**serializer.validated_data, created_by=self.request.user))
+            else:
+                item = existing[pk]
+                for attr, value in serializer.validated_data.items():
+                    setattr(item, attr, value)
+                updates.append((item, serializer.validated_data.keys()))
+            results.append(None)
+        return results, creates, updates, deletes
+
+
+class ItemChangesView(QueryBudgetMixin, SerializerQuerysetMixin, generics.GenericAPIView):
+    """
+    Endpoint: Delta sync of items
+    GET /api/items/changes/?since=<token>
+
+    Returns items created or updated since the token, ids of items deleted
+    since then, and the token for the next call. Omit `since` on the first
+    sync to get every item. While `has_more` is true, call again right away
+    with the new token. Apply changes idempotently: recent ones may be sent
+    twice (see apps.api.changes). A 410 means the token is too old and the
+    client has to sync from scratch. Supports ?fields= / ?exclude=.
+    """
+    serializer_class = ItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # user, snapshot, changed items, tombstones
+    query_budget = 4
+
+    def get_queryset(self):
+        return Item.objects.all()
+
+    def get(self, request):
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = get_values_plan(serializer)
+        if plan is not None:
+            queryset = queryset.values(*dict.fromkeys([*plan.lookups, 'sync_xid', 'id']))
+
+        try:
+            items, deleted, token, has_more = changes.get_changes(queryset, request.query_params.get('since'))
+        except changes.InvalidSyncToken:
+            raise ValidationError({'since': ['Invalid sync token.']})
+        except changes.SyncTokenExpired:
+            return Response({'detail': 'Sync token expired; sync again without `since`.'}, status=status.HTTP_410_GONE)
+
+        return Response({
+            'changed': plan.serialize(items) if plan is not None else [serializer.to_representation(item) for item in items],
+            'deleted': deleted,
+            'since': token,
+            'has_more': has_more,
+        })
+
+
+class ItemExportView(QueryBudgetMixin, SerializerQuerysetMixin, generics.GenericAPIView):
+    """
+    Endpoint: Stream every item of the current tenant
+    GET /api/items/export/?format=ndjson|csv
+
+    Oldest first, in constant memory (see apps.api.export); gzipped when the
+    client accepts it. Resume an interrupted export with
+    ?after=<created_at>,<id> of the last row received.
+    Supports ?fields= / ?exclude= like the list endpoint; rows always keep
+    created_at and id for resuming.
+    """
+    serializer_class = ItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = export.FormatParamNegotiation
+    # user; rows are queried while the body streams, after the view returns
+    query_budget = 1
+
+    def get_queryset(self):
+        return Item.objects.all()
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'keep_fields': export.WATERMARK_FIELDS}
+
+    def get(self, request):
+        export_format = request.query_params.get('format', 'ndjson')
+        if export_format not in export.FORMATS:
+            raise ValidationError({'format': [f'Expected one of: {", ".join(export.FORMATS)}']})
+        after = request.query_params.get('after')
+        if after is not None:
+            after = export.parse_watermark(after)
+            if after is None:
+                raise ValidationError({'after': ['Expected <created_at>,<id> of the last exported row']})
+
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = get_values_plan(serializer)
+        if plan is not None:
+            lookups = list(dict.fromkeys([*plan.lookups, *export.WATERMARK_FIELDS]))
+            rows = plan.iter_serialize(export.iter_rows(queryset.values(*lookups), after))
+        else:
+            rows = map(serializer.to_representation, export.iter_rows(queryset, after))
+
+        header = [name for name, field in serializer.fields.items() if not field.write_only]
+        gzip = bool(export.accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        response = StreamingHttpResponse(
+            export.stream_export(request.tenant, rows, export_format, header, gzip=gzip),
+            content_type=export.FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="items-{connection.schema_name}.{export_format}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ItemImportView(QueryBudgetMixin, APIView):
+    """
+    Endpoint: Bulk-load items from a CSV or NDJSON file
+    POST /api/items/import/?format=csv|ndjson
+
+    Send the file as the request body (Content-Type text/csv or
+    application/x-ndjson) or as a multipart upload in the `file` field.
+    Rows are validated like POST /api/items/ and loaded with COPY in one
+    transaction (see apps.api.imports); the response counts imported and
+    failed rows and lists the first errors by line.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = export.FormatParamNegotiation
+    # user and the version bump; rows are loaded with COPY (one per batch), which
+    # doesn't go through cursor.execute
+    query_budget = 2
+
+    def post(self, request):
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ValidationError({'file': ['No file was submitted.']})
+            lines = upload
+            detected = imports.detect_format(request.content_type, upload.name)
+        else:
+            # Read the raw body line by line; request.data would load it all
+            lines = request.stream or []
+            detected = imports.detect_format(request.content_type)
+
+        import_format = request.query_params.get('format') or detected
+        if import_format not in imports.FORMATS:
+            raise ValidationError({'format': [f'Expected one of: {", ".join(imports.FORMATS)}']})
+
+        try:
+            report = imports.import_items(lines, import_format, request.user)
+        except imports.ImportFormatError as exc:
+            raise ParseError(str(exc))
+        return Response(report.as_dict())
+
 
-class UserProfileView(APIView):
+class UserProfileView(QueryBudgetMixin, APIView):
     """
     Endpoint 2: Get current user's profile with tenant context
     GET /api/profile/ - Get user info including current tenant
@@ -57,6 +369,7 @@ class UserProfileView(APIView):
     Demonstrates how to include tenant information in responses
     """
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1
 
     def get(self, request):
         """
@@ -5,3 +5,7 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authentication'
     label = 'authentication'
+
+    def ready(self):
+        # Register cache invalidation handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,80 @@
+"""
+Tenant-aware DRF authentication
+"""
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .revocation import is_revoked
+from .tokens import (
+    get_request_token, store_request_token, token_matches_tenant, get_cached_token, cache_token,
+)
+from .users import stateless_users_enabled, is_user_active, user_from_token
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reuses the token already validated by
+    TenantJWTValidationMiddleware instead of verifying the signature again
+
+    The tenant claim and revocation are checked before the user is resolved,
+    so the class is also safe without the middleware.
+
+    With TENANT_JWT_STATELESS_USER enabled the user is built from the token
+    claims (see apps.authentication.users) instead of loaded from auth_user.
+
+    Tokens verified on earlier requests come from the per-worker verified
+    token cache (apps.authentication.tokens) without another HMAC check.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Tokens stored by the middleware already passed the tenant and revocation checks
+        validated_token = get_request_token(request, raw_token)
+        if validated_token is None:
+            validated_token = self.get_validated_token(raw_token)
+            if not token_matches_tenant(validated_token):
+                raise AuthenticationFailed('Invalid token for this tenant', code='token_not_valid')
+            if is_revoked(validated_token):
+                raise AuthenticationFailed('Token has been revoked', code='token_not_valid')
+            store_request_token(request._request, raw_token, validated_token)
+
+        return self.get_user(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        validated_token = get_cached_token(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            cache_token(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        if not stateless_users_enabled():
+            return super().get_user(validated_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if not is_user_active(validated_token[api_settings.USER_ID_CLAIM]):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return user_from_token(validated_token)
+
+
+class OptionalTenantJWTAuthentication(TenantJWTAuthentication):
+    """
+    TenantJWTAuthentication for endpoints where the access token is optional
+    (logout): an invalid, expired or revoked one is ignored instead of a 401
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed:
+            return None
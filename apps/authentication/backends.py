@@ -0,0 +1,81 @@
+"""
+Authentication backend with bounded password-hash concurrency
+
+PBKDF2 verification is CPU-bound. Run inline, a burst of logins pins every
+worker on hashing and ordinary API traffic starves. This backend bounds
+hashing to TENANT_LOGIN_HASH_WORKERS at a time with a wait queue of
+TENANT_LOGIN_HASH_QUEUE logins. Once both are full, logins fail fast with
+PoolSaturated, which TenantTokenObtainPairView turns into a 429.
+
+The limits are per process unless TENANT_LOGIN_HASH_SLOTS_PATH is set
+(e.g. /dev/shm/login-hash): then they hold across every worker process on
+the host (apps.core.executor.HostSlots). Single-threaded workers (gunicorn
+sync workers, as in the Dockerfile) need it, since each process only ever
+has one login in flight. hashlib's PBKDF2 releases the GIL, so pool threads
+hash in parallel with request threads.
+
+The user lookup and any hash upgrade stay on the request thread, so the
+tenant connection and its search_path are never used from the pool.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+from apps.core.executor import BoundedExecutor
+
+UserModel = get_user_model()
+
+password_hash_pool = BoundedExecutor(
+    workers=getattr(settings, 'TENANT_LOGIN_HASH_WORKERS', 2),
+    queue_depth=getattr(settings, 'TENANT_LOGIN_HASH_QUEUE', 8),
+    name='password-hash',
+    slots_path=getattr(settings, 'TENANT_LOGIN_HASH_SLOTS_PATH', None),
+)
+
+
+def get_password_hash_pool_stats():
+    """Saturation counters of the password hashing pool (in_flight, completed and rejected count this worker)"""
+    return password_hash_pool.stats
+
+
+def verify_password(raw_password, encoded):
+    """Return (is_correct, needs_rehash) without touching the database"""
+    rehash = []
+    is_correct = check_password(raw_password, encoded, setter=rehash.append)
+    return is_correct, bool(rehash)
+
+
+class BoundedPasswordHashBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords on the bounded hashing pool
+    Public schema logins (Django admin) keep the inline path
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if connection.schema_name == get_public_schema_name():
+            return super().authenticate(request, username, password, **kwargs)
+
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        # Reserve before the user query so a saturated pool rejects immediately
+        with password_hash_pool.reserve():
+            try:
+                user = UserModel._default_manager.get_by_natural_key(username)
+            except UserModel.DoesNotExist:
+                # Hash anyway to keep timing close to an existing user's (#20760)
+                password_hash_pool.run(make_password, password)
+                return None
+
+            is_correct, needs_rehash = password_hash_pool.run(verify_password, password, user.password)
+            if is_correct and needs_rehash:
+                user.password = password_hash_pool.run(make_password, password)
+                user.save(update_fields=['password'])
+
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,143 @@
+"""
+Write-behind buffer for last_login updates on token issuance
+
+A login storm (a whole school signing in at once) used to run one
+synchronous UPDATE auth_user per /api/token/ call. Logins are now recorded
+in memory as (schema, user_id) -> timestamp and written by a background
+thread at most TENANT_LAST_LOGIN_MAX_STALENESS seconds later, one bulk
+UPDATE ... FROM (VALUES ...) per schema. Pending entries are flushed at
+interpreter exit (graceful worker shutdown).
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement
+FLUSH_BATCH_SIZE = 1000
+
+
+class LastLoginBuffer:
+    """
+    Pending last_login timestamps, flushed per schema in bulk
+
+    record() is cheap and never touches the database. A daemon thread started
+    on first use flushes every `max_staleness` seconds, or sooner once
+    `max_pending` entries are waiting.
+    """
+
+    def __init__(self, max_staleness=10, max_pending=10000):
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+
+    def record(self, user_id, when=None, schema_name=None):
+        """Buffer a login for user_id in schema_name (default: the current schema)"""
+        when = when or timezone.now()
+        key = (schema_name or connection.schema_name, user_id)
+        with self._lock:
+            if self._pending.get(key, when) <= when:
+                self._pending[key] = when
+            pending = len(self._pending)
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write every pending timestamp; returns the number of rows sent"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        by_schema = {}
+        for (schema_name, user_id), when in pending.items():
+            by_schema.setdefault(schema_name, []).append((user_id, when))
+
+        sent = 0
+        for schema_name, rows in by_schema.items():
+            try:
+                with schema_context(schema_name):
+                    update_last_logins(rows)
+                sent += len(rows)
+            except Exception:
+                logger.exception('Dropping %d last_login updates for schema %s', len(rows), schema_name)
+        self.flushed += sent
+        return sent
+
+    def _ensure_thread(self):
+        # Lazily started, and restarted in a forked worker (threads don't survive fork)
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.max_staleness)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def update_last_logins(rows):
+    """
+    Set last_login for (user_id, timestamp) rows of the current schema
+    Rows are updated in id order so concurrent flushes from several workers
+    can't deadlock, and a timestamp never moves last_login backwards
+    """
+    User = get_user_model()
+    table = connection.ops.quote_name(User._meta.db_table)
+    pk_column = connection.ops.quote_name(User._meta.pk.column)
+    rows = sorted(rows)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            batch = rows[start:start + FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s, %s)'] * len(batch))
+            cursor.execute(
+                f'UPDATE {table} AS u SET last_login = v.last_login '
+                f'FROM (VALUES {values}) AS v(id, last_login) '
+                f'WHERE u.{pk_column} = v.id '
+                f'AND (u.last_login IS NULL OR u.last_login < v.last_login)',
+                [value for row in batch for value in row],
+            )
+
+
+def buffered_last_login_enabled():
+    return getattr(settings, 'TENANT_LAST_LOGIN_BUFFER', True)
+
+
+def record_login(user):
+    """Buffer a last_login update once the current transaction commits"""
+    when = timezone.now()
+    schema_name = connection.schema_name
+    transaction.on_commit(lambda: last_login_buffer.record(user.pk, when, schema_name))
+
+
+last_login_buffer = LastLoginBuffer(
+    max_staleness=getattr(settings, 'TENANT_LAST_LOGIN_MAX_STALENESS', 10),
+    max_pending=getattr(settings, 'TENANT_LAST_LOGIN_MAX_PENDING', 10000),
+)
+atexit.register(last_login_buffer.flush)
@@ -0,0 +1,69 @@
+"""
+Management command to measure JWT authentication overhead on GET /api/items/
+Usage: python manage.py bench_auth --schema=school1 --requests=2000
+
+Compares stock simplejwt JWTAuthentication (token verified again in the view)
+with TenantJWTAuthentication (reuses the middleware's validated token).
+"""
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django_tenants.utils import tenant_context
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.backends import TokenBackend
+from apps.api.views import ItemListCreateView
+from apps.authentication.authentication import TenantJWTAuthentication
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.core.benchmarks import get_tenant, get_tenant_domain, measure, quiet_sql_logging, summarize
+
+User = get_user_model()
+
+WARMUP_REQUESTS = 10
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request CPU time of JWT authentication on GET /api/items/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, default='school1', help='Tenant schema (default: school1)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per variant (default: 1000)')
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['schema'])
+        with tenant_context(tenant):
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'User "{options["username"]}" not found in {tenant.schema_name}')
+            token = str(TenantTokenObtainPairSerializer.get_token(user).access_token)
+
+        client = Client(HTTP_HOST=get_tenant_domain(tenant), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'GET /api/items/ on {tenant.schema_name}, {options["requests"]} requests per variant\n'
+        ))
+        self.stdout.write(f'{"authentication":<26}{"decodes/req":>12}{"CPU mean ms":>13}{"CPU p99 ms":>12}')
+
+        variants = [
+            ('JWTAuthentication', JWTAuthentication),
+            ('TenantJWTAuthentication', TenantJWTAuthentication),
+        ]
+        for label, authentication_class in variants:
+            def request():
+                response = client.get('/api/items/')
+                if response.status_code != 200:
+                    raise CommandError(f'GET /api/items/ returned {response.status_code}')
+
+            with mock.patch.object(ItemListCreateView, 'authentication_classes', [authentication_class]), \
+                    mock.patch.object(TokenBackend, 'decode', autospec=True,
+                                      side_effect=TokenBackend.decode) as decode, \
+                    quiet_sql_logging():
+                samples = measure(request, options['requests'], clock=time.process_time,
+                                  warmup=WARMUP_REQUESTS)
+
+            stats = summarize(samples)
+            decodes = decode.call_count / (options['requests'] + WARMUP_REQUESTS)
+            self.stdout.write(f'{label:<26}{decodes:>12.1f}{stats["mean"]:>13.3f}{stats["p99"]:>12.3f}')
@@ -0,0 +1,180 @@
+"""
+Management command to benchmark login bursts against concurrent API traffic
+Usage: python manage.py bench_login --logins 16 --readers 4 --duration 5
+       python manage.py bench_login --processes 3 --logins 1 --readers 1   (like gunicorn sync workers)
+
+Login threads POST /api/token/ for the demo user of a random setup_demo
+tenant while reader threads GET /api/items/, in each of --processes forked
+worker processes. Each run is repeated with passwords hashed inline
+(ModelBackend), on the bounded hashing pool with per-process limits, and
+on the pool with limits shared by the processes (TENANT_LOGIN_HASH_SLOTS_PATH).
+The report shows login p99, 429s and reader latency, next to a reader-only
+baseline.
+"""
+import logging
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django_tenants.utils import get_public_schema_name, tenant_context
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.core.benchmarks import get_tenant_domain, quiet_logging, summarize
+from apps.core.executor import BoundedExecutor
+from apps.tenants.models import Client as Tenant
+
+User = get_user_model()
+
+POOL_BACKEND = 'apps.authentication.backends.BoundedPasswordHashBackend'
+
+# label, backend, whether the pool limits are shared by the processes
+BACKENDS = [
+    ('baseline', None, False),
+    ('inline', 'django.contrib.auth.backends.ModelBackend', False),
+    ('pool', POOL_BACKEND, False),
+    ('pool-host', POOL_BACKEND, True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login p99 and concurrent /api/items/ latency with inline vs. pooled password hashing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=16, help='Concurrent login threads (default: 16)')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent /api/items/ threads (default: 4)')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes, each running the login and reader threads (default: 1)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per run (default: 5)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument('--password', type=str, default='demo123', help='Password (default: demo123)')
+
+    def handle(self, *args, **options):
+        targets = []
+        for tenant in Tenant.objects.exclude(schema_name=get_public_schema_name()):
+            with tenant_context(tenant):
+                user = User.objects.filter(username=options['username']).first()
+                if user is None:
+                    continue
+                token = str(TenantTokenObtainPairSerializer.get_token(user).access_token)
+            targets.append((get_tenant_domain(tenant), token))
+        if not targets:
+            raise CommandError(f'No tenant has user "{options["username"]}". Run: python manage.py setup_demo')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{len(targets)} tenants, {options["processes"]} processes with {options["logins"]} login threads and '
+            f'{options["readers"]} reader threads each, {options["duration"]}s per run\n'
+        ))
+        self.stdout.write(
+            f'{"hashing":<10}{"logins/s":>10}{"login p99 ms":>14}{"429s":>7}'
+            f'{"items p50 ms":>14}{"items p99 ms":>14}'
+        )
+
+        with tempfile.TemporaryDirectory(prefix='bench-login-') as slots:
+            for label, backend, shared in BACKENDS:
+                login_threads = options['logins'] if backend else 0
+                pool = BoundedExecutor(
+                    workers=getattr(settings, 'TENANT_LOGIN_HASH_WORKERS', 2),
+                    queue_depth=getattr(settings, 'TENANT_LOGIN_HASH_QUEUE', 8),
+                    name='password-hash',
+                    slots_path=f'{slots}/hash' if shared else None,
+                )
+                # django.request would log every 429 as a warning
+                with override_settings(AUTHENTICATION_BACKENDS=[backend] if backend else []), \
+                        mock.patch('apps.authentication.backends.password_hash_pool', pool), \
+                        quiet_logging('django.db.backends', 'django.request', level=logging.ERROR):
+                    results = self.run_processes(options['processes'], targets, login_threads, options['readers'],
+                                                 options['duration'], options['username'], options['password'])
+
+                logins, throttled, reads = results
+                login_stats = summarize(logins)
+                read_stats = summarize(reads)
+                self.stdout.write(
+                    f'{label:<10}{len(logins) / options["duration"]:>10.1f}'
+                    f'{login_stats["p99"] if logins else 0:>14.1f}{throttled:>7}'
+                    f'{read_stats["p50"]:>14.2f}{read_stats["p99"]:>14.2f}'
+                )
+
+    def run_processes(self, processes, targets, *args):
+        """run() in each of `processes` forked processes; their results merged"""
+        if processes == 1:
+            return self.run(targets, *args)
+        # Children must not share the parent's database connection
+        connection.close()
+        context = multiprocessing.get_context('fork')
+        queue = context.SimpleQueue()
+
+        def worker():
+            try:
+                queue.put(self.run(targets, *args))
+            except Exception as exc:
+                queue.put(exc)
+            finally:
+                connection.close()
+
+        children = [context.Process(target=worker) for _ in range(processes)]
+        for child in children:
+            child.start()
+        results = [queue.get() for _ in children]
+        for child in children:
+            child.join()
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return (
+            [elapsed for logins, _, _ in results for elapsed in logins],
+            sum(throttled for _, throttled, _ in results),
+            [elapsed for _, _, reads in results for elapsed in reads],
+        )
+
+    def run(self, targets, login_threads, reader_threads, duration, username, password):
+        deadline = time.monotonic() + duration
+        logins, reads = [], []
+        throttled = [0]
+        lock = threading.Lock()
+
+        def login(index):
+            rng = random.Random(index)
+            client = Client()
+            while time.monotonic() < deadline:
+                host, _ = rng.choice(targets)
+                started = time.perf_counter()
+                response = client.post('/api/token/', {'username': username, 'password': password},
+                                       HTTP_HOST=host)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 429:
+                        throttled[0] += 1
+                    elif response.status_code == 200:
+                        logins.append(elapsed)
+                    else:
+                        raise CommandError(f'POST /api/token/ returned {response.status_code}')
+            connection.close()
+
+        def read(index):
+            rng = random.Random(-index - 1)
+            client = Client()
+            while time.monotonic() < deadline:
+                host, token = rng.choice(targets)
+                started = time.perf_counter()
+                response = client.get('/api/items/', HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {token}')
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f'GET /api/items/ returned {response.status_code}')
+                with lock:
+                    reads.append(elapsed)
+            connection.close()
+
+        threads = [threading.Thread(target=login, args=(i,)) for i in range(login_threads)]
+        threads += [threading.Thread(target=read, args=(i,)) for i in range(reader_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return logins, throttled[0], reads
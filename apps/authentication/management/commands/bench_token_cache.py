@@ -0,0 +1,102 @@
+"""
+Management command to measure JWT authentication overhead vs. token reuse
+Usage: python manage.py bench_token_cache --schema=school1 --requests=1000 --reuse-ratios 0 0.5 0.9 0.99
+
+Each request either reuses an access token sent earlier in the run (with
+probability --reuse-ratio) or presents a freshly issued one, mimicking clients
+that keep one token for its whole lifetime. Runs with the verified token cache
+disabled and enabled and reports per-request CPU time on GET /api/items/.
+"""
+import random
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django_tenants.utils import tenant_context
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.authentication.tokens import clear_token_cache, verified_token_cache
+from apps.core.benchmarks import get_tenant, get_tenant_domain, quiet_sql_logging, summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request CPU time of JWT authentication at varying token reuse ratios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, default='school1', help='Tenant schema (default: school1)')
+        parser.add_argument('--username', type=str, default='demo', help='Tenant user (default: demo)')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per run (default: 1000)')
+        parser.add_argument(
+            '--reuse-ratios',
+            type=float,
+            nargs='+',
+            default=[0.0, 0.5, 0.9, 0.99],
+            help='Fractions of requests reusing an earlier token (default: 0 0.5 0.9 0.99)'
+        )
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['schema'])
+        with tenant_context(tenant):
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'User "{options["username"]}" not found in {tenant.schema_name}')
+            # Enough distinct tokens for a run with no reuse at all
+            tokens = [
+                str(TenantTokenObtainPairSerializer.get_token(user).access_token)
+                for _ in range(options['requests'])
+            ]
+
+        client = Client(HTTP_HOST=get_tenant_domain(tenant))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'GET /api/items/ on {tenant.schema_name}, {options["requests"]} requests per run\n'
+        ))
+        self.stdout.write(f'{"reuse":>6}{"cache":>8}{"hit rate":>10}{"CPU mean ms":>13}{"CPU p99 ms":>12}')
+
+        for ratio in options['reuse_ratios']:
+            if not 0 <= ratio <= 1:
+                raise CommandError(f'Reuse ratio {ratio} is not between 0 and 1')
+            sequence = self.token_sequence(tokens, options['requests'], ratio)
+
+            for enabled in (False, True):
+                clear_token_cache()
+                hits, misses = verified_token_cache.hits, verified_token_cache.misses
+                maxsize = verified_token_cache.maxsize if enabled else 0
+                with mock.patch.object(verified_token_cache, 'maxsize', maxsize), quiet_sql_logging():
+                    samples = self.run(client, sequence)
+
+                lookups = verified_token_cache.hits - hits + verified_token_cache.misses - misses
+                hit_rate = (verified_token_cache.hits - hits) / lookups if lookups else 0.0
+                stats = summarize(samples)
+                self.stdout.write(
+                    f'{ratio:>6.2f}{"on" if enabled else "off":>8}{hit_rate:>10.1%}'
+                    f'{stats["mean"]:>13.3f}{stats["p99"]:>12.3f}'
+                )
+
+    def token_sequence(self, tokens, count, ratio):
+        """Tokens to send, in order: a reused earlier token with probability ratio, else a new one"""
+        rng = random.Random(0)
+        fresh = iter(tokens)
+        sent = []
+        sequence = []
+        for _ in range(count):
+            if sent and rng.random() < ratio:
+                token = rng.choice(sent)
+            else:
+                token = next(fresh)
+                sent.append(token)
+            sequence.append(token)
+        return sequence
+
+    def run(self, client, sequence):
+        samples = []
+        for token in sequence:
+            started = time.process_time()
+            response = client.get('/api/items/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            samples.append(time.process_time() - started)
+            if response.status_code != 200:
+                raise CommandError(f'GET /api/items/ returned {response.status_code}')
+        return samples
@@ -0,0 +1,35 @@
+"""
+Management command to delete expired revoked tokens from every tenant schema
+Usage: python manage.py prune_revoked_tokens [--schema=school1]
+
+Expired tokens are rejected by signature validation anyway, so their
+revocation rows only grow the table and the revocation Bloom filters.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, tenant_context
+from apps.authentication.models import RevokedToken
+from apps.tenants.models import Client
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked token rows past their expiry in each tenant schema'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schema',
+            type=str,
+            help='Only prune this tenant schema'
+        )
+
+    def handle(self, *args, **options):
+        tenants = Client.objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{options["schema"]}" not found')
+
+        for tenant in tenants:
+            with tenant_context(tenant):
+                deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+            self.stdout.write(f'{tenant.schema_name}: deleted {deleted} expired revoked tokens')
@@ -3,16 +3,21 @@ Tenant JWT validation middleware
 Ensures tokens can't be used across different tenants
 """
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
 from django.http import JsonResponse
 from django.db import connection
+from .revocation import is_revoked
+from .tokens import validate_access_token, store_request_token, token_matches_tenant
 
 
 class TenantJWTValidationMiddleware(MiddlewareMixin):
     """
     Middleware to validate that JWT tokens match the current tenant
     Prevents cross-tenant token usage for security
+    Also rejects tokens revoked in this tenant (logout, refresh rotation)
+
+    The validated token is stored on the request so TenantJWTAuthentication
+    doesn't verify it a second time.
     """
 
     def process_request(self, request):
@@ -28,18 +33,24 @@ class TenantJWTValidationMiddleware(MiddlewareMixin):
         try:
             # Extract and decode token
             token_str = auth_header.split(' ')[1]
-            token = AccessToken(token_str)
+            token = validate_access_token(token_str)
 
             # Validate tenant in token matches current tenant
-            token_tenant = token.get('tenant')
-            current_tenant = connection.schema_name
-
-            if token_tenant != current_tenant:
+            if not token_matches_tenant(token):
                 return JsonResponse({
                     'error': 'Invalid token for this tenant',
                     'detail': 'This token cannot be used on this domain'
                 }, status=403)
 
+            # Bloom filter check; only positives hit the database
+            if is_revoked(token):
+                return JsonResponse({
+                    'error': 'Token has been revoked',
+                    'detail': 'Obtain a new token to continue'
+                }, status=401)
+
+            store_request_token(request, token_str, token)
+
         except (TokenError, KeyError, IndexError):
             # Let DRF authentication handle invalid/expired tokens
             pass
@@ -0,0 +1,21 @@
+"""
+Authentication models (tenant-specific)
+"""
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked JWT, identified by its jti claim
+    Rows past expires_at can be pruned: the token would be rejected anyway
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=16)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+
+    def __str__(self):
+        return f'{self.token_type} {self.jti}'
@@ -0,0 +1,127 @@
+"""
+Tenant-scoped JWT revocation
+
+Revoked jtis are persisted in each tenant schema (RevokedToken) and mirrored
+into a per-worker, per-schema Bloom filter. Most tokens were never revoked,
+so the common check is a few in-memory bit tests; only filter positives
+(revoked tokens and rare false positives) go to the database.
+
+Filters are refreshed incrementally every TENANT_JWT_REVOCATION_REFRESH
+seconds, picking up revocations made by other workers. A filter is rebuilt
+from scratch when it outgrows its capacity. Rebuilds stream only unexpired
+rows, so the filter holds at most one refresh token lifetime of revocations.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from apps.core.bloom import BloomFilter
+from .models import RevokedToken
+
+# Minimum filter size, and headroom over the current row count on rebuild
+MIN_CAPACITY = 10000
+CAPACITY_HEADROOM = 2
+# Incremental refreshes re-read this far back to catch rows from slow transactions
+REFRESH_OVERLAP = timedelta(seconds=60)
+REBUILD_CHUNK_SIZE = 10000
+
+
+class RevocationFilter:
+    """Bloom filter of one schema's revoked jtis, plus its refresh bookkeeping"""
+
+    def __init__(self, bloom, loaded_at):
+        self.bloom = bloom
+        self.loaded_at = loaded_at
+        self.refreshed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def revocation_enabled():
+    return getattr(settings, 'TENANT_JWT_REVOCATION', True)
+
+
+def is_revoked(token):
+    """Check whether the token's jti was revoked in the current schema"""
+    if not revocation_enabled() or connection.schema_name == get_public_schema_name():
+        return False
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None:
+        return False
+    if jti not in _get_filter().bloom:
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke_token(token):
+    """
+    Persist the token's jti as revoked in the current schema
+    Returns False if it was already revoked (e.g. a concurrent refresh won)
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    _, created = RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'token_type': token.get(api_settings.TOKEN_TYPE_CLAIM, ''),
+        'expires_at': datetime_from_epoch(token['exp']),
+    })
+    # Visible to this worker right away; other workers see it on their next refresh
+    _get_filter().bloom.add(jti)
+    return created
+
+
+def build_filter():
+    """Load every unexpired revoked jti of the current schema into a new filter"""
+    loaded_at = timezone.now()
+    rows = RevokedToken.objects.filter(expires_at__gt=loaded_at)
+    bloom = BloomFilter(
+        capacity=max(rows.count() * CAPACITY_HEADROOM, MIN_CAPACITY),
+        error_rate=getattr(settings, 'TENANT_JWT_REVOCATION_ERROR_RATE', 0.001),
+    )
+    for jti in rows.values_list('jti', flat=True).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        bloom.add(jti)
+    return RevocationFilter(bloom, loaded_at)
+
+
+def refresh_filter(revocation_filter):
+    """Add jtis revoked since the last load (by any worker) to the filter"""
+    loaded_at = timezone.now()
+    jtis = RevokedToken.objects.filter(
+        revoked_at__gte=revocation_filter.loaded_at - REFRESH_OVERLAP
+    ).values_list('jti', flat=True)
+    for jti in jtis.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        revocation_filter.bloom.add(jti)
+    revocation_filter.loaded_at = loaded_at
+    revocation_filter.refreshed_at = time.monotonic()
+
+
+def clear_revocation_filters():
+    with _filters_lock:
+        _filters.clear()
+
+
+def _get_filter():
+    schema_name = connection.schema_name
+    revocation_filter = _filters.get(schema_name)
+    if revocation_filter is None or revocation_filter.bloom.full:
+        with _filters_lock:
+            revocation_filter = _filters.get(schema_name)
+            if revocation_filter is None or revocation_filter.bloom.full:
+                revocation_filter = _filters[schema_name] = build_filter()
+        return revocation_filter
+
+    interval = getattr(settings, 'TENANT_JWT_REVOCATION_REFRESH', 5)
+    if time.monotonic() - revocation_filter.refreshed_at > interval:
+        if revocation_filter.lock.acquire(blocking=False):
+            try:
+                refresh_filter(revocation_filter)
+            finally:
+                revocation_filter.lock.release()
+    return revocation_filter
@@ -1,7 +1,15 @@
 """
 Tenant-aware JWT serializers
 """
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .last_login import buffered_last_login_enabled, record_login
+from .revocation import is_revoked, revoke_token
+from .tokens import token_matches_tenant
 
 
 class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -22,5 +30,69 @@ class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['tenant'] = tenant_schema
         token['username'] = user.username
         token['email'] = user.email
+        # Enough to build the request user without a query (TENANT_JWT_STATELESS_USER)
+        token['is_staff'] = user.is_staff
+        token['date_joined'] = user.date_joined.isoformat()
 
         return token
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        # SIMPLE_JWT's UPDATE_LAST_LOGIN is off; last_login is written behind (see .last_login)
+        if buffered_last_login_enabled():
+            record_login(self.user)
+        else:
+            update_last_login(None, self.user)
+
+        return data
+
+
+def validate_tenant_refresh_token(raw_token):
+    """Parse a refresh token issued by this tenant and not revoked since"""
+    refresh = RefreshToken(raw_token)
+    if not token_matches_tenant(refresh):
+        raise InvalidToken('Invalid token for this tenant')
+    if is_revoked(refresh):
+        raise InvalidToken('Token has been revoked')
+    return refresh
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer using tenant-scoped revocation instead of the blacklist app
+    With ROTATE_REFRESH_TOKENS the presented refresh token is revoked, so it can
+    only be exchanged once
+    """
+
+    def validate(self, attrs):
+        refresh = validate_tenant_refresh_token(attrs['refresh'])
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not revoke_token(refresh):
+                raise InvalidToken('Token has been revoked')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """
+    Logout: revokes the refresh token, and the access token the request
+    was authenticated with (if any)
+    """
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        attrs['refresh'] = validate_tenant_refresh_token(attrs['refresh'])
+        return attrs
+
+    def save(self):
+        revoke_token(self.validated_data['refresh'])
+        access = self.context['request'].auth
+        if isinstance(access, AccessToken):
+            revoke_token(access)
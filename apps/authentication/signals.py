@@ -0,0 +1,22 @@
+"""
+Signal handlers keeping authentication caches in sync with user changes
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from .users import StatelessUserSaveError, forget_user
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_active_user(sender, instance, **kwargs):
+    """Re-check is_active on the user's next request (e.g. after deactivation)"""
+    forget_user(instance.pk)
+
+
+@receiver(pre_save, sender=get_user_model())
+def refuse_stateless_user_save(sender, instance, **kwargs):
+    """Users built from token claims would overwrite the row with stale or assumed values"""
+    if getattr(instance, 'stateless', False):
+        raise StatelessUserSaveError(
+            f'User {instance.pk} was built from an access token; load it from the database to save it'
+        )
@@ -1,10 +1,28 @@
 """
 Tests for tenant-aware JWT authentication
 """
+import multiprocessing
+import tempfile
+from datetime import timedelta
+from unittest import mock
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
+from rest_framework_simplejwt.backends import TokenBackend
 from rest_framework_simplejwt.tokens import AccessToken
+from apps.authentication.backends import password_hash_pool
+from apps.authentication.last_login import LastLoginBuffer
+from apps.authentication.models import RevokedToken
+from apps.authentication.revocation import clear_revocation_filters
+from apps.authentication.serializers import TenantTokenObtainPairSerializer
+from apps.authentication.tokens import (
+    cache_token, clear_token_cache, get_cached_token, validate_access_token, verified_token_cache,
+)
+from apps.core.executor import BoundedExecutor, PoolSaturated
 from apps.core.tests import TenantAPITestCase
 
 User = get_user_model()
@@ -78,3 +96,292 @@ class TestTenantJWTAuthentication(TenantAPITestCase):
 
         assert response.status_code == status.HTTP_200_OK
         assert 'access' in response.data
+
+
+@pytest.mark.django_db
+class TestSingleTokenDecode(TenantAPITestCase):
+    """
+    Test that the middleware and DRF authentication share one token decode
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def access_token(self, tenant_schema=None):
+        token = TenantTokenObtainPairSerializer.get_token(self.user).access_token
+        if tenant_schema:
+            token['tenant'] = tenant_schema
+        return str(token)
+
+    def test_token_decoded_once_per_request(self):
+        """Test that an authenticated request verifies the JWT a single time"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token()}')
+
+        with mock.patch.object(TokenBackend, 'decode', autospec=True,
+                               side_effect=TokenBackend.decode) as decode:
+            response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert decode.call_count == 1
+
+    def test_other_tenant_token_rejected(self):
+        """Test that a token issued for another tenant can't be used"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token("other")}')
+
+        response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_invalid_token_rejected_by_authentication(self):
+        """Test that tokens the middleware couldn't validate still fail in DRF"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+
+        response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestVerifiedTokenCache(TenantAPITestCase):
+    """
+    Test the per-worker cache of verified access tokens
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        clear_token_cache()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = str(TenantTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_reused_token_not_verified_again(self):
+        """Test that a token seen on an earlier request skips verification"""
+        self.client.get('/api/items/')
+        hits = verified_token_cache.hits
+
+        with mock.patch.object(TokenBackend, 'decode', autospec=True,
+                               side_effect=TokenBackend.decode) as decode:
+            response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert decode.call_count == 0
+        assert verified_token_cache.hits > hits
+
+    def test_cache_scoped_by_schema(self):
+        """Test that a token cached in one schema isn't reused in another"""
+        with mock.patch.object(connection, 'schema_name', 'test'):
+            validate_access_token(self.token)
+            assert get_cached_token(self.token) is not None
+        with mock.patch.object(connection, 'schema_name', 'other'):
+            assert get_cached_token(self.token) is None
+
+    def test_entry_expires_with_token(self):
+        """Test that cached tokens don't outlive their exp claim"""
+        token = AccessToken(self.token)
+        token.set_exp(lifetime=timedelta(seconds=-1))
+
+        cache_token(str(token), token)
+
+        assert get_cached_token(str(token)) is None
+
+
+@pytest.mark.django_db
+class TestTokenRevocation(TenantAPITestCase):
+    """
+    Test tenant-scoped token revocation (logout and refresh rotation)
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        clear_revocation_filters()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = TenantTokenObtainPairSerializer.get_token(self.user)
+        self.refresh = str(refresh)
+        self.access = str(refresh.access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_logout_revokes_access_and_refresh(self):
+        """Test that both tokens stop working after logout"""
+        response = self.client.post('/api/token/revoke/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = self.client.get('/api/items/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logout_with_expired_access_token(self):
+        """Test that an expired access token doesn't stop logout"""
+        expired = AccessToken(self.access)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {expired}')
+
+        response = self.client.post('/api/token/revoke/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_rotated_refresh_token_single_use(self):
+        """Test that a refresh token can't be exchanged twice"""
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['refresh'] != self.refresh
+
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unrevoked_token_skips_database(self):
+        """Test that the Bloom filter answers for tokens that were never revoked"""
+        self.client.get('/api/items/')  # builds the filter
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('authentication_revokedtoken' in q['sql'] for q in queries.captured_queries)
+
+    def test_revocation_by_other_worker_picked_up(self):
+        """Test that rows written elsewhere reach the filter on its next refresh"""
+        self.client.get('/api/items/')
+        RevokedToken.objects.create(
+            jti=AccessToken(self.access)['jti'], token_type='access',
+            expires_at=timezone.now() + timedelta(minutes=15),
+        )
+
+        with override_settings(TENANT_JWT_REVOCATION_REFRESH=-1):
+            response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestBufferedLastLogin(TenantAPITestCase):
+    """
+    Test write-behind last_login updates on token issuance
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.buffer = LastLoginBuffer(max_staleness=3600)
+        for patcher in (
+            mock.patch('apps.authentication.last_login.last_login_buffer', self.buffer),
+            mock.patch.object(LastLoginBuffer, '_ensure_thread'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.users = [
+            User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(3)
+        ]
+
+    def test_login_defers_update(self):
+        """Test that obtaining a token buffers last_login instead of writing it"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/token/', {'username': 'user0', 'password': 'testpass123'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(self.buffer) == 1
+        self.users[0].refresh_from_db()
+        assert self.users[0].last_login is None
+
+    def test_flush_updates_schema_in_one_statement(self):
+        """Test that pending logins of a schema are written with a single UPDATE"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in self.users:
+                self.client.post('/api/token/', {'username': user.username, 'password': 'testpass123'})
+
+        with CaptureQueriesContext(connection) as queries:
+            assert self.buffer.flush() == 3
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+        assert all(user.last_login is not None for user in User.objects.all())
+        assert len(self.buffer) == 0
+
+    def test_flush_never_moves_last_login_back(self):
+        """Test that a stale buffered timestamp doesn't overwrite a newer one"""
+        user = self.users[0]
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+
+        self.buffer.record(user.pk, user.last_login - timedelta(hours=1))
+        self.buffer.flush()
+
+        assert User.objects.get(pk=user.pk).last_login == user.last_login
+
+
+@pytest.mark.django_db
+class TestBoundedPasswordHashing(TenantAPITestCase):
+    """
+    Test login password verification on the bounded hashing pool
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_login_verified_on_pool(self):
+        """Test that logins hash on the pool and still authenticate"""
+        completed = password_hash_pool.completed
+
+        response = self.client.post('/api/token/', {'username': 'testuser', 'password': 'testpass123'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert password_hash_pool.completed == completed + 1
+
+    def test_wrong_password_rejected(self):
+        """Test that a wrong password still fails through the pool"""
+        response = self.client.post('/api/token/', {'username': 'testuser', 'password': 'wrong'})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_saturated_pool_returns_429(self):
+        """Test that logins fail fast with 429 when the pool is full"""
+        pool = BoundedExecutor(workers=1, queue_depth=0)
+        with mock.patch('apps.authentication.backends.password_hash_pool', pool), pool.reserve():
+            response = self.client.post('/api/token/', {'username': 'testuser', 'password': 'testpass123'})
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '1'
+        assert pool.rejected == 1
+
+    def test_host_slots_shared_between_processes(self):
+        """Test that with a slots path, a login held by another process saturates the pool"""
+        slots = tempfile.TemporaryDirectory()
+        self.addCleanup(slots.cleanup)
+        pool = BoundedExecutor(workers=1, queue_depth=0, slots_path=f'{slots.name}/hash')
+        context = multiprocessing.get_context('fork')
+        held, done = context.Event(), context.Event()
+
+        def hold():
+            with pool.reserve():
+                held.set()
+                done.wait(5)
+
+        process = context.Process(target=hold)
+        process.start()
+        try:
+            assert held.wait(5)
+            with mock.patch('apps.authentication.backends.password_hash_pool', pool):
+                response = self.client.post('/api/token/', {'username': 'testuser', 'password': 'testpass123'})
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        finally:
+            done.set()
+            process.join()
+
+        with mock.patch('apps.authentication.backends.password_hash_pool', pool):
+            response = self.client.post('/api/token/', {'username': 'testuser', 'password': 'testpass123'})
+        assert response.status_code == status.HTTP_200_OK
+        assert pool.stats['scope'] == 'host'
+        with pool.reserve(), pytest.raises(PoolSaturated):
+            with pool.reserve():
+                pass
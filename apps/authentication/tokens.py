@@ -0,0 +1,87 @@
+"""
+Access token validation shared by the JWT middleware and DRF authentication
+Each request's bearer token is decoded and verified at most once
+
+Verified tokens are also kept in a per-worker LRU keyed by (schema, sha256 of
+the raw token) until their own `exp`, so clients reusing the same access token
+skip HMAC verification and claim parsing on later requests.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.core.lru import LRUCache, MISSING
+
+# Attribute on the Django HttpRequest holding (raw token, validated token)
+REQUEST_TOKEN_ATTR = '_validated_jwt'
+
+# (schema, token digest) -> validated token, expiring at the token's exp claim
+verified_token_cache = LRUCache(maxsize=getattr(settings, 'TENANT_JWT_TOKEN_CACHE_MAXSIZE', 10000))
+
+
+def validate_access_token(raw_token):
+    """
+    Decode and verify an access token, reusing a cached verification if any
+    Raises TokenError if the token is invalid or expired
+    """
+    token = get_cached_token(raw_token)
+    if token is None:
+        token = AccessToken(raw_token)
+        cache_token(raw_token, token)
+    return token
+
+
+def get_cached_token(raw_token):
+    """Return the previously verified token for raw_token in this schema, or None"""
+    if not verified_token_cache.maxsize:
+        return None
+    token = verified_token_cache.get(_cache_key(raw_token))
+    return None if token is MISSING else token
+
+
+def cache_token(raw_token, token):
+    """Remember a verified token until its exp claim"""
+    if not verified_token_cache.maxsize:
+        return
+    ttl = token.get('exp', 0) - time.time()
+    if ttl > 0:
+        verified_token_cache.set(_cache_key(raw_token), token, ttl=ttl)
+
+
+def get_token_cache_stats():
+    """Hit/miss counters of the verified token cache for this worker"""
+    return verified_token_cache.stats
+
+
+def clear_token_cache():
+    verified_token_cache.clear()
+
+
+def store_request_token(request, raw_token, token):
+    """Remember the validated token for the rest of this request"""
+    setattr(request, REQUEST_TOKEN_ATTR, (_as_text(raw_token), token))
+
+
+def get_request_token(request, raw_token):
+    """Return the token already validated for this raw token, if any"""
+    stored = getattr(request, REQUEST_TOKEN_ATTR, None)
+    if stored is not None and stored[0] == _as_text(raw_token):
+        return stored[1]
+    return None
+
+
+def token_matches_tenant(token):
+    """Check the token's tenant claim against the active schema"""
+    return token.get('tenant') == connection.schema_name
+
+
+def _cache_key(raw_token):
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return connection.schema_name, hashlib.sha256(raw_token).digest()
+
+
+def _as_text(raw_token):
+    return raw_token.decode() if isinstance(raw_token, bytes) else raw_token
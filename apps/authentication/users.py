@@ -0,0 +1,88 @@
+"""
+Stateless request users built from access token claims
+
+In stateless mode (TENANT_JWT_STATELESS_USER) the request user is a User model
+instance populated from the token instead of a row loaded from auth_user.
+Fields the token doesn't carry are deferred and load lazily on first access,
+so views that only need id/username/email/is_staff run without a user query.
+Such a user can't be saved (StatelessUserSaveError, see apps.authentication.signals):
+its claims may be stale and is_active is assumed, so saving would overwrite the
+row; load the user from the database to change it.
+
+Revocation: whether a user is still active is cached per (schema, user id)
+and evicted on User save/delete in this process; TENANT_JWT_ACTIVE_CACHE_TTL
+bounds how long other workers may keep accepting a disabled user.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from rest_framework_simplejwt.settings import api_settings
+from apps.core.lru import LRUCache, MISSING
+
+# Claims copied onto the user instance (claim name -> model field)
+USER_CLAIMS = {
+    'username': 'username',
+    'email': 'email',
+    'is_staff': 'is_staff',
+    'date_joined': 'date_joined',
+}
+
+
+
+class StatelessUserSaveError(RuntimeError):
+    """Raised when a user built from token claims is saved"""
+
+
+active_user_cache = LRUCache(
+    maxsize=getattr(settings, 'TENANT_JWT_ACTIVE_CACHE_MAXSIZE', 100000),
+    ttl=getattr(settings, 'TENANT_JWT_ACTIVE_CACHE_TTL', 60),
+)
+
+
+def stateless_users_enabled():
+    return getattr(settings, 'TENANT_JWT_STATELESS_USER', False)
+
+
+def is_user_active(user_id):
+    """Cached is_active check for a user of the current tenant (missing users are inactive)"""
+    key = (connection.schema_name, user_id)
+    active = active_user_cache.get(key)
+    if active is MISSING:
+        User = get_user_model()
+        active = bool(
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('is_active', flat=True).first()
+        )
+        active_user_cache.set(key, active)
+    return active
+
+
+def forget_user(user_id):
+    """Drop the cached is_active flag for a user of the current tenant"""
+    active_user_cache.delete((connection.schema_name, user_id))
+
+
+def user_from_token(token):
+    """
+    Build a User instance from token claims without querying the database
+    Only claims present in the token are set; everything else is deferred
+    """
+    User = get_user_model()
+    values = {
+        api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM],
+        'is_active': True,
+    }
+    for claim, field in USER_CLAIMS.items():
+        if claim in token:
+            values[field] = token[claim]
+    if isinstance(values.get('date_joined'), str):
+        values['date_joined'] = datetime.fromisoformat(values['date_joined'])
+
+    # from_db expects values in concrete field order
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    user = User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+    user.token = token
+    user.stateless = True
+    return user
@@ -1,12 +1,60 @@
 """
 Authentication views
 """
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import TenantTokenObtainPairSerializer
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from apps.core.executor import PoolSaturated
+from .authentication import OptionalTenantJWTAuthentication
+from .serializers import TenantTokenObtainPairSerializer, TenantTokenRefreshSerializer, TokenRevokeSerializer
 
 
 class TenantTokenObtainPairView(TokenObtainPairView):
     """
     Custom token view that uses our tenant-aware serializer
+
+    Returns 429 when the password hashing pool is saturated
+    (see apps.authentication.backends)
     """
     serializer_class = TenantTokenObtainPairSerializer
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except PoolSaturated:
+            raise Throttled(
+                wait=getattr(settings, 'TENANT_LOGIN_RETRY_AFTER', 1),
+                detail='Too many logins in progress, try again shortly.',
+            )
+
+
+class TenantTokenRefreshView(TokenRefreshView):
+    """
+    Token refresh that rejects revoked refresh tokens and revokes rotated ones
+    """
+    serializer_class = TenantTokenRefreshSerializer
+
+
+class TokenRevokeView(GenericAPIView):
+    """
+    Logout endpoint: revoke a refresh token (and the access token in use)
+    Holding the refresh token is enough, so an expired access token can still log out
+    """
+    serializer_class = TokenRevokeSerializer
+    # A valid access token is picked up (and revoked); an invalid or expired one is ignored
+    authentication_classes = [OptionalTenantJWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
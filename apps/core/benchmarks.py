@@ -0,0 +1,75 @@
+"""
+Helpers shared by the bench_* management commands
+"""
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import CommandError
+
+
+def get_tenant(schema_name):
+    """Return the tenant for schema_name, or fail with a hint to create demo tenants"""
+    from apps.tenants.models import Client
+
+    tenant = Client.objects.filter(schema_name=schema_name).first()
+    if tenant is None:
+        raise CommandError(f'Tenant "{schema_name}" not found. Run: python manage.py setup_demo')
+    return tenant
+
+
+def get_tenant_domain(tenant):
+    domain = tenant.domains.order_by('-is_primary').first()
+    if domain is None:
+        raise CommandError(f'Tenant "{tenant.schema_name}" has no domain')
+    return domain.domain
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(samples, scale=1000):
+    """mean/p50/p99 of samples (seconds), scaled to milliseconds by default"""
+    return {
+        'mean': statistics.fmean(samples) * scale if samples else 0.0,
+        'p50': percentile(samples, 50) * scale,
+        'p99': percentile(samples, 99) * scale,
+    }
+
+
+def measure(func, iterations, clock=time.perf_counter, warmup=10):
+    """Call func repeatedly and return per-call durations according to clock"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = clock()
+        func()
+        samples.append(clock() - started)
+    return samples
+
+
+@contextmanager
+def quiet_logging(*names, level=logging.WARNING):
+    """Raise the level of the given loggers while measuring"""
+    loggers = [logging.getLogger(name) for name in names]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(level)
+    try:
+        yield
+    finally:
+        for logger, previous in zip(loggers, levels):
+            logger.setLevel(previous)
+
+
+def quiet_sql_logging():
+    """Silence per-query DEBUG logging (development settings) while measuring"""
+    return quiet_logging('django.db.backends')
@@ -0,0 +1,147 @@
+"""
+Bounded worker pool that rejects work instead of queueing without limit
+Shared building block, like apps.core.lru
+"""
+import fcntl
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class HostSlots:
+    """
+    A fixed number of slots shared by every process on the host
+
+    Slot i is the lock file "<path>.<i>" (put path on tmpfs, e.g. /dev/shm),
+    held with flock. Each acquire opens its own file description, so threads
+    of one process exclude each other too, and the kernel frees the slots of
+    a process that dies.
+    """
+
+    def __init__(self, path, count):
+        self.path = path
+        self.count = count
+
+    def try_acquire(self):
+        """A held slot (pass it to release()), or None when every slot is taken"""
+        for index in range(self.count):
+            slot = open(f'{self.path}.{index}', 'ab')
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                slot.close()
+                continue
+            return slot
+        return None
+
+    def acquire(self, poll_interval):
+        """Wait for a slot, polling"""
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            time.sleep(poll_interval)
+
+    @staticmethod
+    def release(slot):
+        fcntl.flock(slot, fcntl.LOCK_UN)
+        slot.close()
+
+
+class BoundedExecutor:
+    """
+    Thread pool with `workers` threads and at most `queue_depth` waiting callers
+
+    Callers reserve a slot first, so a saturated pool is detected before any
+    work (or database access) is done, then run() work on the pool:
+
+        with pool.reserve():   # raises PoolSaturated when full
+            result = pool.run(func, *args)
+
+    The limits are per process, unless slots_path is set: then they hold for
+    every process on the host sharing that path (HostSlots), which is what
+    bounds single-threaded workers such as gunicorn's sync ones. run() then
+    also waits for one of `workers` host-wide run slots.
+
+    The executor is created lazily per process, so the pool is fork-safe.
+    """
+    # Seconds between attempts at a host-wide run slot
+    poll_interval = 0.005
+
+    def __init__(self, workers=2, queue_depth=8, name='bounded', slots_path=None):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.name = name
+        self.slots_path = slots_path
+        if slots_path:
+            self._host_slots = HostSlots(slots_path, workers + queue_depth)
+            self._run_slots = HostSlots(f'{slots_path}.run', workers)
+        else:
+            self._host_slots = self._run_slots = None
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @contextmanager
+    def reserve(self):
+        if self._host_slots is not None:
+            slot = self._host_slots.try_acquire()
+            acquired = slot is not None
+        else:
+            slot, acquired = None, self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f'{self.name} pool is saturated')
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            if slot is not None:
+                HostSlots.release(slot)
+            else:
+                self._slots.release()
+
+    def run(self, func, *args, **kwargs):
+        """Run func on a pool thread and wait for its result"""
+        if self._run_slots is None:
+            return self._get_executor().submit(func, *args, **kwargs).result()
+        slot = self._run_slots.acquire(self.poll_interval)
+        try:
+            return self._get_executor().submit(func, *args, **kwargs).result()
+        finally:
+            HostSlots.release(slot)
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+                    self._pid = os.getpid()
+        return self._executor
+
+    @property
+    def stats(self):
+        """Counters for monitoring (saturation shows up as rejected)"""
+        return {
+            'scope': 'host' if self.slots_path else 'process',
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
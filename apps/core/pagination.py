@@ -0,0 +1,70 @@
+"""
+Paginator that uses the planner's row estimate instead of COUNT(*)
+Shared by the DRF page-number pagination and the Django admin
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using):
+    """
+    pg_class.reltuples for the model's table, resolved through the active
+    search_path (so the current tenant's copy); None if never analyzed
+    A partitioned table counts its analyzed partitions (autovacuum never
+    analyzes the parent itself)
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN c.relkind = %s THEN ('
+            '    SELECT sum(p.reltuples) FILTER (WHERE p.reltuples >= 0) FROM pg_inherits i'
+            '    JOIN pg_class p ON p.oid = i.inhrelid WHERE i.inhparent = c.oid'
+            ') ELSE c.reltuples END FROM pg_class c WHERE c.oid = to_regclass(%s)',
+            ['p', connections[using].ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def estimated_count(queryset, threshold=None):
+    """
+    Row count of queryset, estimated for large unfiltered tables
+
+    The exact COUNT(*) is used when the queryset is filtered, distinct or
+    sliced (the table estimate says nothing about those), when the table
+    was never analyzed, or when the estimate is below `threshold`
+    (TENANT_EXACT_COUNT_THRESHOLD), where counting is cheap anyway.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'TENANT_EXACT_COUNT_THRESHOLD', 10000)
+    query = queryset.query
+    if query.where or query.distinct or query.is_sliced:
+        return queryset.count()
+    estimate = estimated_row_count(queryset.model, queryset.db)
+    if estimate is None or estimate < threshold:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count comes from estimated_count()
+
+    With an estimate, num_pages is approximate: pages are sliced at full
+    size instead of being clipped to the count, so no rows are lost on the
+    last pages when the table grew since it was last analyzed.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return estimated_count(self.object_list)
+        return super().count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
@@ -0,0 +1,60 @@
+"""
+Single-flight: concurrent callers asking for the same key share one computation
+Shared building block for caches that must not stampede on a miss
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for a key into one (per process)
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and get the same result (or exception). Once it returns,
+    the next call for the key runs the function again.
+
+    Usage:
+        flights = SingleFlight()
+        value = flights.do(key, compute)
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def __len__(self):
+        return len(self._calls)
@@ -4,6 +4,7 @@ Base test classes for multi-tenant API testing
 This module provides base test classes that combine django-tenants
 with Django REST Framework for clean, scalable API testing.
 """
+from django.db import connection
 from django_tenants.test.cases import TenantTestCase
 from rest_framework.test import APIClient
 
@@ -43,3 +44,29 @@ class TenantAPITestCase(TenantTestCase):
         super()._fixture_setup()
         # Configure client to route requests to the test tenant domain
         self.client = self.client_class(SERVER_NAME=self.get_test_tenant_domain())
+
+
+class TenantTransactionAPITestCase(TenantAPITestCase):
+    """
+    TenantAPITestCase whose tests aren't wrapped in a transaction, so every
+    write commits on its own, as in production (e.g. for code that tells
+    transactions apart). The tenant schema's tables are emptied after each test.
+    """
+
+    @classmethod
+    def _databases_support_transactions(cls):
+        return False
+
+    def _fixture_teardown(self):
+        """
+        Empty the tenant's tables (TransactionTestCase would flush the public schema too)
+        """
+        quote = connection.ops.quote_name
+        schema = self.tenant.schema_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tablename FROM pg_tables WHERE schemaname = %s AND tablename <> 'django_migrations'",
+                [schema],
+            )
+            tables = ', '.join(f'{quote(schema)}.{quote(table)}' for table, in cursor.fetchall())
+            cursor.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
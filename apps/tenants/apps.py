@@ -5,3 +5,7 @@ class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tenants'
     label = 'tenants'
+
+    def ready(self):
+        # Register cache invalidation handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,202 @@
+"""
+Tenant-partitioned in-memory cache backend
+
+Like Django's LocMemCache (one store per process and LOCATION, shared by
+all threads), but entries live in a partition per tenant schema, picked
+from connection.schema_name on every call:
+- tenants can't read or overwrite each other's keys
+- each partition is its own LRU with a byte budget (TENANT_MAX_BYTES,
+  counting pickled values and keys), so a large tenant only ever evicts
+  its own entries
+- clear_tenant() invalidates a whole tenant in O(1): the partition moves
+  to a new generation with a fresh store instead of scanning keys
+- hits, misses and evictions are counted per tenant (tenant_stats())
+
+It is a LocMem backend in its own right, not a wrapper around another
+backend: entries are per worker process, like LocMemCache's. The item
+response cache (apps.api.cache) keeps its per-worker entries in one.
+
+Usage (settings.CACHES):
+    'tenant': {
+        'BACKEND': 'apps.tenants.cache.TenantLocMemCache',
+        'LOCATION': 'tenant',
+        'OPTIONS': {'TENANT_MAX_BYTES': 8 * 1024 * 1024},
+    }
+"""
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import connection
+
+DEFAULT_TENANT_MAX_BYTES = 8 * 1024 * 1024
+
+# Per-process stores, keyed by LOCATION like LocMemCache's
+_partitions = {}
+_locks = {}
+
+
+class TenantPartition:
+    """One tenant's entries (key -> (pickled value, expiry)) in LRU order, oldest first"""
+
+    def __init__(self, generation=0):
+        self.generation = generation
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry_size(key, entry[0])
+        return True
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'generation': self.generation,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def entry_size(key, pickled):
+    return len(key) + len(pickled)
+
+
+class TenantLocMemCache(BaseCache):
+    """
+    Thread-safe in-process cache partitioned and budgeted per tenant schema
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS') or {}
+        self.max_bytes = int(options.get('TENANT_MAX_BYTES', DEFAULT_TENANT_MAX_BYTES))
+        self._partitions = _partitions.setdefault(name, {})
+        self._lock = _locks.setdefault(name, Lock())
+
+    def _partition(self, schema_name=None):
+        """The partition of schema_name (default: the active tenant); call with the lock held"""
+        schema_name = schema_name or connection.schema_name
+        partition = self._partitions.get(schema_name)
+        if partition is None:
+            partition = self._partitions[schema_name] = TenantPartition()
+        return partition
+
+    def _live_entry(self, partition, key):
+        """The unexpired entry for key, dropping it if expired"""
+        entry = partition.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            partition.remove(key)
+            return None
+        return entry
+
+    def _set(self, partition, key, pickled, timeout):
+        return self._store(partition, key, pickled, self.get_backend_timeout(timeout))
+
+    def _store(self, partition, key, pickled, expires_at):
+        """Insert as most recently used, then evict the tenant's oldest entries down to its budget"""
+        partition.remove(key)
+        size = entry_size(key, pickled)
+        if size > self.max_bytes:
+            return False
+        partition.entries[key] = (pickled, expires_at)
+        partition.bytes += size
+        while partition.bytes > self.max_bytes:
+            oldest, (oldest_pickled, _) = partition.entries.popitem(last=False)
+            partition.bytes -= entry_size(oldest, oldest_pickled)
+            partition.evictions += 1
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._lock:
+            partition = self._partition()
+            if self._live_entry(partition, key) is not None:
+                return False
+            return self._set(partition, key, pickled, timeout)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            partition = self._partition()
+            entry = self._live_entry(partition, key)
+            if entry is None:
+                partition.misses += 1
+                return default
+            partition.hits += 1
+            partition.entries.move_to_end(key)
+        return pickle.loads(entry[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._lock:
+            self._set(self._partition(), key, pickled, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            partition = self._partition()
+            entry = self._live_entry(partition, key)
+            if entry is None:
+                return False
+            partition.entries[key] = (entry[0], self.get_backend_timeout(timeout))
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            partition = self._partition()
+            entry = self._live_entry(partition, key)
+            if entry is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(entry[0]) + delta
+            self._store(partition, key, pickle.dumps(new_value, self.pickle_protocol), entry[1])
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._live_entry(self._partition(), key) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._partition().remove(key)
+
+    def clear_tenant(self, schema_name=None):
+        """Invalidate every entry of a tenant (default: the active one) in O(1); returns the new generation"""
+        with self._lock:
+            old = self._partition(schema_name)
+            new = TenantPartition(generation=old.generation + 1)
+            new.hits, new.misses, new.evictions = old.hits, old.misses, old.evictions
+            self._partitions[schema_name or connection.schema_name] = new
+        return new.generation
+
+    def clear(self):
+        """Invalidate every tenant"""
+        with self._lock:
+            schema_names = list(self._partitions)
+        for schema_name in schema_names:
+            self.clear_tenant(schema_name)
+
+    def tenant_stats(self, schema_name=None):
+        """Counters and usage of a tenant (default: the active one), or of every tenant with schema_name='*'"""
+        with self._lock:
+            if schema_name == '*':
+                return {name: partition.stats for name, partition in self._partitions.items()}
+            return self._partition(schema_name).stats
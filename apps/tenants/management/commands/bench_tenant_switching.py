@@ -0,0 +1,112 @@
+"""
+Management command to benchmark tenant switching over a small connection pool
+Usage: python manage.py bench_tenant_switching --connections 1 2 4 8 --clients 32 --duration 5
+
+Simulates many clients sharing a few server connections (as with PgBouncer):
+each client borrows a connection, switches to a random tenant, runs a query
+and returns the connection. Compares 'session' and 'transaction' search_path modes.
+"""
+import queue
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+from apps.tenants.models import Client
+from apps.tenants.postgresql_backend.base import DatabaseWrapper, SEARCH_PATH_MODES
+
+
+class Command(BaseCommand):
+    help = 'Benchmark tenant query throughput vs. connection count for each search_path mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connections',
+            type=int,
+            nargs='+',
+            default=[1, 2, 4, 8],
+            help='Pool sizes to test (default: 1 2 4 8)'
+        )
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=32,
+            help='Concurrent client threads (default: 32)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5.0,
+            help='Seconds per run (default: 5)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=SEARCH_PATH_MODES + ('both',),
+            default='both',
+            help='search_path mode to test (default: both)'
+        )
+
+    def handle(self, *args, **options):
+        schemas = list(
+            Client.objects.exclude(schema_name=get_public_schema_name())
+            .values_list('schema_name', flat=True)
+        )
+        if not schemas:
+            raise CommandError('No tenants found. Run: python manage.py setup_demo')
+
+        modes = SEARCH_PATH_MODES if options['mode'] == 'both' else (options['mode'],)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Tenant switching: {len(schemas)} tenants, {options["clients"]} clients, '
+            f'{options["duration"]}s per run\n'
+        ))
+        self.stdout.write(f'{"mode":<12}{"connections":>12}{"queries/s":>12}{"p99 ms":>10}{"SETs":>10}')
+
+        for mode in modes:
+            for pool_size in options['connections']:
+                throughput, p99, switches = self.run(mode, pool_size, options['clients'],
+                                                     options['duration'], schemas)
+                self.stdout.write(f'{mode:<12}{pool_size:>12}{throughput:>12.0f}{p99:>10.2f}{switches:>10}')
+
+    def run(self, mode, pool_size, clients, duration, schemas):
+        pool = queue.Queue()
+        connections = []
+        for index in range(pool_size):
+            conn = DatabaseWrapper({**connection.settings_dict, 'SEARCH_PATH_MODE': mode},
+                                   alias=f'bench_{index}')
+            conn.inc_thread_sharing()
+            connections.append(conn)
+            pool.put(conn)
+
+        latencies = [[] for _ in range(clients)]
+        deadline = time.monotonic() + duration
+
+        def client(index):
+            rng = random.Random(index)
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                conn = pool.get()
+                try:
+                    conn.set_schema(rng.choice(schemas))
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT count(*) FROM auth_user')
+                        cursor.fetchone()
+                finally:
+                    pool.put(conn)
+                latencies[index].append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        switches = sum(conn.search_path_switches_issued for conn in connections)
+        for conn in connections:
+            conn.close()
+
+        samples = sorted(latency for per_client in latencies for latency in per_client)
+        p99 = samples[int(len(samples) * 0.99) - 1] * 1000 if samples else 0.0
+        return len(samples) / duration, p99, switches
@@ -0,0 +1,58 @@
+"""
+Tenant resolution middleware with an in-process hostname cache
+Avoids the Domain/Client lookup in the public schema on every request
+"""
+from django.conf import settings
+from django_tenants.middleware.main import TenantMainMiddleware
+from apps.core.lru import LRUCache, MISSING
+from .routing import get_routing_table, tenant_from_route
+
+# hostname -> Client instance, or None for hosts with no tenant (negative cache)
+tenant_cache = LRUCache(
+    maxsize=getattr(settings, 'TENANT_CACHE_MAXSIZE', 10000),
+    ttl=getattr(settings, 'TENANT_CACHE_TTL', 300),
+)
+
+
+def get_tenant_cache_stats():
+    """Hit/miss counters of the tenant resolution cache for this worker"""
+    return tenant_cache.stats
+
+
+def clear_tenant_cache():
+    tenant_cache.clear()
+
+
+class CachedTenantMainMiddleware(TenantMainMiddleware):
+    """
+    Drop-in replacement for TenantMainMiddleware that caches tenant lookups by hostname
+
+    - Bounded LRU with TTL (TENANT_CACHE_MAXSIZE / TENANT_CACHE_TTL)
+    - Unmapped hosts are negative-cached when SHOW_PUBLIC_IF_NO_TENANT_FOUND is on
+    - Invalidated by Client/Domain post_save/post_delete (see apps.tenants.signals)
+
+    When TENANT_ROUTING_TABLE_PATH is set, the shared memory-mapped routing table
+    (apps.tenants.routing) is used instead, so all workers share one view of it.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        routing_table = get_routing_table()
+        if routing_table is not None:
+            route = routing_table.lookup(hostname)
+            if route is None:
+                raise domain_model.DoesNotExist(f'No tenant for hostname "{hostname}"')
+            return tenant_from_route(route)
+
+        tenant = tenant_cache.get(hostname)
+        if tenant is MISSING:
+            try:
+                tenant = super().get_tenant(domain_model, hostname)
+            except domain_model.DoesNotExist:
+                if getattr(settings, 'SHOW_PUBLIC_IF_NO_TENANT_FOUND', False):
+                    tenant_cache.set(hostname, None)
+                raise
+            tenant_cache.set(hostname, tenant)
+
+        if tenant is None:
+            raise domain_model.DoesNotExist(f'No tenant for hostname "{hostname}"')
+        return tenant
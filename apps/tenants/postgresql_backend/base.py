@@ -0,0 +1,223 @@
+"""
+Tenant-aware PostgreSQL backend that only switches search_path when it changes
+
+django-tenants forgets the applied search_path on every set_tenant() call, so a
+persistent connection re-issues `SET search_path` on each request even when it
+already points at the right schema. This backend remembers what the server
+session actually has and skips the round trip when nothing changed.
+
+Behind PgBouncer in transaction pooling mode a session-level SET would leak to
+whichever client gets the server connection next. With SEARCH_PATH_MODE set to
+'transaction' the backend never touches the session: the tenant search_path is
+applied with `SET LOCAL` at the start of each transaction, and statements run
+in autocommit against a tenant schema are wrapped in their own transaction.
+
+Usage (settings.DATABASES):
+    'ENGINE': 'apps.tenants.postgresql_backend'
+    'SEARCH_PATH_MODE': 'session' (default) or 'transaction'
+"""
+from contextlib import contextmanager
+
+import django.db.utils
+from django.db.backends.utils import CursorWrapper
+from django.core.exceptions import ImproperlyConfigured
+from django_tenants.postgresql_backend import base as tenant_backend
+from django_tenants.utils import get_public_schema_name
+
+original_backend = tenant_backend.original_backend
+
+SESSION = 'session'
+TRANSACTION = 'transaction'
+SEARCH_PATH_MODES = (SESSION, TRANSACTION)
+
+
+class TransactionSearchPathCursorMixin:
+    """
+    Applies the tenant search_path to the current transaction before each statement
+    Used only in 'transaction' mode
+    """
+
+    def execute(self, sql, params=None):
+        with self.db.transaction_search_path():
+            return super().execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        with self.db.transaction_search_path():
+            return super().executemany(sql, param_list)
+
+    def copy_expert(self, sql, file, *args):
+        with self.db.transaction_search_path():
+            return self.cursor.copy_expert(sql, file, *args)
+
+
+class TransactionSearchPathCursorWrapper(TransactionSearchPathCursorMixin, CursorWrapper):
+    pass
+
+
+class TransactionSearchPathCursorDebugWrapper(TransactionSearchPathCursorMixin,
+                                              original_backend.CursorDebugWrapper):
+    def copy_expert(self, sql, file, *args):
+        with self.db.transaction_search_path():
+            return original_backend.CursorDebugWrapper.copy_expert(self, sql, file, *args)
+
+
+class DatabaseWrapper(tenant_backend.DatabaseWrapper):
+    """
+    Tracks the session search_path and counts issued vs. skipped switches
+
+    The tracked value is dropped whenever the server may have reverted it:
+    reconnects, closes, and (savepoint) rollbacks of a transaction that set it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.applied_search_path = None
+        self.local_search_path = None
+        self.search_path_switches_issued = 0
+        self.search_path_switches_skipped = 0
+        super().__init__(*args, **kwargs)
+
+        self.search_path_mode = self.settings_dict.get('SEARCH_PATH_MODE') or SESSION
+        if self.search_path_mode not in SEARCH_PATH_MODES:
+            raise ImproperlyConfigured(
+                f"SEARCH_PATH_MODE must be one of {SEARCH_PATH_MODES}, got {self.search_path_mode!r}"
+            )
+
+    @property
+    def search_path_stats(self):
+        """Issued vs. skipped `SET search_path` counters for this connection"""
+        return {
+            'issued': self.search_path_switches_issued,
+            'skipped': self.search_path_switches_skipped,
+        }
+
+    def connect(self):
+        self.applied_search_path = None
+        self.local_search_path = None
+        super().connect()
+
+    def close(self):
+        self.applied_search_path = None
+        self.local_search_path = None
+        super().close()
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self.local_search_path = None
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self.applied_search_path = None
+            self.local_search_path = None
+
+    def _savepoint_rollback(self, sid):
+        # Reset afterwards: issuing the rollback itself may open a cursor and set the path
+        try:
+            super()._savepoint_rollback(sid)
+        finally:
+            self.applied_search_path = None
+            self.local_search_path = None
+
+    def make_cursor(self, cursor):
+        if self.search_path_mode == TRANSACTION:
+            return TransactionSearchPathCursorWrapper(cursor, self)
+        return super().make_cursor(cursor)
+
+    def make_debug_cursor(self, cursor):
+        if self.search_path_mode == TRANSACTION:
+            return TransactionSearchPathCursorDebugWrapper(cursor, self)
+        return super().make_debug_cursor(cursor)
+
+    def _cursor(self, name=None):
+        # Skip django-tenants' unconditional SET and go straight to the original backend
+        cursor = original_backend.DatabaseWrapper._cursor(self, name=name)
+
+        if not self.schema_name:
+            raise ImproperlyConfigured("Database schema not set. Did you forget "
+                                       "to call set_schema() or set_tenant()?")
+
+        if self.search_path_mode == TRANSACTION:
+            # Applied per transaction by the cursor wrapper instead
+            return cursor
+
+        search_paths = self._get_cursor_search_paths()
+        if search_paths == self.applied_search_path:
+            self.search_path_switches_skipped += 1
+            self.search_path_set_schemas = search_paths
+            return cursor
+
+        self._set_search_path(cursor, search_paths, named=bool(name))
+        return cursor
+
+    def _set_search_path(self, cursor, search_paths, named=False):
+        if named or tenant_backend.is_psycopg3:
+            # Named cursors can only run one statement
+            cursor_for_search_path = self.connection.cursor()
+        else:
+            cursor_for_search_path = cursor
+
+        # As in django-tenants: if the transaction is already aborted, ignore the
+        # error and let the next statement (or the rollback) deal with it
+        try:
+            formatted_search_paths = ["'{}'".format(s) for s in search_paths]
+            cursor_for_search_path.execute('SET search_path = {0}'.format(','.join(formatted_search_paths)))
+        except (django.db.utils.DatabaseError, tenant_backend.psycopg.InternalError):
+            self.applied_search_path = None
+            self.search_path_set_schemas = None
+        else:
+            self.applied_search_path = search_paths
+            self.search_path_set_schemas = search_paths
+            self.search_path_switches_issued += 1
+        finally:
+            if cursor_for_search_path is not cursor:
+                cursor_for_search_path.close()
+
+    # Transaction mode
+
+    @contextmanager
+    def transaction_search_path(self):
+        """
+        Make sure the statement about to run sees the tenant search_path
+
+        Inside a transaction: `SET LOCAL` once per transaction (and again after a
+        savepoint rollback or a tenant switch). In autocommit: public-schema
+        statements run as-is against the server default; tenant statements are
+        wrapped in a short transaction of their own.
+        """
+        if not self.get_autocommit():
+            self._set_local_search_path()
+            yield
+        elif self.schema_name == get_public_schema_name() and not tenant_backend.EXTRA_SEARCH_PATHS:
+            yield
+        else:
+            self.set_autocommit(False)
+            try:
+                self._set_local_search_path()
+                yield
+            except BaseException:
+                self.rollback()
+                raise
+            else:
+                self.commit()
+            finally:
+                self.set_autocommit(True)
+
+    def _set_local_search_path(self):
+        search_paths = self._get_cursor_search_paths()
+        if search_paths == self.local_search_path:
+            self.search_path_switches_skipped += 1
+            return
+
+        formatted_search_paths = ["'{}'".format(s) for s in search_paths]
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute('SET LOCAL search_path = {0}'.format(','.join(formatted_search_paths)))
+        except tenant_backend.psycopg.Error:
+            # Aborted transaction: the statement itself will fail and trigger the rollback
+            self.local_search_path = None
+        else:
+            self.local_search_path = search_paths
+            self.search_path_switches_issued += 1
@@ -0,0 +1,236 @@
+"""
+Shared hostname -> tenant routing table for multi-worker deployments
+
+The table is a compact binary file memory-mapped by every worker on the host,
+so it is built once instead of once per gunicorn worker. A separate 8-byte
+generation file is also memory-mapped; writers bump it after publishing a new
+table and readers compare it on every lookup (a memory read, no syscall).
+
+File layout (little-endian):
+    header   magic, format version, generation, built_at, entry count, strings offset
+    records  fixed-size, sorted by hostname bytes (binary searched in place)
+    strings  hostname and schema_name bytes referenced by the records
+"""
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+HEADER = struct.Struct('<4sIQdII')
+RECORD = struct.Struct('<IHIHQH')
+GENERATION = struct.Struct('<Q')
+MAGIC = b'TRT1'
+FORMAT_VERSION = 1
+
+FLAG_PRIMARY = 0x1
+FLAG_ON_TRIAL = 0x2
+
+Route = namedtuple('Route', ['schema_name', 'tenant_id', 'flags'])
+# One loaded table; replaced as a whole so readers never mix two tables
+Snapshot = namedtuple('Snapshot', ['table', 'count', 'built_at', 'generation'])
+
+
+def tenant_from_route(route):
+    """
+    Build a tenant instance from a route without touching the database
+    Fields not stored in the table are deferred and load lazily on access
+    """
+    from django_tenants.utils import get_tenant_model
+
+    return get_tenant_model().from_db(
+        DEFAULT_DB_ALIAS, ['id', 'schema_name', 'on_trial'],
+        [route.tenant_id, route.schema_name, bool(route.flags & FLAG_ON_TRIAL)],
+    )
+
+
+def load_routes():
+    """
+    Read every domain with its tenant from the public schema
+    Returns (hostname, schema_name, tenant_id, flags) tuples
+    """
+    from django_tenants.utils import schema_context, get_public_schema_name
+    from .models import Domain
+
+    with schema_context(get_public_schema_name()):
+        rows = Domain.objects.values_list(
+            'domain', 'tenant__schema_name', 'tenant_id', 'is_primary', 'tenant__on_trial'
+        )
+        return [
+            (domain, schema_name, tenant_id,
+             (FLAG_PRIMARY if is_primary else 0) | (FLAG_ON_TRIAL if on_trial else 0))
+            for domain, schema_name, tenant_id, is_primary, on_trial in rows
+        ]
+
+
+def pack_routes(routes, generation):
+    """Serialize routes into the on-disk table format"""
+    encoded = sorted(
+        (host.encode(), schema.encode(), tenant_id, flags)
+        for host, schema, tenant_id, flags in routes
+    )
+    strings_offset = HEADER.size + RECORD.size * len(encoded)
+    records = bytearray()
+    strings = bytearray()
+    for host, schema, tenant_id, flags in encoded:
+        host_offset = strings_offset + len(strings)
+        strings += host
+        schema_offset = strings_offset + len(strings)
+        strings += schema
+        records += RECORD.pack(host_offset, len(host), schema_offset, len(schema), tenant_id, flags)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, generation, time.time(), len(encoded), strings_offset)
+    return header + bytes(records) + bytes(strings)
+
+
+class SharedRoutingTable:
+    """
+    Reader/writer for the memory-mapped routing table at `path`
+
+    Readers call lookup(); writers call rebuild() after provisioning changes.
+    Tables older than `max_age` seconds are rebuilt in a background thread by
+    the first worker that notices (requests keep using the current table),
+    which covers changes made on other hosts.
+
+    Each load publishes a new Snapshot in one assignment and lookups only
+    read the snapshot they started with. Replaced maps are never closed
+    explicitly: a concurrent lookup may still hold one, and it is unmapped
+    once garbage collected.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.generation_path = f'{path}.gen'
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._generation_map = None
+        self._snapshot = None
+        self._refresh_thread = None
+
+    # Reading
+
+    def lookup(self, hostname):
+        """Return the Route for hostname, or None if it isn't mapped"""
+        snapshot = self._current_snapshot()
+        table = snapshot.table
+        key = hostname.encode()
+        low, high = 0, snapshot.count
+        while low < high:
+            middle = (low + high) // 2
+            host_offset, host_len, schema_offset, schema_len, tenant_id, flags = RECORD.unpack_from(
+                table, HEADER.size + middle * RECORD.size
+            )
+            candidate = table[host_offset:host_offset + host_len]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                schema_name = table[schema_offset:schema_offset + schema_len].decode()
+                return Route(schema_name, tenant_id, flags)
+        return None
+
+    @property
+    def generation(self):
+        return GENERATION.unpack_from(self._open_generation())[0]
+
+    def _current_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or self.generation != snapshot.generation:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or self.generation != snapshot.generation:
+                    snapshot = self._snapshot = self._load()
+        if self.max_age is not None and time.time() - snapshot.built_at > self.max_age:
+            self._refresh_in_background()
+        return snapshot
+
+    def _refresh_in_background(self):
+        """Rebuild a stale table off the request thread; the new generation is picked up when published"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh, name='routing-refresh', daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh(self):
+        try:
+            self.rebuild(blocking=False)
+        finally:
+            # This thread's database connection
+            connections.close_all()
+
+    def _load(self):
+        """Map the published table; returns its Snapshot"""
+        generation = self.generation
+        if not os.path.exists(self.path):
+            self.rebuild()
+            generation = self.generation
+        with open(self.path, 'rb') as table_file:
+            table = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, built_at, count, _ = HEADER.unpack_from(table)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            table.close()
+            raise ValueError(f'{self.path} is not a routing table (format {version})')
+        return Snapshot(table, count, built_at, generation)
+
+    def _open_generation(self):
+        if self._generation_map is None:
+            fd = os.open(self.generation_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < GENERATION.size:
+                    os.ftruncate(fd, GENERATION.size)
+                self._generation_map = mmap.mmap(fd, GENERATION.size)
+            finally:
+                os.close(fd)
+        return self._generation_map
+
+    # Writing
+
+    def rebuild(self, routes=None, blocking=True):
+        """
+        Publish a fresh table and bump the generation counter
+        Returns False if another process holds the writer lock and blocking is off
+        """
+        generation_map = self._open_generation()
+        with open(self.generation_path, 'rb') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            try:
+                if routes is None:
+                    routes = load_routes()
+                generation = GENERATION.unpack_from(generation_map)[0] + 1
+                directory = os.path.dirname(os.path.abspath(self.path))
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.routing-')
+                with os.fdopen(fd, 'wb') as tmp_file:
+                    tmp_file.write(pack_routes(routes, generation))
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+                GENERATION.pack_into(generation_map, 0, generation)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return True
+
+
+_tables = {}
+
+
+def get_routing_table():
+    """Return the process-wide routing table, or None if TENANT_ROUTING_TABLE_PATH is unset"""
+    path = getattr(settings, 'TENANT_ROUTING_TABLE_PATH', None)
+    if not path:
+        return None
+    table = _tables.get(path)
+    if table is None:
+        table = _tables.setdefault(path, SharedRoutingTable(
+            path, max_age=getattr(settings, 'TENANT_ROUTING_TABLE_MAX_AGE', None)
+        ))
+    return table
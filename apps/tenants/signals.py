@@ -0,0 +1,27 @@
+"""
+Signal handlers keeping tenant routing caches in sync with Client/Domain changes
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Client, Domain
+from .middleware import clear_tenant_cache
+from .routing import get_routing_table
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Domain)
+def invalidate_tenant_routing(sender, **kwargs):
+    """
+    Any tenant/domain change drops the whole hostname cache
+    Provisioning is rare, and a domain rename or a new domain for a
+    negative-cached host can't be handled with a single-key delete
+
+    The shared routing table is republished once the change is committed;
+    workers pick up the new generation on their next lookup.
+    """
+    clear_tenant_cache()
+
+    routing_table = get_routing_table()
+    if routing_table is not None:
+        transaction.on_commit(routing_table.rebuild)
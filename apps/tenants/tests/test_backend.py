@@ -0,0 +1,168 @@
+"""
+Tests for search_path tracking in the tenant database backend
+"""
+import unittest
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from apps.core.tests import TenantAPITestCase
+from apps.tenants.postgresql_backend.base import DatabaseWrapper
+
+User = get_user_model()
+
+
+def search_path_queries(context):
+    return [q for q in context.captured_queries if q['sql'].startswith('SET search_path')]
+
+
+@pytest.mark.django_db
+@unittest.skipIf(settings.DATABASES['default'].get('SEARCH_PATH_MODE') == 'transaction',
+                 'session-level search_path tracking only applies in session mode')
+class TestSearchPathTracking(TenantAPITestCase):
+    """
+    Test that SET search_path is only sent when the effective schema changes
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_same_tenant_skips_switch(self):
+        """Test that re-selecting the current tenant sends no SET"""
+        User.objects.count()
+        skipped = connection.search_path_switches_skipped
+
+        with CaptureQueriesContext(connection) as context:
+            connection.set_tenant(self.tenant)
+            User.objects.count()
+
+        assert search_path_queries(context) == []
+        assert connection.search_path_switches_skipped == skipped + 1
+
+    def test_schema_change_issues_switch(self):
+        """Test that bouncing to public and back sends a SET each time"""
+        User.objects.count()
+        issued = connection.search_path_switches_issued
+
+        with CaptureQueriesContext(connection) as context:
+            connection.set_schema_to_public()
+            User.objects.count()
+            connection.set_tenant(self.tenant)
+            User.objects.count()
+
+        assert len(search_path_queries(context)) == 2
+        assert connection.search_path_switches_issued == issued + 2
+
+    def test_rollback_forgets_applied_path(self):
+        """Test that a switch undone by a rollback is re-issued"""
+        connection.set_schema_to_public()
+        User.objects.count()
+        try:
+            with transaction.atomic():
+                connection.set_tenant(self.tenant)
+                User.objects.count()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW search_path')
+            assert cursor.fetchone()[0] == f'{self.tenant.schema_name}, public'
+
+    def test_repeated_requests_reuse_search_path(self):
+        """Test that consecutive requests for one tenant don't switch again"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/items/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/items/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert search_path_queries(context) == []
+
+
+@pytest.mark.django_db
+class TestTransactionSearchPathMode(TenantAPITestCase):
+    """
+    Test that 'transaction' mode never leaves a tenant search_path on the session
+
+    A single extra connection stands in for one PgBouncer server connection
+    that is handed to different tenants' transactions in turn.
+    """
+
+    def setUp(self):
+        """Set up two tenant-like schemas on a separate pooled connection"""
+        super().setUp()
+        self.pooled = self.make_connection('transaction')
+        with self.pooled.cursor() as cursor:
+            for name in ('a', 'b'):
+                cursor.execute(f'CREATE SCHEMA pool_{name}')
+                cursor.execute(f'CREATE TABLE pool_{name}.marker (name text)')
+                cursor.execute(f"INSERT INTO pool_{name}.marker VALUES ('{name}')")
+
+    def tearDown(self):
+        self.pooled.set_schema_to_public()
+        with self.pooled.cursor() as cursor:
+            cursor.execute('DROP SCHEMA pool_a, pool_b CASCADE')
+        self.pooled.close()
+        super().tearDown()
+
+    @staticmethod
+    def make_connection(mode):
+        return DatabaseWrapper({**connection.settings_dict, 'SEARCH_PATH_MODE': mode}, alias='pooled')
+
+    @staticmethod
+    def read_marker(conn, schema_name):
+        conn.set_schema(schema_name)
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT name FROM marker')
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def session_search_path(conn):
+        """search_path the next pooled client would inherit (raw, outside any transaction)"""
+        with conn.connection.cursor() as cursor:
+            cursor.execute('SHOW search_path')
+            return cursor.fetchone()[0]
+
+    def test_autocommit_statements_do_not_leak(self):
+        """Test that autocommit tenant queries are scoped to their own transaction"""
+        assert self.read_marker(self.pooled, 'pool_a') == 'a'
+        assert 'pool_a' not in self.session_search_path(self.pooled)
+
+        assert self.read_marker(self.pooled, 'pool_b') == 'b'
+        assert 'pool_b' not in self.session_search_path(self.pooled)
+
+    def test_interleaved_tenant_transactions(self):
+        """Test alternating tenants' transactions on one server connection"""
+        self.pooled.set_autocommit(False)
+        assert self.read_marker(self.pooled, 'pool_a') == 'a'
+        assert self.read_marker(self.pooled, 'pool_b') == 'b'
+        assert self.read_marker(self.pooled, 'pool_a') == 'a'
+        self.pooled.commit()
+        self.pooled.set_autocommit(True)
+        assert 'pool_a' not in self.session_search_path(self.pooled)
+
+        self.pooled.set_autocommit(False)
+        assert self.read_marker(self.pooled, 'pool_b') == 'b'
+        self.pooled.rollback()
+        self.pooled.set_autocommit(True)
+        assert 'pool_b' not in self.session_search_path(self.pooled)
+
+        self.pooled.set_schema_to_public()
+        with self.pooled.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('marker')")
+            assert cursor.fetchone()[0] is None
+
+    def test_session_mode_leaks_search_path(self):
+        """Test the failure mode transaction mode exists for"""
+        session_connection = self.make_connection('session')
+        try:
+            assert self.read_marker(session_connection, 'pool_a') == 'a'
+            assert 'pool_a' in self.session_search_path(session_connection)
+        finally:
+            session_connection.close()
@@ -0,0 +1,87 @@
+"""
+Tests for the tenant-partitioned cache backend
+"""
+import pytest
+from django_tenants.utils import schema_context
+from apps.core.tests import TenantAPITestCase
+from apps.tenants.cache import TenantLocMemCache
+
+
+@pytest.mark.django_db
+class TestTenantLocMemCache(TenantAPITestCase):
+    """
+    Test namespacing, per-tenant budgets, generation clears and stats
+    """
+
+    def setUp(self):
+        """Set up a private cache with room for about three 1 KB entries per tenant"""
+        super().setUp()
+        self.cache = TenantLocMemCache(f'test-{id(self)}', {'OPTIONS': {'TENANT_MAX_BYTES': 3500}})
+
+    def test_keys_namespaced_by_schema(self):
+        """Test that tenants using the same key don't see each other's values"""
+        with schema_context('tenant_a'):
+            self.cache.set('settings', 'a')
+        with schema_context('tenant_b'):
+            assert self.cache.get('settings') is None
+            self.cache.set('settings', 'b')
+        with schema_context('tenant_a'):
+            assert self.cache.get('settings') == 'a'
+
+    def test_budget_evicts_only_own_entries(self):
+        """Test that a tenant over budget evicts its own least recently used entries"""
+        with schema_context('quiet'):
+            self.cache.set('hot', 'x' * 1000)
+        with schema_context('noisy'):
+            for i in range(10):
+                self.cache.set(f'key{i}', 'x' * 1000)
+            self.cache.get('key7')
+            self.cache.set('key10', 'x' * 1000)
+
+            assert self.cache.get('key7') is not None
+            assert self.cache.get('key8') is None
+            assert self.cache.get('key10') is not None
+            stats = self.cache.tenant_stats()
+            assert stats['bytes'] <= 3500
+            assert stats['evictions'] == 8
+
+        with schema_context('quiet'):
+            assert self.cache.get('hot') is not None
+            assert self.cache.tenant_stats()['evictions'] == 0
+
+    def test_oversized_value_not_stored(self):
+        """Test that a value larger than the whole budget is refused"""
+        with schema_context('tenant_a'):
+            assert self.cache.add('big', 'x' * 5000) is False
+            assert self.cache.get('big') is None
+
+    def test_clear_tenant_bumps_generation(self):
+        """Test O(1) invalidation of one tenant"""
+        with schema_context('tenant_b'):
+            self.cache.set('key', 'b')
+        with schema_context('tenant_a'):
+            self.cache.set('key', 'a')
+            self.cache.get('key')
+
+            assert self.cache.clear_tenant() == 1
+            assert self.cache.get('key') is None
+            stats = self.cache.tenant_stats()
+            assert (stats['generation'], stats['entries'], stats['bytes']) == (1, 0, 0)
+            assert (stats['hits'], stats['misses']) == (1, 1)
+        with schema_context('tenant_b'):
+            assert self.cache.get('key') == 'b'
+
+    def test_standard_cache_api(self):
+        """Test add/incr/touch/delete/expiry and all-tenant stats"""
+        with schema_context('tenant_a'):
+            assert self.cache.add('counter', 1)
+            assert not self.cache.add('counter', 5)
+            assert self.cache.incr('counter', 2) == 3
+            assert self.cache.touch('counter', 60)
+            assert self.cache.has_key('counter')
+            assert self.cache.delete('counter')
+            assert not self.cache.has_key('counter')
+            self.cache.set('expired', 1, timeout=-1)
+            assert self.cache.get('expired', 'gone') == 'gone'
+
+        assert set(self.cache.tenant_stats('*')) == {'tenant_a'}
@@ -0,0 +1,75 @@
+"""
+Tests for the cached tenant resolution middleware
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from apps.core.tests import TenantAPITestCase
+from apps.tenants.middleware import tenant_cache
+from apps.tenants.models import Domain
+
+User = get_user_model()
+
+
+def domain_queries(context):
+    return [q for q in context.captured_queries if 'tenants_domain' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedTenantMiddleware(TenantAPITestCase):
+    """
+    Test hostname -> tenant caching, negative caching and invalidation
+    (the per-worker cache, so without a shared routing table)
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        # TenantTestCase.setUpClass skips SimpleTestCase's, so a class decorator wouldn't apply
+        no_routing_table = override_settings(TENANT_ROUTING_TABLE_PATH=None)
+        no_routing_table.enable()
+        self.addCleanup(no_routing_table.disable)
+        tenant_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_second_request_skips_domain_lookup(self):
+        """Test that only the first request hits the Domain table"""
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get('/api/profile/')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(domain_queries(first)) == 1
+
+        hits = tenant_cache.hits
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get('/api/profile/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['tenant_schema'] == self.tenant.schema_name
+        assert domain_queries(second) == []
+        assert tenant_cache.hits == hits + 1
+
+    def test_unmapped_host_is_negative_cached(self):
+        """Test that hosts falling back to public are cached too"""
+        self.client.get('/health/', SERVER_NAME='unmapped.localhost')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/health/', SERVER_NAME='unmapped.localhost')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert domain_queries(context) == []
+        assert response.json()['tenant_cache']['hits'] >= 1
+
+    def test_domain_change_invalidates_cache(self):
+        """Test that adding a domain for a negative-cached host takes effect"""
+        self.client.get('/health/', SERVER_NAME='unmapped.localhost')
+
+        Domain.objects.create(domain='unmapped.localhost', tenant=self.tenant, is_primary=False)
+        connection.set_tenant(self.tenant)
+
+        response = self.client.get('/api/profile/', SERVER_NAME='unmapped.localhost')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['tenant_schema'] == self.tenant.schema_name
@@ -0,0 +1,118 @@
+"""
+Tests for the shared memory-mapped tenant routing table
+"""
+import tempfile
+import threading
+from unittest import mock
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from apps.core.tests import TenantAPITestCase
+from apps.tenants.routing import SharedRoutingTable, FLAG_PRIMARY, get_routing_table
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestSharedRoutingTable(TenantAPITestCase):
+    """
+    Test building, looking up and republishing the routing table
+    """
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = f'{self.tmpdir.name}/routing.tbl'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def test_lookup_from_database(self):
+        """Test that the table is built from Domain rows on first use"""
+        table = SharedRoutingTable(self.path)
+
+        route = table.lookup(self.get_test_tenant_domain())
+
+        assert route.schema_name == self.tenant.schema_name
+        assert route.tenant_id == self.tenant.id
+        assert route.flags & FLAG_PRIMARY
+        assert table.lookup('unknown.localhost') is None
+
+    def test_other_worker_picks_up_new_generation(self):
+        """Test that a rebuild in one process is visible to another reader"""
+        reader = SharedRoutingTable(self.path)
+        writer = SharedRoutingTable(self.path)
+        writer.rebuild(routes=[('a.localhost', 'school_a', 1, 0)])
+        assert reader.lookup('a.localhost').schema_name == 'school_a'
+
+        writer.rebuild(routes=[
+            ('a.localhost', 'school_a', 1, 0),
+            ('b.localhost', 'school_b', 2, FLAG_PRIMARY),
+        ])
+
+        assert reader.generation == writer.generation
+        assert reader.lookup('b.localhost') == ('school_b', 2, FLAG_PRIMARY)
+
+    def test_lookups_during_reloads(self):
+        """Test that lookups racing reloads never see a closed or mismatched table"""
+        routes = [(f'host{i}.localhost', f'school_{i}', i, 0) for i in range(50)]
+        writer = SharedRoutingTable(self.path)
+        writer.rebuild(routes=routes)
+        reader = SharedRoutingTable(self.path)
+        errors = []
+        done = threading.Event()
+
+        def look_up():
+            while not done.is_set():
+                try:
+                    for i in (0, 25, 49):
+                        assert reader.lookup(f'host{i}.localhost').schema_name == f'school_{i}'
+                except Exception as exc:
+                    errors.append(exc)
+                    return
+
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for count in range(100):
+            # Tables of different sizes, so a mismatched count would misread records
+            writer.rebuild(routes=routes + [(f'extra{i}.localhost', 'extra', 0, 0) for i in range(count % 7)])
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+
+    def test_stale_table_refreshed_off_request_thread(self):
+        """Test that a stale table is served while a background thread rebuilds it"""
+        table = SharedRoutingTable(self.path, max_age=0)
+        table.rebuild(routes=[('a.localhost', 'school_a', 1, 0)])
+        routes = [('a.localhost', 'school_a', 1, 0), ('b.localhost', 'school_b', 2, 0)]
+
+        with mock.patch('apps.tenants.routing.load_routes', return_value=routes) as load:
+            with CaptureQueriesContext(connection) as context:
+                assert table.lookup('b.localhost') is None
+            table._refresh_thread.join()
+
+        assert load.call_count == 1
+        assert context.captured_queries == []
+        assert table.lookup('b.localhost').schema_name == 'school_b'
+
+    def test_middleware_resolves_without_domain_query(self):
+        """Test that requests are routed from the table with no Domain lookup"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=user)
+
+        with override_settings(TENANT_ROUTING_TABLE_PATH=self.path):
+            get_routing_table().rebuild()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/api/profile/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['tenant_schema'] == self.tenant.schema_name
+        assert not [q for q in context.captured_queries if 'tenants_domain' in q['sql']]
@@ -27,6 +27,17 @@ PUBLIC_SCHEMA_URLCONF = 'config.urls_public'
 # This ensures admin panel and public URLs are always accessible without manual domain setup
 SHOW_PUBLIC_IF_NO_TENANT_FOUND = True
 
+# Hostname -> tenant cache used by CachedTenantMainMiddleware (per worker)
+# Invalidated on Client/Domain changes; TTL bounds staleness across workers
+TENANT_CACHE_MAXSIZE = int(os.getenv('TENANT_CACHE_MAXSIZE', '10000'))
+TENANT_CACHE_TTL = int(os.getenv('TENANT_CACHE_TTL', '300'))  # seconds
+
+# Shared memory-mapped routing table (apps.tenants.routing), read by all workers on a host
+# Set to a file on tmpfs (e.g. /dev/shm/tenant-routing.tbl) to enable; replaces the per-worker cache
+TENANT_ROUTING_TABLE_PATH = os.getenv('TENANT_ROUTING_TABLE_PATH') or None
+# Rebuild tables older than this (seconds) to pick up changes made on other hosts
+TENANT_ROUTING_TABLE_MAX_AGE = int(os.getenv('TENANT_ROUTING_TABLE_MAX_AGE', '60'))
+
 # Shared apps - available across all tenants in the public schema
 SHARED_APPS = (
     'django_tenants',  # Must be first
@@ -52,6 +63,7 @@ TENANT_APPS = (
     'django.contrib.auth',
 
     # Custom tenant apps
+    'apps.authentication',
     'apps.api',
 )
 
@@ -62,7 +74,7 @@ INSTALLED_APPS = list(SHARED_APPS) + [
 
 # Middleware (TenantMainMiddleware MUST be first)
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware',  # Must be first!
+    'apps.tenants.middleware.CachedTenantMainMiddleware',  # Must be first!
 
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files
@@ -102,20 +114,42 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database - PostgreSQL with tenant support
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        # django_tenants backend that skips redundant `SET search_path` round trips
+        'ENGINE': 'apps.tenants.postgresql_backend',
         'NAME': os.getenv('POSTGRES_DB', 'multitenant_db'),
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # Persistent connections let the backend reuse the session search_path
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        # 'transaction' applies the tenant search_path with SET LOCAL per transaction,
+        # required behind PgBouncer in transaction pooling mode (default: 'session')
+        'SEARCH_PATH_MODE': os.getenv('POSTGRES_SEARCH_PATH_MODE', 'session'),
     }
 }
 
+if DATABASES['default']['SEARCH_PATH_MODE'] == 'transaction':
+    # One transaction (and one SET LOCAL) per request; server-side cursors don't survive pooling
+    DATABASES['default']['ATOMIC_REQUESTS'] = True
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 # Database router for tenant isolation
 DATABASE_ROUTERS = (
     'django_tenants.routers.TenantSyncRouter',
 )
 
+# Authentication backends
+# Tenant logins verify passwords on a bounded pool (429 when saturated). The limits are per
+# worker process unless TENANT_LOGIN_HASH_SLOTS_PATH names lock files shared by all workers on
+# the host (e.g. /dev/shm/login-hash); sync workers need it, as they run one request at a time
+AUTHENTICATION_BACKENDS = ['apps.authentication.backends.BoundedPasswordHashBackend']
+TENANT_LOGIN_HASH_WORKERS = int(os.getenv('TENANT_LOGIN_HASH_WORKERS', '2'))
+TENANT_LOGIN_HASH_QUEUE = int(os.getenv('TENANT_LOGIN_HASH_QUEUE', '8'))  # logins waiting for a hash worker
+TENANT_LOGIN_HASH_SLOTS_PATH = os.getenv('TENANT_LOGIN_HASH_SLOTS_PATH') or None
+TENANT_LOGIN_RETRY_AFTER = 1  # seconds, sent as Retry-After on 429
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -147,7 +181,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Reuses the token validated by TenantJWTValidationMiddleware (one decode per request)
+        'apps.authentication.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -156,13 +191,62 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Caches: 'tenant' keeps a partition per tenant schema with its own LRU and byte budget,
+# so tenants can't collide or evict each other (apps.tenants.cache). It is in-process
+# (per worker) only, like LocMemCache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tenant': {
+        'BACKEND': 'apps.tenants.cache.TenantLocMemCache',
+        'LOCATION': 'tenant',
+        'OPTIONS': {
+            'TENANT_MAX_BYTES': int(os.getenv('TENANT_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+        },
+    },
+}
+
+# Paginated counts use the planner estimate (pg_class.reltuples) at or above this many rows
+# and no filters; smaller or filtered querysets are counted exactly
+TENANT_EXACT_COUNT_THRESHOLD = int(os.getenv('TENANT_EXACT_COUNT_THRESHOLD', '10000'))
+
+# Rows fetched per server-side cursor round trip (or keyset batch) by /api/items/export/
+API_EXPORT_CHUNK_SIZE = int(os.getenv('API_EXPORT_CHUNK_SIZE', '2000'))
+
+# Item read response cache (apps.api.cache): bytes each tenant may hold in a worker's
+# partitioned cache (0 disables), seconds an entry lives, and the CACHES alias of an
+# optional networked second layer (e.g. Redis) shared by all workers; empty disables it
+API_RESPONSE_CACHE_TENANT_BYTES = int(os.getenv('API_RESPONSE_CACHE_TENANT_BYTES', str(4 * 1024 * 1024)))
+API_RESPONSE_CACHE_TTL = int(os.getenv('API_RESPONSE_CACHE_TTL', '300'))
+API_RESPONSE_CACHE_ALIAS = os.getenv('API_RESPONSE_CACHE_ALIAS') or None
+
+# Most operations accepted by one /api/items/bulk/ request (all applied in one transaction)
+API_BULK_MAX_OPERATIONS = int(os.getenv('API_BULK_MAX_OPERATIONS', '500'))
+
+# Delta sync (/api/items/changes/): rows per response, and days tombstones are kept
+# (older tokens get 410 Gone; prune with `manage.py prune_item_tombstones`)
+API_SYNC_PAGE_SIZE = int(os.getenv('API_SYNC_PAGE_SIZE', '500'))
+API_SYNC_TOMBSTONE_RETENTION = int(os.getenv('API_SYNC_TOMBSTONE_RETENTION', '30'))
+
+# /api/items/import/ and `manage.py import_items`: rows validated and COPY'd per batch,
+# and the most invalid rows listed in the error report
+API_IMPORT_BATCH_SIZE = int(os.getenv('API_IMPORT_BATCH_SIZE', '5000'))
+API_IMPORT_MAX_ERRORS = int(os.getenv('API_IMPORT_MAX_ERRORS', '100'))
+
+# Tenants with partitioned items tables (`manage.py partition_items`): month partitions
+# kept created this many months ahead by `manage.py partition_items --ensure`
+API_ITEM_PARTITION_MONTHS_AHEAD = int(os.getenv('API_ITEM_PARTITION_MONTHS_AHEAD', '3'))
+
 # Simple JWT configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Rotated refresh tokens are revoked by apps.authentication.revocation, not the blacklist app
     'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is recorded by TenantTokenObtainPairSerializer (see TENANT_LAST_LOGIN_BUFFER)
+    'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -175,6 +259,25 @@ SIMPLE_JWT = {
     'TOKEN_OBTAIN_SERIALIZER': 'apps.authentication.serializers.TenantTokenObtainPairSerializer',
 }
 
+# Stateless request users: build request.user from token claims instead of querying auth_user
+# Disabled users are rejected via a per-tenant is_active cache (TTL bounds cross-worker staleness)
+TENANT_JWT_STATELESS_USER = os.getenv('TENANT_JWT_STATELESS_USER', 'False') == 'True'
+TENANT_JWT_ACTIVE_CACHE_TTL = int(os.getenv('TENANT_JWT_ACTIVE_CACHE_TTL', '60'))  # seconds
+
+# Verified access tokens kept per worker until their exp (0 disables the cache)
+TENANT_JWT_TOKEN_CACHE_MAXSIZE = int(os.getenv('TENANT_JWT_TOKEN_CACHE_MAXSIZE', '10000'))
+
+# Tenant-scoped token revocation (logout, refresh rotation) checked via a per-worker Bloom filter
+TENANT_JWT_REVOCATION = os.getenv('TENANT_JWT_REVOCATION', 'True') == 'True'
+TENANT_JWT_REVOCATION_REFRESH = int(os.getenv('TENANT_JWT_REVOCATION_REFRESH', '5'))  # seconds
+TENANT_JWT_REVOCATION_ERROR_RATE = 0.001  # Bloom filter false positive rate
+
+# Buffer last_login updates on token issuance and write them in bulk per schema
+# (False: synchronous UPDATE on every login)
+TENANT_LAST_LOGIN_BUFFER = os.getenv('TENANT_LAST_LOGIN_BUFFER', 'True') == 'True'
+TENANT_LAST_LOGIN_MAX_STALENESS = int(os.getenv('TENANT_LAST_LOGIN_MAX_STALENESS', '10'))  # seconds
+TENANT_LAST_LOGIN_MAX_PENDING = 10000  # flush early once this many logins are waiting
+
 # CORS configuration
 CORS_ALLOWED_ORIGINS = os.getenv(
     'CORS_ALLOWED_ORIGINS',
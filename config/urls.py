@@ -3,13 +3,13 @@ Main URL configuration (for tenant schemas)
 This is used for all tenant-specific requests
 """
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenRefreshView
-from apps.authentication.views import TenantTokenObtainPairView
+from apps.authentication.views import TenantTokenObtainPairView, TenantTokenRefreshView, TokenRevokeView
 
 urlpatterns = [
     # JWT Authentication endpoints
     path('api/token/', TenantTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', TenantTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
 
     # API endpoints
     path('api/', include('apps.api.urls')),
@@ -4,12 +4,25 @@ These URLs are accessible on the main domain (not tenant subdomains)
 """
 from django.contrib import admin
 from django.urls import path
+from django.db import connection
 from django.http import JsonResponse
+from apps.tenants.middleware import get_tenant_cache_stats
+from apps.authentication.backends import get_password_hash_pool_stats
+from apps.authentication.tokens import get_token_cache_stats
+from apps.api.cache import get_response_cache_stats
 
 
 def health_check(request):
     """Simple health check endpoint for Docker/monitoring"""
-    return JsonResponse({'status': 'ok', 'message': 'Django multi-tenant app is running'})
+    return JsonResponse({
+        'status': 'ok',
+        'message': 'Django multi-tenant app is running',
+        'tenant_cache': get_tenant_cache_stats(),
+        'token_cache': get_token_cache_stats(),
+        'response_cache': get_response_cache_stats(),
+        'password_hash_pool': get_password_hash_pool_stats(),
+        'search_path_switches': getattr(connection, 'search_path_stats', None),
+    })
 
 
 def home(request):